@@ -0,0 +1,318 @@
+"""
+Per-day training totals over the workouts dataset, maintained incrementally.
+"""
+import math
+import threading
+from bisect import bisect_left, bisect_right, insort
+from typing import Any, Dict, Iterable, List, Optional, Tuple
+
+try:
+    from backend.models import day_key, day_ordinal
+except ImportError:
+    from models import day_key, day_ordinal
+
+
+def _contribution(entry: Dict[str, Any]) -> Tuple[int, float, float, float]:
+    """(sets, volume, top weight, best Epley 1RM) of one workout."""
+    sets, volume, top, one_rm = 0, 0.0, 0.0, 0.0
+    for s in entry.get("sets") or ():
+        try:
+            weight = float(s.get("weight_kg", 0))
+            reps = float(s.get("reps", 0))
+        except Exception:
+            continue
+        sets += 1
+        volume += weight * reps
+        if weight > top:
+            top = weight
+        whole = math.floor(reps)
+        if weight > 0 and whole > 0:
+            one_rm = max(one_rm, weight * (1.0 + whole / 30.0))
+    return sets, volume, top, one_rm
+
+
+class RollupRow:
+    """Totals for one (date, exercise) over the workouts logged for it."""
+
+    __slots__ = ("date", "exercise", "category", "workouts", "sets", "volume", "top_weight", "one_rm",
+                 "category_volume", "category_first", "_parts")
+
+    def __init__(self, date: str, exercise: Any):
+        self.date = date
+        self.exercise = exercise
+        self._parts: Dict[int, Tuple[Any, int, float, float, float]] = {}
+        self._reset()
+
+    def _reset(self):
+        self.category = None
+        self.workouts = 0
+        self.sets = 0
+        self.volume = 0.0
+        self.top_weight = 0.0
+        self.one_rm = 0.0
+        self.category_volume: Dict[Any, float] = {}
+        self.category_first: Dict[Any, int] = {}
+
+    def _fold(self, seq: int, part: Tuple[Any, int, float, float, float]):
+        category, sets, volume, top, one_rm = part
+        if self.category is None:
+            self.category = category
+        self.workouts += 1
+        self.sets += sets
+        self.volume += volume
+        self.top_weight = max(self.top_weight, top)
+        self.one_rm = max(self.one_rm, one_rm)
+        self.category_volume[category] = self.category_volume.get(category, 0.0) + volume
+        if category not in self.category_first:
+            self.category_first[category] = seq
+
+    def add(self, seq: int, part: Tuple[Any, int, float, float, float]):
+        self._parts[seq] = part
+        self._fold(seq, part)
+
+    def remove(self, seq: int):
+        # Maxima cannot be decremented, so refold the (few) remaining workouts
+        del self._parts[seq]
+        self._reset()
+        for s, part in self._parts.items():
+            self._fold(s, part)
+
+
+class RunningPr:
+    """Prefix maxima of the daily best 1RM for one exercise: best[i] is the
+    best estimate on or before dates[i], first reached on best_date[i]."""
+
+    __slots__ = ("dates", "best", "best_date")
+
+    def __init__(self, rows: Iterable[RollupRow] = ()):
+        self.dates: List[str] = []
+        self.best: List[float] = []
+        self.best_date: List[Optional[str]] = []
+        for row in rows:
+            self.dates.append(row.date)
+            self.best.append(self.best[-1] if self.best else 0.0)
+            self.best_date.append(self.best_date[-1] if self.best_date else None)
+            self._raise(len(self.dates) - 1, row.date, row.one_rm)
+
+    def _raise(self, i: int, date: str, one_rm: float):
+        # best is non-decreasing, so later entries stop needing updates early
+        for j in range(i, len(self.best)):
+            if self.best[j] >= one_rm:
+                break
+            self.best[j] = one_rm
+            self.best_date[j] = date
+
+    def update(self, date: str, one_rm: float):
+        """Fold in the (possibly raised) daily best for date."""
+        i = bisect_left(self.dates, date)
+        if i == len(self.dates) or self.dates[i] != date:
+            self.dates.insert(i, date)
+            self.best.insert(i, self.best[i - 1] if i else 0.0)
+            self.best_date.insert(i, self.best_date[i - 1] if i else None)
+        self._raise(i, date, one_rm)
+
+    def as_of(self, date: Optional[str] = None) -> Optional[Tuple[str, float]]:
+        """(date reached, best 1RM) over days <= date, None before the first valid set."""
+        i = len(self.dates) if date is None else bisect_right(self.dates, date)
+        if not i or self.best_date[i - 1] is None:
+            return None
+        return self.best_date[i - 1], self.best[i - 1]
+
+
+class DayVolumeSeries:
+    """Volume for every calendar day from the first training day on, with
+    prefix sums so the total over any window of days is two lookups.
+
+    Updates set one day's total; prefix sums after it are recomputed lazily
+    on the next query, so appending the latest day costs O(1) amortized.
+    Both hold ``_lock``, so a set() during a recompute is not marked valid.
+    """
+
+    __slots__ = ("first", "daily", "_prefix", "_valid", "_lock")
+
+    def __init__(self):
+        self.first: Optional[int] = None
+        self.daily: List[float] = []
+        self._prefix: List[float] = [0.0]
+        self._valid = 0
+        self._lock = threading.Lock()
+
+    def set(self, day: int, volume: float):
+        with self._lock:
+            self._set(day, volume)
+
+    def _set(self, day: int, volume: float):
+        if self.first is None:
+            self.first = day
+        elif day < self.first:
+            self.daily[:0] = [0.0] * (self.first - day)
+            self.first = day
+            self._valid = 0
+        i = day - self.first
+        if i >= len(self.daily):
+            self.daily.extend([0.0] * (i + 1 - len(self.daily)))
+        self.daily[i] = volume
+        self._valid = min(self._valid, i)
+
+    def _prefix_sums(self) -> List[float]:
+        n = len(self.daily)
+        prefix = self._prefix
+        if len(prefix) != n + 1:
+            del prefix[n + 1:]
+            prefix.extend([0.0] * (n + 1 - len(prefix)))
+        for k in range(self._valid, n):
+            prefix[k + 1] = prefix[k] + self.daily[k]
+        self._valid = n
+        return prefix
+
+    def window(self, end: int, days: int) -> float:
+        """Total volume over the days ordinals end - days + 1 .. end."""
+        with self._lock:
+            if self.first is None:
+                return 0.0
+            prefix = self._prefix_sums()
+            n = len(self.daily)
+            hi = min(max(end - self.first + 1, 0), n)
+            lo = min(max(end - days - self.first + 1, 0), n)
+            return prefix[hi] - prefix[lo]
+
+
+class DailyRollup:
+    """Rows keyed by (date, exercise) with workouts, sets, volume, top weight
+    and best Epley 1RM, plus volume per category.
+
+    ``dates`` and the per-exercise date lists are kept sorted so range queries
+    cost one bisect plus the number of training days in range. Workouts whose
+    date does not parse are left out, as in the analytics.
+
+    Running PRs per exercise are built on first use, raised in place by
+    later workouts and dropped (to be rebuilt) when a workout is removed.
+
+    The JSON store updates its rollup in place from the writer thread while
+    request threads read it. Every method holds ``lock``; readers that make
+    several calls or read rows and attributes directly hold it around the
+    whole computation for a consistent view.
+    """
+
+    def __init__(self, workouts: Iterable[Dict[str, Any]] = ()):
+        self.lock = threading.RLock()
+        self.rows: Dict[Tuple[str, Any], RollupRow] = {}
+        self.dates: List[str] = []
+        self.by_date: Dict[str, Dict[Any, RollupRow]] = {}
+        self.by_exercise: Dict[Any, List[str]] = {}
+        self._members: Dict[Any, Tuple[Tuple[str, Any], int]] = {}
+        self._prs: Dict[Any, RunningPr] = {}
+        self.volume = DayVolumeSeries()
+        self._seq = 0
+        for w in workouts:
+            self.add(w)
+
+    def add(self, entry: Dict[str, Any]):
+        with self.lock:
+            wid = entry.get("id")
+            if wid is not None and wid in self._members:
+                self.remove(wid)
+            date = day_key(entry.get("date"))
+            if date is None:
+                return
+            self._seq += 1
+            exercise = entry.get("exercise")
+            key = (date, exercise)
+            row = self.rows.get(key)
+            if row is None:
+                row = self.rows[key] = RollupRow(date, exercise)
+                if date not in self.by_date:
+                    insort(self.dates, date)
+                    self.by_date[date] = {}
+                self.by_date[date][exercise] = row
+                insort(self.by_exercise.setdefault(exercise, []), date)
+            row.add(self._seq, (entry.get("category") or "Unknown", *_contribution(entry)))
+            running = self._prs.get(exercise)
+            if running is not None:
+                running.update(date, row.one_rm)
+            self._set_day_volume(date)
+            self._members[wid if wid is not None else ("#", self._seq)] = (key, self._seq)
+
+    def remove(self, workout_id: Any):
+        with self.lock:
+            member = self._members.pop(workout_id, None)
+            if member is None:
+                return
+            key, seq = member
+            self._prs.pop(key[1], None)
+            row = self.rows[key]
+            row.remove(seq)
+            date, exercise = key
+            if row.workouts:
+                self._set_day_volume(date)
+                return
+            del self.rows[key]
+            day = self.by_date[date]
+            del day[exercise]
+            if not day:
+                del self.by_date[date]
+                del self.dates[bisect_left(self.dates, date)]
+            self._set_day_volume(date)
+            dates = self.by_exercise[exercise]
+            del dates[bisect_left(dates, date)]
+            if not dates:
+                del self.by_exercise[exercise]
+
+    def _set_day_volume(self, date: str):
+        # Re-summed from the day's rows rather than adjusted, so removals leave no float drift
+        rows = self.by_date.get(date, {}).values()
+        self.volume.set(day_ordinal(date), sum(r.volume for r in rows))
+
+    def series(self, exercise: Any, start: Optional[str] = None, end: Optional[str] = None) -> List[RollupRow]:
+        """Rows for one exercise with start <= date <= end, by date."""
+        with self.lock:
+            dates = self.by_exercise.get(exercise, ())
+            lo, hi = _bounds(dates, start, end)
+            return [self.rows[(d, exercise)] for d in dates[lo:hi]]
+
+    def running_pr(self, exercise: Any) -> RunningPr:
+        # Built under the lock so a concurrent add cannot land between the
+        # scan and the registration and be missed by the cached prefix maxima
+        with self.lock:
+            running = self._prs.get(exercise)
+            if running is None:
+                running = self._prs[exercise] = RunningPr(self.series(exercise))
+            return running
+
+    def best_as_of(self, exercise: Any, date: Optional[str] = None) -> Optional[Tuple[str, float]]:
+        """Best estimated 1RM for exercise on or before date, with the day it was set."""
+        with self.lock:
+            return self.running_pr(exercise).as_of(date)
+
+    def is_new_pr(self, entry: Dict[str, Any]) -> bool:
+        """Whether entry's best 1RM beats the running PR as of its date
+        (call before adding it)."""
+        date = day_key(entry.get("date"))
+        one_rm = _contribution(entry)[3]
+        if date is None or one_rm <= 0:
+            return False
+        with self.lock:
+            prior = self.best_as_of(entry.get("exercise"), date)
+        return prior is None or one_rm > prior[1]
+
+    def between(self, start: Optional[str] = None, end: Optional[str] = None) -> List[RollupRow]:
+        """All rows with start <= date <= end, by date."""
+        with self.lock:
+            lo, hi = _bounds(self.dates, start, end)
+            return [row for d in self.dates[lo:hi] for row in self.by_date[d].values()]
+
+    def day_totals(self, start: Optional[str] = None, end: Optional[str] = None) -> List[Tuple[str, int, int, float]]:
+        """(date, workouts, sets, volume) per training day in range."""
+        with self.lock:
+            lo, hi = _bounds(self.dates, start, end)
+            out = []
+            for d in self.dates[lo:hi]:
+                rows = self.by_date[d].values()
+                out.append((d, sum(r.workouts for r in rows), sum(r.sets for r in rows), sum(r.volume for r in rows)))
+            return out
+
+
+def _bounds(dates: List[str], start: Optional[str], end: Optional[str]) -> Tuple[int, int]:
+    lo = 0 if start is None else bisect_left(dates, start)
+    hi = len(dates) if end is None else bisect_right(dates, end)
+    return lo, hi
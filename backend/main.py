@@ -1,16 +1,24 @@
-from fastapi import FastAPI, HTTPException, Depends, status, Response
+from fastapi import FastAPI, HTTPException, Depends, Query, status, Response, Request
 from fastapi.middleware.cors import CORSMiddleware
+from fastapi.encoders import jsonable_encoder
+from fastapi.responses import JSONResponse, StreamingResponse
+from starlette.concurrency import run_in_threadpool
 from typing import List, Optional
 from datetime import date
-from pydantic import BaseModel
+from pydantic import BaseModel, ValidationError, field_validator
 import uuid
 import json
+import base64
+import binascii
+import hashlib
 import os
 from pathlib import Path
 
 # Prefer package-qualified imports when running as backend.main; fall back for test context
 try:
-    from backend.storage import read_json, write_json, append_workouts
+    from backend.storage import cache_stats, group_commit_stats
+    from backend.repository import get_repository
+    from backend.models import canonical_date
     from backend.schemas.user_schemas import (
         UserRegisterRequest,
         UserRegisterResponse,
@@ -40,10 +48,11 @@ try:
         get_comments,
         delete_comment,
     )
-    from backend.services.analytics_service import pr_trend, muscle_volume_by_category, exercise_detail
-    from backend.services.coach_service import recommend as coach_recommend
+    from backend.services.config_service import get_config_snapshot, ConfigError
 except ImportError:
-    from storage import read_json, write_json, append_workouts
+    from storage import cache_stats, group_commit_stats
+    from repository import get_repository
+    from models import canonical_date
     from schemas.user_schemas import (
         UserRegisterRequest,
         UserRegisterResponse,
@@ -73,21 +82,15 @@ except ImportError:
         get_comments,
         delete_comment,
     )
-    from services.analytics_service import pr_trend, muscle_volume_by_category, exercise_detail
-    from services.coach_service import recommend as coach_recommend
+    from services.config_service import get_config_snapshot, ConfigError
 
 app = FastAPI(title="My Workout API")
 
 # Database path
 db_path = os.path.join(os.path.dirname(__file__), 'data', 'workout.db')
 
-# External AI via OpenAI SDK targeting OpenRouter
-import os
-from dotenv import load_dotenv
-from openai import OpenAI
-
-load_dotenv()
-
+# External AI via OpenAI SDK targeting OpenRouter. backend/.env has already
+# been loaded by auth_service; the SDK is imported on the first AI request.
 OPENAI_API_KEY = os.getenv("OPENAI_API_KEY")
 OPENAI_BASE_URL = os.getenv("OPENAI_BASE_URL", "https://openrouter.ai/api/v1")
 MODEL = os.getenv("OPENAI_MODEL", "openai/gpt-oss-20b:free")
@@ -101,6 +104,7 @@ def get_openai_client():
     if client is None:
         if not OPENAI_API_KEY:
             raise HTTPException(status_code=500, detail="OPENAI_API_KEY is not set")
+        from openai import OpenAI
         client = OpenAI(base_url=OPENAI_BASE_URL, api_key=OPENAI_API_KEY)
     return client
 
@@ -134,6 +138,12 @@ class WorkoutCreateModel(BaseModel):
     cardio: Optional[CardioRecordModel] = None
     notes: Optional[str] = None
 
+    @field_validator("date", mode="before")
+    @classmethod
+    def _canonical_date(cls, value):
+        # Stored dates are always YYYY-MM-DD, so queries can compare them as-is
+        return canonical_date(value)
+
 class RoutineItemModel(BaseModel):
     exercise: str
     category: str
@@ -149,6 +159,40 @@ class ActivityCreateModel(BaseModel):
     type: str
     ref_id: Optional[str] = None
 
+# Conditional GETs: the ETag is derived from the storage data version plus
+# the request path and query, so requests for unchanged data are answered
+# with 304 before anything is read or serialized.
+CACHE_CONTROL = "private, no-cache"
+
+def _etag_matches(if_none_match: Optional[str], etag: str) -> bool:
+    if not if_none_match:
+        return False
+    tags = [t.strip() for t in if_none_match.split(",")]
+    return "*" in tags or etag in tags or f"W/{etag}" in tags
+
+def _conditional(request: Request, version: str, build) -> Response:
+    key = f"{version}|{request.url.path}?{request.url.query}"
+    etag = '"%s"' % hashlib.sha1(key.encode("utf-8")).hexdigest()
+    headers = {"ETag": etag, "Cache-Control": CACHE_CONTROL}
+    if _etag_matches(request.headers.get("if-none-match"), etag):
+        return Response(status_code=status.HTTP_304_NOT_MODIFIED, headers=headers)
+    result = build()
+    if isinstance(result, Response):
+        result.headers.update(headers)
+        return result
+    return JSONResponse(jsonable_encoder(result), headers=headers)
+
+def _workouts_version() -> str:
+    return get_repository().data_version("workouts")
+
+def _analytics():
+    # Imported on first use: analytics pulls in NumPy, which dominates startup
+    try:
+        from backend.services import analytics_service
+    except ImportError:
+        from services import analytics_service
+    return analytics_service
+
 # API Routes
 
 @app.get("/")
@@ -156,20 +200,96 @@ def read_root():
     return {"message": "My Workout API"}
 
 @app.get("/api/config")
-def get_config():
-    return read_json("config")
+def get_config(request: Request):
+    """Serve the in-memory config as pre-serialized bytes."""
+    try:
+        snapshot = get_config_snapshot()
+    except ConfigError as e:
+        raise HTTPException(status_code=500, detail=f"invalid config.json: {e}")
+    headers = {"ETag": snapshot.etag, "Cache-Control": CACHE_CONTROL}
+    if _etag_matches(request.headers.get("if-none-match"), snapshot.etag):
+        return Response(status_code=status.HTTP_304_NOT_MODIFIED, headers=headers)
+    return Response(content=snapshot.body, media_type="application/json", headers=headers)
+
+WORKOUT_FIELDS = ("id", "date", "category", "exercise", "type", "sets", "cardio", "notes")
+WORKOUTS_MAX_LIMIT = 1000
+EXPORT_PAGE_SIZE = 1000
+
+def _encode_cursor(w: dict) -> str:
+    raw = json.dumps([w.get("date") or "", w.get("id") or ""], ensure_ascii=False).encode("utf-8")
+    return base64.urlsafe_b64encode(raw).decode("ascii")
+
+def _decode_cursor(cursor: str) -> tuple:
+    try:
+        d, wid = json.loads(base64.urlsafe_b64decode(cursor.encode("ascii")))
+        return str(d), str(wid)
+    except (ValueError, TypeError, binascii.Error):
+        raise HTTPException(status_code=400, detail="invalid cursor")
+
+def _date_bounds(*values: str | None) -> List[str | None]:
+    # Query dates are canonicalized once here; services only see YYYY-MM-DD or None
+    try:
+        return [canonical_date(v) if v else None for v in values]
+    except ValueError as e:
+        raise HTTPException(status_code=400, detail=str(e))
 
 @app.get("/api/workouts")
-def get_workouts():
-    return read_json("workouts")
+def get_workouts(request: Request, start: str | None = None, end: str | None = None, limit: int | None = None,
+                 cursor: str | None = None, fields: str | None = None):
+    """All workouts, or a date-ordered page/export when any filter is given.
+
+    With ``limit`` the response is ``{"items": [...], "next_cursor": ...}``;
+    filters without ``limit`` stream every match as a JSON array.
+    """
+    start, end = _date_bounds(start, end)
+    repo = get_repository()
+    return _conditional(request, repo.data_version("workouts"),
+                        lambda: _query_workouts(repo, start, end, limit, cursor, fields))
+
+def _query_workouts(repo, start, end, limit, cursor, fields):
+    if start is None and end is None and limit is None and cursor is None and fields is None:
+        return repo.list_workouts()
+
+    keys = None
+    if fields:
+        keys = [f.strip() for f in fields.split(",") if f.strip()]
+        unknown = [f for f in keys if f not in WORKOUT_FIELDS]
+        if unknown:
+            raise HTTPException(status_code=400, detail=f"unknown fields: {', '.join(unknown)}")
+
+    def project(w: dict) -> dict:
+        return w if keys is None else {k: w.get(k) for k in keys}
+
+    after = _decode_cursor(cursor) if cursor else None
+    if limit is not None:
+        if limit < 1 or limit > WORKOUTS_MAX_LIMIT:
+            raise HTTPException(status_code=400, detail=f"limit must be in [1, {WORKOUTS_MAX_LIMIT}]")
+        # Fetch one extra row to learn whether another page exists
+        rows = repo.query_workouts(start, end, after, limit + 1)
+        page = rows[:limit]
+        next_cursor = _encode_cursor(page[-1]) if len(rows) > limit else None
+        return {"items": [project(w) for w in page], "next_cursor": next_cursor}
+
+    def export():
+        key = after
+        sep = "["
+        while True:
+            rows = repo.query_workouts(start, end, key, EXPORT_PAGE_SIZE)
+            for w in rows:
+                yield sep + json.dumps(project(w), ensure_ascii=False)
+                sep = ","
+            if len(rows) < EXPORT_PAGE_SIZE:
+                break
+            key = (rows[-1].get("date") or "", rows[-1].get("id") or "")
+        yield "[]" if sep == "[" else "]"
+
+    return StreamingResponse(export(), media_type="application/json")
 
 @app.get("/api/workouts/{target_date}")
-def get_workouts_by_date(target_date: str):
-    workouts = read_json("workouts")
-    return [w for w in workouts if w.get("date") == target_date]
+def get_workouts_by_date(request: Request, target_date: str):
+    return _conditional(request, _workouts_version(), lambda: get_repository().workouts_on(target_date))
 
-@app.post("/api/workouts")
-def add_workout(workout: WorkoutCreateModel):
+def _workout_entry(workout: WorkoutCreateModel) -> dict:
     # Normalize sets to weight_kg/reps only
     norm_sets = []
     if workout.sets:
@@ -179,7 +299,7 @@ def add_workout(workout: WorkoutCreateModel):
                 "reps": int(s.reps),
             })
 
-    entry = {
+    return {
         "id": str(uuid.uuid4()),
         "date": workout.date,
         "category": workout.category,
@@ -189,83 +309,244 @@ def add_workout(workout: WorkoutCreateModel):
         "cardio": workout.cardio.model_dump() if workout.cardio else None,
         "notes": workout.notes,
     }
-    
-    data = read_json("workouts")
-    data.append(entry)
-    write_json("workouts", data)
-    return entry
+
+@app.post("/api/workouts")
+def add_workout(workout: WorkoutCreateModel):
+    entry = _workout_entry(workout)
+    # Decided by the store as it commits, so each workout of a concurrent
+    # burst is compared with the history and the workouts committed before it
+    is_pr = get_repository().add_workout(entry, check_pr=True)
+    return {**entry, "is_pr": is_pr}
+
+# Bulk import: rows are committed every BULK_COMMIT_ROWS valid lines, and at
+# most BULK_MAX_ERRORS per-line errors are echoed back (all are counted). A line
+# longer than BULK_MAX_LINE_BYTES fails and is skipped up to its newline, so the
+# buffer never holds more than one capped line.
+BULK_COMMIT_ROWS = 5000
+BULK_MAX_ERRORS = 100
+BULK_MAX_LINE_BYTES = 1 << 20
+
+@app.post("/api/workouts/bulk")
+async def bulk_import_workouts(request: Request):
+    """Import workouts from an NDJSON body (one WorkoutCreateModel per line)."""
+    repo = get_repository()
+    pending: List[dict] = []
+    errors: List[dict] = []
+    counts = {"imported": 0, "failed": 0, "lines": 0}
+
+    def fail(line_no: int, message: str):
+        counts["failed"] += 1
+        if len(errors) < BULK_MAX_ERRORS:
+            errors.append({"line": line_no, "error": message})
+
+    def take(lines: List[tuple]):
+        # Runs in the threadpool: pydantic validation is CPU-bound
+        for line_no, raw in lines:
+            if not raw.strip():
+                continue
+            counts["lines"] += 1
+            try:
+                pending.append(_workout_entry(WorkoutCreateModel.model_validate_json(raw)))
+            except ValidationError as e:
+                first = e.errors()[0]
+                loc = ".".join(str(p) for p in first.get("loc", ()))
+                fail(line_no, f"{loc}: {first['msg']}" if loc else first["msg"])
+
+    async def flush():
+        batch = pending[:]
+        pending.clear()
+        await run_in_threadpool(repo.add_workouts, batch)
+        counts["imported"] += len(batch)
+
+    buf = b""
+    line_no = 0
+    skipping = False
+    async for chunk in request.stream():
+        lines = []
+        pieces = chunk.split(b"\n")
+        for i, piece in enumerate(pieces):
+            if not skipping:
+                buf += piece
+                if len(buf) > BULK_MAX_LINE_BYTES:
+                    line_no += 1
+                    counts["lines"] += 1
+                    fail(line_no, f"line exceeds {BULK_MAX_LINE_BYTES} bytes")
+                    buf = b""
+                    skipping = True
+            if i == len(pieces) - 1:
+                break
+            # A newline ends the current line
+            if skipping:
+                skipping = False
+            else:
+                line_no += 1
+                lines.append((line_no, buf))
+            buf = b""
+        if lines:
+            await run_in_threadpool(take, lines)
+        if len(pending) >= BULK_COMMIT_ROWS:
+            await flush()
+    if buf and not skipping:
+        await run_in_threadpool(take, [(line_no + 1, buf)])
+    if pending:
+        await flush()
+    return {**counts, "errors": errors}
 
 @app.delete("/api/workouts/{workout_id}")
 def remove_workout(workout_id: str):
-    data = read_json("workouts")
-    data = [w for w in data if w.get("id") != workout_id]
-    write_json("workouts", data)
+    get_repository().delete_workout(workout_id)
     return {"message": "Workout deleted"}
 
 @app.get("/api/workouts/exercise/{exercise}/last")
-def get_last_workout_for_exercise(exercise: str):
-    workouts = read_json("workouts")
-    items = [w for w in workouts if w.get("exercise") == exercise]
-    items.sort(key=lambda x: x.get("date", ""), reverse=True)
-    return items[0] if items else None
+def get_last_workout_for_exercise(request: Request, exercise: str):
+    return _conditional(request, _workouts_version(), lambda: get_repository().last_for_exercise(exercise))
 
 @app.get("/api/routines")
-def get_routines():
-    return read_json("routines")
+def get_routines(request: Request):
+    repo = get_repository()
+    return _conditional(request, repo.data_version("routines"), repo.list_routines)
 
 @app.post("/api/routines")
 def add_routine(routine: RoutineCreateModel):
-    routines = read_json("routines")
     new_routine = {
         "id": str(uuid.uuid4()),
         "name": routine.name,
         "memo": routine.memo,
         "items": [item.model_dump() for item in routine.items],
     }
-    routines.append(new_routine)
-    write_json("routines", routines)
+    get_repository().add_routine(new_routine)
     return new_routine
 
 @app.delete("/api/routines/{routine_id}")
 def remove_routine(routine_id: str):
-    routines = read_json("routines")
-    routines = [r for r in routines if r.get("id") != routine_id]
-    write_json("routines", routines)
+    get_repository().delete_routine(routine_id)
     return {"message": "Routine deleted"}
 
+@app.get("/api/storage/stats")
+def get_storage_stats():
+    """Snapshot cache and group-commit counters for this worker."""
+    return {**cache_stats(), "group_commit": group_commit_stats()}
+
+def _bucketed_version() -> str:
+    # Bucket boundaries depend on config week_start as well as the workouts
+    return f"{_workouts_version()}|{get_config_snapshot().etag}"
+
+@app.get("/api/analytics/cache-stats")
+def get_analytics_cache_stats():
+    """Analytics result cache size and hit rates per function for this worker."""
+    return _analytics().result_cache_stats()
+
 @app.get("/api/analytics/weekly-volume")
-def get_weekly_volume():
-    from services.analytics_service import weekly_volume
-    return weekly_volume().to_dict(orient="records")
+def get_weekly_volume(request: Request):
+    return _conditional(request, _bucketed_version(), _analytics().weekly_volume)
 
 @app.get("/api/analytics/monthly-volume")
-def get_monthly_volume():
-    from services.analytics_service import monthly_volume
-    return monthly_volume().to_dict(orient="records")
+def get_monthly_volume(request: Request):
+    return _conditional(request, _workouts_version(), _analytics().monthly_volume)
+
+@app.get("/api/analytics/volume")
+def get_volume(request: Request, bucket: str = "week", start: str | None = None, end: str | None = None):
+    """Return training volume per day/week/month/quarter/year within [start, end]."""
+    if bucket not in _analytics().BUCKETS:
+        raise HTTPException(status_code=400, detail=f"bucket must be one of {', '.join(_analytics().BUCKETS)}")
+    start, end = _date_bounds(start, end)
+    return _conditional(request, _bucketed_version(), lambda: _analytics().volume_by_bucket(bucket, start, end))
+
+def _one_rm_formula(formula: str) -> str:
+    formula = (formula or "").strip().lower()
+    if formula not in _analytics().ONE_RM_FORMULAS:
+        raise HTTPException(status_code=400, detail=f"formula must be one of {', '.join(_analytics().ONE_RM_FORMULAS)}")
+    return formula
 
 @app.get("/api/analytics/pr-trend")
-def get_pr_trend(exercise: str, start: str | None = None, end: str | None = None):
+def get_pr_trend(request: Request, exercise: str, start: str | None = None, end: str | None = None, formula: str = "epley"):
     """Return PR (1RM) trend for an exercise within [start, end]."""
     if not exercise or not exercise.strip():
         raise HTTPException(status_code=400, detail="exercise required")
-    return pr_trend(exercise.strip(), start, end)
+    formula = _one_rm_formula(formula)
+    start, end = _date_bounds(start, end)
+    return _conditional(request, _workouts_version(), lambda: _analytics().pr_trend(exercise.strip(), start, end, formula))
+
+PR_BATCH_MAX_EXERCISES = 100
+
+class PrTrendBatchRequest(BaseModel):
+    exercises: List[str] | str = "all"
+    start: Optional[str] = None
+    end: Optional[str] = None
+    formula: str = "epley"
+
+def _batch_exercises(exercises) -> Optional[List[str]]:
+    # "all" (or no names) means every logged exercise; names are deduplicated in order
+    if isinstance(exercises, str):
+        exercises = [exercises]
+    names = list(dict.fromkeys(e.strip() for e in exercises if e and e.strip()))
+    if not names or names == ["all"]:
+        return None
+    if len(names) > PR_BATCH_MAX_EXERCISES:
+        raise HTTPException(status_code=400, detail=f"at most {PR_BATCH_MAX_EXERCISES} exercises per batch")
+    return names
+
+@app.get("/api/analytics/pr-trend/batch")
+def get_pr_trend_batch(request: Request, exercise: List[str] = Query(default=["all"]), start: str | None = None, end: str | None = None, formula: str = "epley"):
+    """Return PR trends keyed by exercise for ?exercise=A&exercise=B (or all)."""
+    names = _batch_exercises(exercise)
+    formula = _one_rm_formula(formula)
+    start, end = _date_bounds(start, end)
+    return _conditional(request, _workouts_version(), lambda: _analytics().pr_trends(names, start, end, formula))
+
+@app.post("/api/analytics/pr-trend/batch")
+def post_pr_trend_batch(req: PrTrendBatchRequest):
+    """Same as the GET form, for exercise lists too long for a query string."""
+    names, formula = _batch_exercises(req.exercises), _one_rm_formula(req.formula)
+    return _analytics().pr_trends(names, *_date_bounds(req.start, req.end), formula)
+
+@app.get("/api/analytics/pr-as-of")
+def get_pr_as_of(request: Request, exercise: str, date: str | None = None, formula: str = "epley"):
+    """Return the best estimated 1RM on or before date as {exercise, as_of, date, one_rm}."""
+    if not exercise or not exercise.strip():
+        raise HTTPException(status_code=400, detail="exercise required")
+    formula = _one_rm_formula(formula)
+    date = _date_bounds(date)[0]
+
+    def build():
+        best = _analytics().pr_as_of(exercise.strip(), date, formula)
+        return {"exercise": exercise.strip(), "as_of": date, **(best or {"date": None, "one_rm": None})}
+    return _conditional(request, _workouts_version(), build)
+
+@app.get("/api/analytics/workload")
+def get_workload(request: Request, start: str | None = None, end: str | None = None, acute: int = 7, chronic: int = 28):
+    """Return daily rolling acute/chronic volume and their ratio (ACWR) within [start, end]."""
+    if not 1 <= acute < chronic <= 365:
+        raise HTTPException(status_code=400, detail="need 1 <= acute < chronic <= 365")
+    start, end = _date_bounds(start, end)
+    bounds = [date.fromisoformat(d) if d else None for d in (start, end)]
+    max_days = _analytics().WORKLOAD_MAX_DAYS
+    if bounds[0] and bounds[1] and not 0 <= (bounds[1] - bounds[0]).days < max_days:
+        raise HTTPException(status_code=400, detail=f"range must be 1-{max_days} days with start <= end")
+    return _conditional(request, _workouts_version(), lambda: _analytics().workload(start, end, acute, chronic))
 
 @app.get("/api/analytics/muscle-volume-range")
-def get_muscle_volume_range(start: str | None = None, end: str | None = None):
+def get_muscle_volume_range(request: Request, start: str | None = None, end: str | None = None):
     """Return aggregated volume by category within [start, end]."""
-    return muscle_volume_by_category(start, end)
+    start, end = _date_bounds(start, end)
+    return _conditional(request, _workouts_version(), lambda: _analytics().muscle_volume_by_category(start, end))
 
 @app.get("/api/analytics/exercise-detail")
-def get_exercise_detail(exercise: str, start: str | None = None, end: str | None = None):
+def get_exercise_detail(request: Request, exercise: str, start: str | None = None, end: str | None = None):
     if not exercise or not exercise.strip():
         raise HTTPException(status_code=400, detail="exercise required")
-    return exercise_detail(exercise.strip(), start, end)
+    start, end = _date_bounds(start, end)
+    return _conditional(request, _workouts_version(), lambda: _analytics().exercise_detail(exercise.strip(), start, end))
 
 @app.get("/api/coach/recommendations")
 def get_coach_recommendations(days: int = 30):
     if days < 7 or days > 180:
         raise HTTPException(status_code=400, detail="days must be in [7, 180]")
-    return coach_recommend(days)
+    try:
+        from backend.services.coach_service import recommend
+    except ImportError:
+        from services.coach_service import recommend
+    return recommend(days)
 
 @app.post("/api/social/activity", status_code=status.HTTP_201_CREATED)
 def create_activity(act: ActivityCreateModel, payload: dict = Depends(auth_dependency)):
@@ -278,7 +559,10 @@ def create_activity(act: ActivityCreateModel, payload: dict = Depends(auth_depen
 
 @app.get("/api/calendar-summary/{target_date}")
 def get_calendar_summary(target_date: str):
-    from services.workouts_service import compute_daily_summary
+    try:
+        from backend.services.workouts_service import compute_daily_summary
+    except ImportError:
+        from services.workouts_service import compute_daily_summary
     sets_count, volume = compute_daily_summary(target_date)
     return {"sets_count": sets_count, "volume": volume}
 
@@ -0,0 +1,48 @@
+"""
+Migration to store cardio on workouts and index the workout tables for the
+SQLite repository's queries.
+
+- workouts: cardio_minutes (REAL), cardio_distance_km (REAL)
+- indexes: workouts(exercise, date), workouts(date), workouts(date, id),
+  workout_sets(workout_id), routine_items(routine_id)
+"""
+
+INDEXES = (
+    ("idx_workouts_exercise_date", "workouts(exercise, date)"),
+    ("idx_workouts_date", "workouts(date)"),
+    ("idx_workouts_date_id", "workouts(date, id)"),
+    ("idx_workout_sets_workout_id", "workout_sets(workout_id)"),
+    ("idx_routine_items_routine_id", "routine_items(routine_id)"),
+)
+
+
+def upgrade(connection):
+    connection.execute("ALTER TABLE workouts ADD COLUMN cardio_minutes REAL;")
+    connection.execute("ALTER TABLE workouts ADD COLUMN cardio_distance_km REAL;")
+    for name, target in INDEXES:
+        connection.execute(f"CREATE INDEX IF NOT EXISTS {name} ON {target};")
+    connection.commit()
+
+
+def downgrade(connection):
+    for name, _ in INDEXES:
+        connection.execute(f"DROP INDEX IF EXISTS {name};")
+    # SQLite doesn't support DROP COLUMN directly; recreate table without columns
+    cursor = connection.cursor()
+    cursor.execute("BEGIN TRANSACTION;")
+    cursor.execute(
+        """
+        CREATE TABLE workouts_new (
+            id TEXT PRIMARY KEY,
+            date TEXT,
+            category TEXT,
+            exercise TEXT,
+            type TEXT,
+            notes TEXT
+        );
+        """
+    )
+    cursor.execute("INSERT INTO workouts_new (id, date, category, exercise, type, notes) SELECT id, date, category, exercise, type, notes FROM workouts;")
+    cursor.execute("DROP TABLE workouts;")
+    cursor.execute("ALTER TABLE workouts_new RENAME TO workouts;")
+    connection.commit()
@@ -1,17 +1,126 @@
-from typing import List, Optional
-from datetime import date
+import gc
+import sys
+from collections.abc import Mapping
+from contextlib import contextmanager
+from typing import Any, Dict, Iterable, List, Optional
+from datetime import date, datetime
+
+# Workout fields whose values repeat across the history (a handful of
+# categories/exercises, one date per training day); interning them lets all
+# entries share one string object per distinct value.
+INTERNED_FIELDS = ("date", "category", "exercise", "type")
+
+def intern_workout(entry: Dict[str, Any]) -> Dict[str, Any]:
+    """Intern the repeated string fields of a freshly parsed workout dict in place."""
+    for field in INTERNED_FIELDS:
+        value = entry.get(field)
+        if type(value) is str:
+            entry[field] = sys.intern(value)
+    return entry
+
+def canonical_date(value: Any) -> str:
+    """YYYY-MM-DD for a date, datetime or ISO date(-time) string; ValueError otherwise."""
+    if isinstance(value, datetime):
+        return value.date().isoformat()
+    if isinstance(value, date):
+        return value.isoformat()
+    if not isinstance(value, str):
+        raise ValueError(f"date must be an ISO date string, got {type(value).__name__}")
+    text = value.strip()
+    if len(text) == 10 and text[4] == "-" and text[7] == "-" and text[:4].isdigit() and text[5:7].isdigit() and text[8:].isdigit():
+        # The stored format; only the calendar still needs checking
+        return date(int(text[:4]), int(text[5:7]), int(text[8:])).isoformat()
+    try:
+        return datetime.fromisoformat(text).date().isoformat()
+    except ValueError:
+        raise ValueError(f"invalid date: {value!r}") from None
+
+_day_keys: Dict[Any, Optional[str]] = {}
+
+def day_key(value: Any) -> Optional[str]:
+    """canonical_date, or None when value is not a valid date (memoized per value)."""
+    try:
+        return _day_keys[value]
+    except KeyError:
+        pass
+    except TypeError:  # unhashable
+        return None
+    try:
+        key = canonical_date(value)
+    except ValueError:
+        key = None
+    if len(_day_keys) < 100_000:
+        _day_keys[value] = key
+    return key
+
+_ordinals: Dict[str, int] = {}
+
+def day_ordinal(day: str) -> int:
+    """Day ordinal of a canonical YYYY-MM-DD date (memoized)."""
+    ordinal = _ordinals.get(day)
+    if ordinal is None:
+        ordinal = _ordinals[day] = date(int(day[:4]), int(day[5:7]), int(day[8:])).toordinal()
+    return ordinal
+
+@contextmanager
+def _gc_paused():
+    # Bulk conversion allocates millions of tracked objects, none of them
+    # garbage; left on, the cyclic collector would rescan them over and over
+    enabled = gc.isenabled()
+    gc.disable()
+    try:
+        yield
+    finally:
+        if enabled:
+            gc.enable()
+
+class _Record(Mapping):
+    """Read-only mapping over a slotted record's fields, so code written
+    against the stored dicts (w.get("sets"), s["reps"], {**w}) reads records
+    unchanged. Every field is always present."""
+
+    __slots__ = ()
+
+    def __getitem__(self, key: str) -> Any:
+        if key in self.__slots__:
+            return getattr(self, key)
+        raise KeyError(key)
+
+    def get(self, key: str, default: Any = None) -> Any:
+        return getattr(self, key, default) if key in self.__slots__ else default
+
+    def __iter__(self):
+        return iter(self.__slots__)
+
+    def __len__(self) -> int:
+        return len(self.__slots__)
+
+    def __repr__(self) -> str:
+        return f"{type(self).__name__}({self.to_dict()!r})"
+
+class SetRecord(_Record):
+    __slots__ = ("weight_kg", "reps")
 
-class SetRecord:
     def __init__(self, weight_kg: float, reps: int):
         self.weight_kg = weight_kg
         self.reps = reps
 
-class CardioRecord:
+    def to_dict(self) -> Dict[str, Any]:
+        return {"weight_kg": self.weight_kg, "reps": self.reps}
+
+class CardioRecord(_Record):
+    __slots__ = ("minutes", "distance_km")
+
     def __init__(self, minutes: float, distance_km: Optional[float] = None):
         self.minutes = minutes
         self.distance_km = distance_km
 
-class WorkoutEntry:
+    def to_dict(self) -> Dict[str, Any]:
+        return {"minutes": self.minutes, "distance_km": self.distance_km}
+
+class WorkoutEntry(_Record):
+    __slots__ = ("id", "date", "category", "exercise", "type", "sets", "cardio", "notes")
+
     def __init__(self, id: str, date: str, category: str, exercise: str, 
                  type: str, sets: Optional[List[SetRecord]] = None,
                  cardio: Optional[CardioRecord] = None, notes: Optional[str] = None):
@@ -24,6 +133,68 @@ class WorkoutEntry:
         self.cardio = cardio
         self.notes = notes
 
+    def to_dict(self) -> Dict[str, Any]:
+        return {
+            "id": self.id,
+            "date": self.date,
+            "category": self.category,
+            "exercise": self.exercise,
+            "type": self.type,
+            "sets": [s.to_dict() for s in self.sets],
+            "cardio": self.cardio.to_dict() if self.cardio else None,
+            "notes": self.notes,
+        }
+
+_WORKOUT_KEYS = frozenset(WorkoutEntry.__slots__)
+
+def compact_workout(entry: Any) -> Any:
+    """In-memory form of a stored workout: a WorkoutEntry when the dict has
+    exactly the stored shape (so to_dict() gives it back), otherwise the dict
+    itself with its strings interned, so nothing it carries is lost."""
+    if type(entry) is not dict:
+        return entry
+    if len(entry) != 8 or entry.keys() != _WORKOUT_KEYS or type(entry["sets"]) is not list:
+        return intern_workout(entry)
+    # Shape checks and construction in one pass: this runs for every workout on load
+    new = object.__new__
+    sets = []
+    for s in entry["sets"]:
+        if type(s) is not dict or len(s) != 2 or "weight_kg" not in s or "reps" not in s:
+            return intern_workout(entry)
+        rec = new(SetRecord)
+        rec.weight_kg = s["weight_kg"]
+        rec.reps = s["reps"]
+        sets.append(rec)
+    cardio = entry["cardio"]
+    if cardio is not None:
+        if type(cardio) is not dict or len(cardio) != 2 or "minutes" not in cardio or "distance_km" not in cardio:
+            return intern_workout(entry)
+        cardio = CardioRecord(cardio["minutes"], cardio["distance_km"])
+    intern = sys.intern
+    w = new(WorkoutEntry)
+    w.id = entry["id"]
+    value = entry["date"]
+    w.date = intern(value) if type(value) is str else value
+    value = entry["category"]
+    w.category = intern(value) if type(value) is str else value
+    value = entry["exercise"]
+    w.exercise = intern(value) if type(value) is str else value
+    value = entry["type"]
+    w.type = intern(value) if type(value) is str else value
+    w.sets = sets
+    w.cardio = cardio
+    w.notes = entry["notes"]
+    return w
+
+def compact_workout_list(items: Iterable[Any]) -> List[Any]:
+    """compact_workout over a whole snapshot."""
+    with _gc_paused():
+        return [compact_workout(w) for w in items]
+
+def workout_dict(entry: Any) -> Any:
+    """Plain dict form of an in-memory workout (see compact_workout)."""
+    return entry.to_dict() if isinstance(entry, WorkoutEntry) else entry
+
 class RoutineItem:
     def __init__(self, exercise: str, sets_count: int, target_reps: int, target_weight: float):
         self.exercise = exercise
@@ -0,0 +1,493 @@
+"""
+Workout and routine repositories.
+
+The JSON backend reads and writes the files managed by storage.py. The SQLite
+backend uses the workouts/workout_sets/routines/routine_items tables created by
+migrations 003 and 006 (run init_db.py) and pushes filtering and aggregation
+into SQL. The backend is selected with the WORKOUT_BACKEND environment variable
+("json" or "sqlite").
+"""
+import os
+import sqlite3
+from typing import Any, Dict, Iterable, List, Optional, Tuple
+
+try:
+    from backend.storage import (
+        read_json,
+        update_json,
+        append_workout,
+        append_workouts,
+        delete_workout,
+        get_workout_index,
+        read_workouts_range,
+        data_version,
+    )
+    from backend.models import day_key, workout_dict
+except ImportError:
+    from storage import (
+        read_json,
+        update_json,
+        append_workout,
+        append_workouts,
+        delete_workout,
+        get_workout_index,
+        read_workouts_range,
+        data_version,
+    )
+    from models import day_key, workout_dict
+
+WORKOUT_BACKEND = os.getenv("WORKOUT_BACKEND", "json")
+WORKOUT_DB_PATH = os.getenv(
+    "WORKOUT_DB_PATH", os.path.join(os.path.dirname(__file__), 'data', 'workout.db')
+)
+
+# Migrations that create the tables, columns and indexes the SQLite backend uses
+REQUIRED_MIGRATIONS = ("003_seed_from_json", "006_workouts_cardio_and_indexes")
+
+# Workouts taken out of the dataset by normalize_dates(), kept for inspection
+QUARANTINE_DATASET = "workouts_quarantine"
+
+
+def _quarantine(workouts: List[Dict[str, Any]], reason: str):
+    if workouts:
+        update_json(QUARANTINE_DATASET, lambda items: items + [{**workout_dict(w), "quarantine_reason": reason} for w in workouts])
+
+
+class JsonWorkoutRepository:
+    """Workouts and routines stored in the JSON files under storage.DATA_DIR.
+
+    Storage holds workouts as slotted WorkoutEntry records; they are handed
+    out as plain dicts, like the SQLite backend's.
+    """
+
+    name = "json"
+
+    def data_version(self, dataset: str = "workouts") -> str:
+        """Opaque token that changes whenever the dataset ("workouts" or "routines") does."""
+        return data_version(dataset)
+
+    def list_workouts(self) -> List[Dict[str, Any]]:
+        return [workout_dict(w) for w in read_json("workouts")]
+
+    def get_workout(self, workout_id: str) -> Optional[Dict[str, Any]]:
+        return workout_dict(get_workout_index().get(workout_id))
+
+    def workouts_on(self, date: str) -> List[Dict[str, Any]]:
+        # Without a warm index, only the month shard holding the date is read
+        index = get_workout_index(build=False)
+        rows = index.on_date(date) if index is not None else read_workouts_range(date, date)
+        return [workout_dict(w) for w in rows]
+
+    def last_for_exercise(self, exercise: str) -> Optional[Dict[str, Any]]:
+        return workout_dict(get_workout_index().last_for_exercise(exercise))
+
+    def query_workouts(self, start: Optional[str] = None, end: Optional[str] = None,
+                       after: Optional[Tuple[str, str]] = None, limit: int = 100) -> List[Dict[str, Any]]:
+        # A first page on a cold store reads only the shards in range; a cursor
+        # means a multi-page scan, so build the index once instead of
+        # re-reading every shard from the cursor on for each page
+        index = get_workout_index(build=after is not None)
+        if index is not None:
+            return [workout_dict(w) for w in index.scan(start, end, after, limit)]
+        lo = max(start or "", after[0] if after else "") or None
+        rows = sorted(read_workouts_range(lo, end), key=lambda w: (w.get("date") or "", w.get("id") or ""))
+        if after is not None:
+            rows = [w for w in rows if (w.get("date") or "", w.get("id") or "") > after]
+        return [workout_dict(w) for w in rows[:limit]]
+
+    def add_workout(self, entry: Dict[str, Any], check_pr: bool = False) -> Optional[bool]:
+        """Store a workout; with check_pr, return whether it set a new (Epley)
+        PR as of its date, decided in commit order."""
+        return append_workout(entry, check_pr)
+
+    def add_workouts(self, entries: List[Dict[str, Any]]):
+        append_workouts(entries)
+
+    def delete_workout(self, workout_id: str) -> bool:
+        entry = get_workout_index().get(workout_id)
+        if entry is None:
+            return False
+        delete_workout(workout_id, entry.get("date"))
+        return True
+
+    def normalize_dates(self) -> Dict[str, int]:
+        """One-time backfill: rewrite dates as YYYY-MM-DD and quarantine
+        workouts whose date does not parse."""
+        counts = {"checked": 0, "fixed": 0, "quarantined": 0}
+
+        def normalize(items: List[Dict[str, Any]]) -> List[Dict[str, Any]]:
+            kept, bad = [], []
+            for w in items:
+                day = day_key(w.get("date"))
+                if day is None:
+                    bad.append(w)
+                    continue
+                if day != w.get("date"):
+                    # Cached entries are shared, so replace rather than mutate
+                    w = {**workout_dict(w), "date": day}
+                    counts["fixed"] += 1
+                kept.append(w)
+            counts.update(checked=len(items), quarantined=len(bad))
+            if not (counts["fixed"] or bad):
+                return items
+            _quarantine(bad, "invalid date")
+            return kept
+
+        update_json("workouts", normalize)
+        return counts
+
+    def list_routines(self) -> List[Dict[str, Any]]:
+        return read_json("routines")
+
+    def add_routine(self, routine: Dict[str, Any]):
+        update_json("routines", lambda routines: [*routines, routine])
+
+    def delete_routine(self, routine_id: str):
+        update_json("routines", lambda routines: [r for r in routines if r.get("id") != routine_id])
+
+
+class SqliteWorkoutRepository:
+    """Workouts and routines stored in SQLite (see migrations 003 and 006)."""
+
+    name = "sqlite"
+
+    def __init__(self, db_path: str):
+        self.db_path = db_path
+        with self._connect() as conn:
+            require_schema(conn)
+
+    def _connect(self) -> sqlite3.Connection:
+        conn = sqlite3.connect(self.db_path)
+        conn.row_factory = sqlite3.Row
+        return conn
+
+    def data_version(self, dataset: str = "workouts") -> str:
+        """Opaque token that changes on every committed write to the database.
+
+        Uses the file change counter from the SQLite header, which every
+        commit bumps in rollback-journal mode, plus the file identity.
+        """
+        try:
+            with open(self.db_path, "rb") as f:
+                header = f.read(28)
+            st = os.stat(self.db_path)
+        except FileNotFoundError:
+            return "0"
+        return "%d.%x.%x" % (int.from_bytes(header[24:28], "big"), st.st_size, st.st_ino)
+
+    # -- workouts ---------------------------------------------------------
+
+    def _hydrate(self, conn: sqlite3.Connection, rows: Iterable[sqlite3.Row], all_sets: bool = False) -> List[Dict[str, Any]]:
+        out = [_workout_from_row(r) for r in rows]
+        by_id = {w["id"]: w for w in out}
+        if not by_id:
+            return out
+        if all_sets:
+            set_rows = conn.execute(
+                "SELECT workout_id, weight_kg, reps FROM workout_sets ORDER BY id"
+            ).fetchall()
+        else:
+            ids = list(by_id)
+            set_rows = []
+            for i in range(0, len(ids), 500):
+                chunk = ids[i:i + 500]
+                set_rows += conn.execute(
+                    "SELECT workout_id, weight_kg, reps FROM workout_sets WHERE workout_id IN (%s) ORDER BY id"
+                    % ",".join("?" * len(chunk)),
+                    chunk,
+                ).fetchall()
+        for s in set_rows:
+            w = by_id.get(s["workout_id"])
+            if w is not None:
+                w["sets"].append({"weight_kg": s["weight_kg"], "reps": s["reps"]})
+        return out
+
+    def list_workouts(self) -> List[Dict[str, Any]]:
+        with self._connect() as conn:
+            rows = conn.execute(f"SELECT {_WORKOUT_COLUMNS} FROM workouts ORDER BY rowid").fetchall()
+            return self._hydrate(conn, rows, all_sets=True)
+
+    def get_workout(self, workout_id: str) -> Optional[Dict[str, Any]]:
+        with self._connect() as conn:
+            rows = conn.execute(f"SELECT {_WORKOUT_COLUMNS} FROM workouts WHERE id = ?", (workout_id,)).fetchall()
+            items = self._hydrate(conn, rows)
+        return items[0] if items else None
+
+    def workouts_on(self, date: str) -> List[Dict[str, Any]]:
+        with self._connect() as conn:
+            rows = conn.execute(
+                f"SELECT {_WORKOUT_COLUMNS} FROM workouts WHERE date = ? ORDER BY rowid", (date,)
+            ).fetchall()
+            return self._hydrate(conn, rows)
+
+    def last_for_exercise(self, exercise: str) -> Optional[Dict[str, Any]]:
+        with self._connect() as conn:
+            rows = conn.execute(
+                f"SELECT {_WORKOUT_COLUMNS} FROM workouts WHERE exercise = ? ORDER BY date DESC, rowid ASC LIMIT 1",
+                (exercise,),
+            ).fetchall()
+            items = self._hydrate(conn, rows)
+        return items[0] if items else None
+
+    def query_workouts(self, start: Optional[str] = None, end: Optional[str] = None,
+                       after: Optional[Tuple[str, str]] = None, limit: int = 100) -> List[Dict[str, Any]]:
+        where, params = _date_range("date", start, end)
+        if after is not None:
+            where += " AND (date > ? OR (date = ? AND id > ?))"
+            params += [after[0], after[0], after[1]]
+        with self._connect() as conn:
+            rows = conn.execute(
+                f"SELECT {_WORKOUT_COLUMNS} FROM workouts WHERE 1=1{where} ORDER BY date, id LIMIT ?",
+                (*params, limit),
+            ).fetchall()
+            return self._hydrate(conn, rows)
+
+    def add_workout(self, entry: Dict[str, Any], check_pr: bool = False) -> Optional[bool]:
+        is_pr = None
+        with self._connect() as conn:
+            if check_pr:
+                # Take the write lock before reading the prior best, so
+                # concurrent adds are each compared with the ones committed before
+                conn.execute("BEGIN IMMEDIATE")
+                is_pr = self._is_new_pr(conn, entry)
+            self._insert(conn, [entry])
+            conn.commit()
+        return is_pr
+
+    def add_workouts(self, entries: List[Dict[str, Any]]):
+        with self._connect() as conn:
+            self._insert(conn, entries)
+            conn.commit()
+
+    def _insert(self, conn: sqlite3.Connection, entries: List[Dict[str, Any]]):
+        # Re-putting an id replaces the workout along with its sets
+        conn.executemany(
+            "DELETE FROM workout_sets WHERE workout_id = ?", [(w.get("id"),) for w in entries]
+        )
+        conn.executemany(
+            "INSERT OR REPLACE INTO workouts (id, date, category, exercise, type, notes, cardio_minutes, cardio_distance_km) "
+            "VALUES (?,?,?,?,?,?,?,?)",
+            [
+                (
+                    w.get("id"), w.get("date"), w.get("category"), w.get("exercise"), w.get("type"), w.get("notes"),
+                    (w.get("cardio") or {}).get("minutes"), (w.get("cardio") or {}).get("distance_km"),
+                )
+                for w in entries
+            ],
+        )
+        conn.executemany(
+            "INSERT INTO workout_sets (workout_id, weight_kg, reps) VALUES (?,?,?)",
+            [
+                (w.get("id"), float(s.get("weight_kg", 0) or 0), int(s.get("reps", 0) or 0))
+                for w in entries
+                for s in (w.get("sets") or [])
+            ],
+        )
+
+    def delete_workout(self, workout_id: str) -> bool:
+        with self._connect() as conn:
+            conn.execute("DELETE FROM workout_sets WHERE workout_id = ?", (workout_id,))
+            cur = conn.execute("DELETE FROM workouts WHERE id = ?", (workout_id,))
+            conn.commit()
+            return cur.rowcount > 0
+
+    def normalize_dates(self) -> Dict[str, int]:
+        """One-time backfill: rewrite dates as YYYY-MM-DD and quarantine
+        workouts whose date does not parse."""
+        with self._connect() as conn:
+            rows = conn.execute("SELECT id, date FROM workouts").fetchall()
+            fixes, bad_ids = [], []
+            for r in rows:
+                day = day_key(r["date"])
+                if day is None:
+                    bad_ids.append(r["id"])
+                elif day != r["date"]:
+                    fixes.append((day, r["id"]))
+            bad = []
+            for i in range(0, len(bad_ids), 500):
+                chunk = bad_ids[i:i + 500]
+                marks = ",".join("?" * len(chunk))
+                bad += self._hydrate(conn, conn.execute(f"SELECT {_WORKOUT_COLUMNS} FROM workouts WHERE id IN ({marks})", chunk).fetchall())
+            _quarantine(bad, "invalid date")
+            conn.executemany("UPDATE workouts SET date = ? WHERE id = ?", fixes)
+            conn.executemany("DELETE FROM workout_sets WHERE workout_id = ?", [(i,) for i in bad_ids])
+            conn.executemany("DELETE FROM workouts WHERE id = ?", [(i,) for i in bad_ids])
+            conn.commit()
+        return {"checked": len(rows), "fixed": len(fixes), "quarantined": len(bad_ids)}
+
+    # -- routines ---------------------------------------------------------
+
+    def list_routines(self) -> List[Dict[str, Any]]:
+        with self._connect() as conn:
+            routines = [
+                {"id": r["id"], "name": r["name"], "memo": r["memo"], "items": []}
+                for r in conn.execute("SELECT id, name, memo FROM routines ORDER BY rowid")
+            ]
+            by_id = {r["id"]: r for r in routines}
+            for item in conn.execute("SELECT routine_id, exercise, category, sets, reps FROM routine_items ORDER BY id"):
+                r = by_id.get(item["routine_id"])
+                if r is not None:
+                    r["items"].append({
+                        "exercise": item["exercise"],
+                        "category": item["category"],
+                        "sets": item["sets"],
+                        "reps": item["reps"],
+                    })
+        return routines
+
+    def add_routine(self, routine: Dict[str, Any]):
+        with self._connect() as conn:
+            conn.execute(
+                "INSERT INTO routines (id, name, memo) VALUES (?,?,?)",
+                (routine.get("id"), routine.get("name"), routine.get("memo")),
+            )
+            conn.executemany(
+                "INSERT INTO routine_items (routine_id, exercise, category, sets, reps) VALUES (?,?,?,?,?)",
+                [
+                    (routine.get("id"), i.get("exercise"), i.get("category"), int(i.get("sets") or 0), str(i.get("reps") or ''))
+                    for i in (routine.get("items") or [])
+                ],
+            )
+            conn.commit()
+
+    def delete_routine(self, routine_id: str):
+        with self._connect() as conn:
+            conn.execute("DELETE FROM routine_items WHERE routine_id = ?", (routine_id,))
+            conn.execute("DELETE FROM routines WHERE id = ?", (routine_id,))
+            conn.commit()
+
+    # -- analytics --------------------------------------------------------
+
+    def pr_trend(self, exercise: str, start: Optional[str] = None, end: Optional[str] = None) -> List[Dict[str, Any]]:
+        return self.pr_trends([exercise], start, end).get(exercise, [])
+
+    def pr_trends(self, exercises: Optional[List[str]] = None, start: Optional[str] = None,
+                  end: Optional[str] = None) -> Dict[str, List[Dict[str, Any]]]:
+        """Best estimated 1RM per date for each exercise (all when None), in one query."""
+        where, params = _date_range("w.date", start, end)
+        if exercises is not None:
+            if not exercises:
+                return {}
+            where += " AND w.exercise IN (%s)" % ",".join("?" * len(exercises))
+            params += list(exercises)
+        out: Dict[str, List[Dict[str, Any]]] = {}
+        with self._connect() as conn:
+            rows = conn.execute(
+                "SELECT w.exercise AS exercise, w.date AS date, MAX(s.weight_kg * (1.0 + s.reps / 30.0)) AS one_rm "
+                "FROM workouts w JOIN workout_sets s ON s.workout_id = w.id "
+                "WHERE s.weight_kg > 0 AND s.reps > 0" + where +
+                " GROUP BY w.exercise, w.date ORDER BY w.exercise, w.date",
+                params,
+            ).fetchall()
+        for r in rows:
+            out.setdefault(r["exercise"], []).append({"date": r["date"], "one_rm": r["one_rm"]})
+        return out
+
+    def best_one_rm(self, exercise: str, as_of: Optional[str] = None) -> Optional[Dict[str, Any]]:
+        """Best estimated 1RM on or before as_of and the (first) date it was set."""
+        with self._connect() as conn:
+            return self._best_one_rm(conn, exercise, as_of)
+
+    def _best_one_rm(self, conn: sqlite3.Connection, exercise: str, as_of: Optional[str]) -> Optional[Dict[str, Any]]:
+        where, params = _date_range("w.date", None, as_of)
+        row = conn.execute(
+            "SELECT w.date AS date, s.weight_kg * (1.0 + s.reps / 30.0) AS one_rm "
+            "FROM workouts w JOIN workout_sets s ON s.workout_id = w.id "
+            "WHERE w.exercise = ? AND w.date IS NOT NULL AND w.date != '' AND s.weight_kg > 0 AND s.reps > 0" + where +
+            " ORDER BY one_rm DESC, w.date LIMIT 1",
+            (exercise, *params),
+        ).fetchone()
+        return {"date": row["date"], "one_rm": row["one_rm"]} if row else None
+
+    def _is_new_pr(self, conn: sqlite3.Connection, entry: Dict[str, Any]) -> bool:
+        # Same Epley estimate over the stored (integer) reps as best_one_rm
+        sets = [(float(s.get("weight_kg", 0) or 0), int(s.get("reps", 0) or 0)) for s in entry.get("sets") or ()]
+        one_rm = max((w * (1.0 + r / 30.0) for w, r in sets if w > 0 and r > 0), default=0.0)
+        date = day_key(entry.get("date"))
+        if one_rm <= 0 or date is None:
+            return False
+        prior = self._best_one_rm(conn, entry.get("exercise"), date)
+        return prior is None or one_rm > prior["one_rm"]
+
+    def volume_by_category(self, start: Optional[str] = None, end: Optional[str] = None) -> List[Dict[str, Any]]:
+        where, params = _date_range("w.date", start, end)
+        with self._connect() as conn:
+            rows = conn.execute(
+                "SELECT COALESCE(NULLIF(w.category, ''), 'Unknown') AS category, "
+                "COALESCE(SUM(s.weight_kg * s.reps), 0.0) AS volume "
+                "FROM workouts w LEFT JOIN workout_sets s ON s.workout_id = w.id "
+                "WHERE w.date IS NOT NULL" + where +
+                " GROUP BY 1 ORDER BY MIN(w.rowid)",
+                params,
+            ).fetchall()
+        return [{"category": r["category"], "volume": r["volume"]} for r in rows]
+
+    def exercise_detail(self, exercise: str, start: Optional[str] = None, end: Optional[str] = None) -> List[Dict[str, Any]]:
+        where, params = _date_range("w.date", start, end)
+        with self._connect() as conn:
+            rows = conn.execute(
+                "SELECT w.date AS date, COALESCE(SUM(s.weight_kg * s.reps), 0.0) AS volume, "
+                "MAX(COALESCE(MAX(s.weight_kg), 0.0), 0.0) AS top_weight "
+                "FROM workouts w LEFT JOIN workout_sets s ON s.workout_id = w.id "
+                "WHERE w.exercise = ? AND w.date IS NOT NULL AND w.date != ''" + where +
+                " GROUP BY w.date ORDER BY w.date",
+                (exercise, *params),
+            ).fetchall()
+        return [{"date": r["date"], "volume": round(r["volume"], 2), "top_weight": round(r["top_weight"], 2)} for r in rows]
+
+
+_WORKOUT_COLUMNS = "id, date, category, exercise, type, notes, cardio_minutes, cardio_distance_km"
+
+
+def _workout_from_row(r: sqlite3.Row) -> Dict[str, Any]:
+    cardio = None
+    if r["cardio_minutes"] is not None:
+        cardio = {"minutes": r["cardio_minutes"], "distance_km": r["cardio_distance_km"]}
+    return {
+        "id": r["id"],
+        "date": r["date"],
+        "category": r["category"],
+        "exercise": r["exercise"],
+        "type": r["type"],
+        "sets": [],
+        "cardio": cardio,
+        "notes": r["notes"],
+    }
+
+
+def _date_range(column: str, start: Optional[str], end: Optional[str]):
+    # Dates are stored as ISO YYYY-MM-DD, so string comparison orders them
+    where, params = "", []
+    if start:
+        where += f" AND {column} >= ?"
+        params.append(start)
+    if end:
+        where += f" AND {column} <= ?"
+        params.append(end)
+    return where, params
+
+
+def require_schema(conn: sqlite3.Connection):
+    """Raise RuntimeError unless the migrations the repository relies on
+    (the 003 tables plus 006's cardio columns and indexes) are applied."""
+    try:
+        applied = {row[0] for row in conn.execute("SELECT version FROM schema_migrations")}
+    except sqlite3.OperationalError:
+        applied = set()
+    missing = [m for m in REQUIRED_MIGRATIONS if m not in applied]
+    if missing:
+        raise RuntimeError(f"workout database is missing migrations {', '.join(missing)}; run init_db.py")
+
+
+_json_repository = JsonWorkoutRepository()
+_sqlite_repositories: Dict[str, SqliteWorkoutRepository] = {}
+
+
+def get_repository():
+    """Return the repository for the configured WORKOUT_BACKEND."""
+    if WORKOUT_BACKEND == "sqlite":
+        repo = _sqlite_repositories.get(WORKOUT_DB_PATH)
+        if repo is None:
+            repo = _sqlite_repositories[WORKOUT_DB_PATH] = SqliteWorkoutRepository(WORKOUT_DB_PATH)
+        return repo
+    return _json_repository
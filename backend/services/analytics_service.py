@@ -1,13 +1,30 @@
-import pandas as pd
-from datetime import datetime
-from typing import List, Dict, Any, Optional
+import numpy as np
+from typing import List, Dict, Any, Optional, Tuple
 import os
 import sys
+import threading
 
 # Add the parent directory to the path to import from other modules
 sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
 
-from storage import read_json
+try:
+    import backend.storage as _storage
+    from backend.daily_rollup import DailyRollup
+    from backend.models import canonical_date, day_key, day_ordinal
+    from backend.repository import get_repository
+    from backend.services.bucketing import BUCKETS, bucket_label, bucket_sums
+    from backend.services.config_service import get_week_start
+    from backend.services.result_cache import ResultCache
+    from backend.services.set_store import SetColumns, build_columns, get_set_columns, to_ordinal, from_ordinal
+except ImportError:
+    import storage as _storage
+    from daily_rollup import DailyRollup
+    from models import canonical_date, day_key, day_ordinal
+    from repository import get_repository
+    from services.bucketing import BUCKETS, bucket_label, bucket_sums
+    from services.config_service import get_week_start
+    from services.result_cache import ResultCache
+    from services.set_store import SetColumns, build_columns, get_set_columns, to_ordinal, from_ordinal
 
 
 def epley_one_rm(weight_kg: float, reps: int) -> float:
@@ -22,139 +39,295 @@ def epley_one_rm(weight_kg: float, reps: int) -> float:
         return 0.0
 
 
-def pr_trend(exercise: str, start: Optional[str] = None, end: Optional[str] = None) -> List[Dict[str, Any]]:
+ONE_RM_FORMULAS = ("epley", "brzycki", "lombardi")
+
+
+def estimate_one_rm(weight_kg, reps, formula: str = "epley") -> np.ndarray:
+    """
+    Vectorized 1RM estimates for arrays of weights and reps (reps are floored):
+    epley w×(1 + r/30), brzycki w×36/(37 − r) (r < 37), lombardi w×r^0.1.
+    Sets without a valid estimate (w <= 0, r < 1) get 0.0.
+    """
+    w = np.asarray(weight_kg, dtype=np.float64)
+    r = np.floor(np.asarray(reps, dtype=np.float64))
+    valid = (w > 0) & (r > 0)
+    if formula == "epley":
+        est = w * (1.0 + r / 30.0)
+    elif formula == "brzycki":
+        valid &= r < 37
+        est = w * 36.0 / np.where(valid, 37.0 - r, 1.0)
+    elif formula == "lombardi":
+        est = w * np.power(np.where(valid, r, 1.0), 0.10)
+    else:
+        raise ValueError(f"unknown 1RM formula: {formula}")
+    return np.where(valid, est, 0.0)
+
+
+class AnalyticsEngine:
+    """Per-day aggregates for one data version, computed in a single pass
+    over the columnar set store: workouts and volume for every training day.
+    The period rollups (weekly/monthly volume) only group these arrays, and
+    per-set kernels (1RM formulas other than Epley) run over ``cols``.
+    """
+
+    def __init__(self, cols: SetColumns):
+        self.cols = cols
+        volume = cols.weight * cols.reps
+        self.days, inverse = np.unique(cols.w_day, return_inverse=True)
+        self.day_workouts = np.bincount(inverse, minlength=len(self.days))
+        self.day_volume = np.bincount(np.searchsorted(self.days, cols.day), weights=volume, minlength=len(self.days))
+
+
+_engines: Dict[str, Tuple[str, AnalyticsEngine]] = {}
+_engines_lock = threading.Lock()
+
+
+def get_engine() -> AnalyticsEngine:
+    """Engine for the current data version of the active repository."""
+    repo = get_repository()
+    if repo.name == "sqlite":
+        key, version = f"sqlite:{repo.db_path}", repo.data_version()
+    else:
+        key, version = f"json:{os.path.abspath(_storage.DATA_DIR)}", _storage.data_version("workouts")
+    cached = _engines.get(key)
+    if cached is not None and cached[0] == version:
+        return cached[1]
+    with _engines_lock:
+        cached = _engines.get(key)
+        if cached is not None and cached[0] == version:
+            return cached[1]
+        cols = build_columns(repo.list_workouts()) if repo.name == "sqlite" else get_set_columns()
+        engine = AnalyticsEngine(cols)
+        _engines[key] = (version, engine)
+        return engine
+
+
+_sqlite_rollups: Dict[str, Tuple[str, DailyRollup]] = {}
+
+
+def get_rollup() -> DailyRollup:
+    """Daily (date, exercise) rollup for the active repository.
+
+    The JSON store maintains it incrementally on every write; for SQLite it is
+    rebuilt once per data version.
+    """
+    repo = get_repository()
+    if repo.name != "sqlite":
+        return _storage.get_daily_rollup()
+    version = repo.data_version()
+    cached = _sqlite_rollups.get(repo.db_path)
+    if cached is None or cached[0] != version:
+        cached = _sqlite_rollups[repo.db_path] = (version, DailyRollup(repo.list_workouts()))
+    return cached[1]
+
+
+def _results_version() -> Tuple[Any, ...]:
+    repo = get_repository()
+    where = repo.db_path if repo.name == "sqlite" else os.path.abspath(_storage.DATA_DIR)
+    return repo.name, where, repo.data_version(), get_week_start()
+
+
+# Results of the query functions below, per data version (and week start)
+_results = ResultCache(_results_version)
+
+
+def result_cache_stats() -> Dict[str, Any]:
+    return _results.stats()
+
+
+def _day_bound(value: Optional[str]) -> Optional[str]:
+    # A malformed bound is an error, not an open end (ValueError)
+    return canonical_date(value) if value else None
+
+
+def _best_by_day(formula: str, start: Optional[str], end: Optional[str],
+                 exercises: Optional[List[str]] = None) -> Dict[Any, List[Dict[str, Any]]]:
+    # One vectorized pass over the set columns: estimate every set, then take
+    # the max per (exercise, day) group
+    cols = get_engine().cols
+    rng = cols.set_range(to_ordinal(_day_bound(start)), to_ordinal(_day_bound(end)))
+    est = estimate_one_rm(cols.weight[rng], cols.reps[rng], formula)
+    keep = est > 0
+    if exercises is not None:
+        ids = [cols.exercise_ids[e] for e in exercises if e in cols.exercise_ids]
+        keep &= np.isin(cols.exercise[rng], ids)
+    day, ex, est = cols.day[rng][keep], cols.exercise[rng][keep], est[keep]
+    if not len(est):
+        return {}
+    order = np.lexsort((day, ex))
+    day, ex, est = day[order], ex[order], est[order]
+    starts = np.flatnonzero(np.r_[True, (ex[1:] != ex[:-1]) | (day[1:] != day[:-1])])
+    best = np.maximum.reduceat(est, starts)
+    out: Dict[Any, List[Dict[str, Any]]] = {}
+    for e, d, b in zip(ex[starts].tolist(), day[starts].tolist(), best.tolist()):
+        out.setdefault(cols.exercises[e], []).append({"date": from_ordinal(d), "one_rm": b})
+    return out
+
+
+@_results.memoize
+def pr_trend(exercise: str, start: Optional[str] = None, end: Optional[str] = None,
+             formula: str = "epley") -> List[Dict[str, Any]]:
     """
     Compute date-wise PR trend (estimated 1RM) for a specific exercise.
     Returns list of {date: 'YYYY-MM-DD', one_rm: float} sorted ascending by date.
     """
-    workouts = read_json("workouts")
-    rows: List[Dict[str, Any]] = []
-    for w in workouts:
-        if w.get("exercise") != exercise:
-            continue
-        date_str = w.get("date")
-        sets = w.get("sets") or []
-        best = 0.0
-        for s in sets:
-            best = max(best, epley_one_rm(s.get("weight_kg", 0), s.get("reps", 0)))
-        if best > 0 and date_str:
-            rows.append({"date": date_str, "one_rm": best})
-
-    # Filter by date range
-    def to_dt(d: Optional[str]) -> Optional[datetime]:
-        return datetime.fromisoformat(d) if d else None
-
-    start_dt = to_dt(start)
-    end_dt = to_dt(end)
-
-    def within_range(d: str) -> bool:
-        try:
-            dt = datetime.fromisoformat(d)
-        except Exception:
-            return False
-        if start_dt and dt < start_dt:
-            return False
-        if end_dt and dt > end_dt:
-            return False
-        return True
-
-    rows = [r for r in rows if within_range(r["date"])]
-
-    # Consolidate by date (take max per date)
-    by_date: Dict[str, float] = {}
-    for r in rows:
-        by_date[r["date"]] = max(by_date.get(r["date"], 0.0), float(r["one_rm"]))
-
-    out = [{"date": k, "one_rm": v} for k, v in by_date.items()]
-    out.sort(key=lambda x: x["date"])  # ISO date sorts lexicographically
-    return out
+    if formula != "epley":
+        return pr_trends([exercise], start, end, formula)[exercise]
+    repo = get_repository()
+    if repo.name == "sqlite":
+        return repo.pr_trend(exercise, start, end)
+    # Only days with at least one valid set have a positive estimate
+    rollup = get_rollup()
+    with rollup.lock:
+        return [
+            {"date": r.date, "one_rm": r.one_rm}
+            for r in rollup.series(exercise, _day_bound(start), _day_bound(end))
+            if r.one_rm > 0
+        ]
 
 
+@_results.memoize
+def pr_trends(exercises: Optional[List[str]] = None, start: Optional[str] = None,
+              end: Optional[str] = None, formula: str = "epley") -> Dict[str, List[Dict[str, Any]]]:
+    """
+    PR trend for several exercises (every logged exercise when None) in one pass.
+    Returns {exercise: [{date, one_rm}]}; requested exercises without data map to [].
+    """
+    repo = get_repository()
+    if formula != "epley":
+        trends = _best_by_day(formula, start, end, exercises)
+    elif repo.name == "sqlite":
+        trends = repo.pr_trends(exercises, start, end)
+    else:
+        rollup = get_rollup()
+        lo, hi = _day_bound(start), _day_bound(end)
+        trends = {}
+        with rollup.lock:
+            names = [e for e in rollup.by_exercise if isinstance(e, str) and e] if exercises is None else exercises
+            for name in names:
+                series = [{"date": r.date, "one_rm": r.one_rm} for r in rollup.series(name, lo, hi) if r.one_rm > 0]
+                if series:
+                    trends[name] = series
+    if exercises is not None:
+        return {e: trends.get(e, []) for e in exercises}
+    return {e: series for e, series in trends.items() if e}
+
+
+@_results.memoize
+def pr_as_of(exercise: str, date: Optional[str] = None, formula: str = "epley") -> Optional[Dict[str, Any]]:
+    """
+    Best estimated 1RM for an exercise on or before date (all history when None).
+    Returns {date, one_rm} with the date the best was first reached, or None.
+    """
+    if formula != "epley":
+        best = None
+        for point in pr_trend(exercise, None, date, formula):
+            if best is None or point["one_rm"] > best["one_rm"]:
+                best = point
+        return best
+    repo = get_repository()
+    if repo.name == "sqlite":
+        return repo.best_one_rm(exercise, date)
+    best = get_rollup().best_as_of(exercise, _day_bound(date))
+    return {"date": best[0], "one_rm": best[1]} if best else None
+
+
+@_results.memoize
 def muscle_volume_by_category(start: Optional[str] = None, end: Optional[str] = None) -> List[Dict[str, Any]]:
     """
     Aggregate total training volume (sum of weight×reps) by category for the date range.
     Returns list of {category, volume}.
     """
-    workouts = read_json("workouts")
-    start_dt = datetime.fromisoformat(start) if start else None
-    end_dt = datetime.fromisoformat(end) if end else None
-
+    repo = get_repository()
+    if repo.name == "sqlite":
+        return repo.volume_by_category(start, end)
     totals: Dict[str, float] = {}
-    for w in workouts:
-        date_str = w.get("date")
-        try:
-            dt = datetime.fromisoformat(date_str)
-        except Exception:
-            continue
-        if start_dt and dt < start_dt:
-            continue
-        if end_dt and dt > end_dt:
-            continue
-        category = w.get("category") or "Unknown"
-        vol = 0.0
-        for s in (w.get("sets") or []):
-            vol += float(s.get("weight_kg", 0)) * float(s.get("reps", 0))
-        totals[category] = totals.get(category, 0.0) + vol
-
-    return [{"category": k, "volume": v} for k, v in totals.items()]
+    first: Dict[str, int] = {}
+    rollup = get_rollup()
+    with rollup.lock:
+        for row in rollup.between(_day_bound(start), _day_bound(end)):
+            for cat, vol in row.category_volume.items():
+                totals[cat] = totals.get(cat, 0.0) + vol
+                seq = row.category_first[cat]
+                if seq < first.get(cat, seq + 1):
+                    first[cat] = seq
+    # Report every category logged in range, in order of first logging
+    return [{"category": c, "volume": totals[c]} for c in sorted(totals, key=first.__getitem__)]
 
 def calculate_volume(sets: List[Dict[str, Any]]) -> float:
     """Calculate total volume for a workout (weight × reps for all sets)"""
     return sum(set_record.get("weight_kg", 0) * set_record.get("reps", 0) for set_record in sets)
 
-def weekly_volume() -> pd.DataFrame:
-    """Calculate weekly volume of workouts"""
-    workouts = read_json("workouts")
-    
-    # Convert to DataFrame
-    df = pd.DataFrame(workouts)
-    
-    if df.empty:
-        # Return empty DataFrame with correct columns if no data
-        return pd.DataFrame(columns=["week_start", "volume"])
-    
-    # Convert date column to datetime
-    df["date"] = pd.to_datetime(df["date"])
-    
-    # Calculate volume for each workout
-    df["volume"] = df["sets"].apply(calculate_volume)
-    
-    # Group by week and sum volume
-    df["week_start"] = df["date"].dt.to_period("W").dt.start_time
-    weekly = df.groupby("week_start")["volume"].sum().reset_index()
-    
-    # Format for output
-    weekly["week_start"] = weekly["week_start"].dt.strftime("%Y-%m-%d")
-    
-    return weekly
-
-def monthly_volume() -> pd.DataFrame:
-    """Calculate monthly volume of workouts"""
-    workouts = read_json("workouts")
-    
-    # Convert to DataFrame
-    df = pd.DataFrame(workouts)
-    
-    if df.empty:
-        # Return empty DataFrame with correct columns if no data
-        return pd.DataFrame(columns=["month", "volume"])
-    
-    # Convert date column to datetime
-    df["date"] = pd.to_datetime(df["date"])
-    
-    # Calculate volume for each workout
-    df["volume"] = df["sets"].apply(calculate_volume)
-    
-    # Group by month and sum volume
-    df["month"] = df["date"].dt.to_period("M").dt.start_time
-    monthly = df.groupby("month")["volume"].sum().reset_index()
-    
-    # Format for output
-    monthly["month"] = monthly["month"].dt.strftime("%Y-%m")
-    
-    return monthly
+def _bucketed_day_volume(bucket: str, start: Optional[str] = None, end: Optional[str] = None):
+    # Sum the engine's per-day volume into buckets, honouring the configured week start
+    engine = get_engine()
+    lo, hi = to_ordinal(_day_bound(start)), to_ordinal(_day_bound(end))
+    rows = slice(
+        0 if lo is None else int(np.searchsorted(engine.days, lo, side="left")),
+        len(engine.days) if hi is None else int(np.searchsorted(engine.days, hi, side="right")),
+    )
+    return bucket_sums(engine.days[rows], engine.day_volume[rows], bucket, get_week_start())
+
+@_results.memoize
+def weekly_volume() -> List[Dict[str, Any]]:
+    """Calculate weekly volume of workouts (weeks start on config week_start, Monday by default).
+    Returns list of {week_start: 'YYYY-MM-DD', volume} sorted by week."""
+    weeks, volume, _ = _bucketed_day_volume("week")
+    return [{"week_start": from_ordinal(w), "volume": v} for w, v in zip(weeks, volume)]
+
+@_results.memoize
+def monthly_volume() -> List[Dict[str, Any]]:
+    """Calculate monthly volume of workouts.
+    Returns list of {month: 'YYYY-MM', volume} sorted by month."""
+    months, volume, _ = _bucketed_day_volume("month")
+    return [{"month": bucket_label(m, "month"), "volume": v} for m, v in zip(months, volume)]
+
+@_results.memoize
+def volume_by_bucket(bucket: str = "week", start: Optional[str] = None, end: Optional[str] = None) -> List[Dict[str, Any]]:
+    """Training volume per day/week/month/quarter/year within [start, end].
+    Returns list of {bucket: label, start: 'YYYY-MM-DD', days, volume} sorted by bucket."""
+    starts, volume, days = _bucketed_day_volume(bucket, start, end)
+    return [
+        {"bucket": bucket_label(b, bucket), "start": from_ordinal(b), "days": n, "volume": v}
+        for b, v, n in zip(starts, volume, days)
+    ]
+
+
+# At most this many daily points per workload response (the latest are kept)
+WORKLOAD_MAX_DAYS = 1000
+
+
+@_results.memoize
+def workload(start: Optional[str] = None, end: Optional[str] = None, acute: int = 7, chronic: int = 28) -> Dict[str, Any]:
+    """
+    Daily rolling training load over [start, end] (default: the chronic window
+    ending on the last training day; no points without data). For each day:
+    its volume, the acute window total, the chronic window total scaled to an
+    acute-length average, and their ratio (acwr; None without chronic load).
+    Returns {acute_days, chronic_days, points: [{date, volume, acute, chronic, acwr}]}.
+    """
+    rollup = get_rollup()
+    series = rollup.volume
+    points = []
+    with rollup.lock:
+        hi = to_ordinal(_day_bound(end)) or (day_ordinal(rollup.dates[-1]) if rollup.dates else None)
+        if hi is None:
+            return {"acute_days": acute, "chronic_days": chronic, "points": points}
+        lo = max(to_ordinal(_day_bound(start)) or hi - (chronic - 1), hi - (WORKLOAD_MAX_DAYS - 1))
+        for day in range(lo, hi + 1):
+            acute_load = series.window(day, acute)
+            chronic_load = series.window(day, chronic) * acute / chronic
+            points.append({
+                "date": from_ordinal(day),
+                "volume": round(series.window(day, 1), 2),
+                "acute": round(acute_load, 2),
+                "chronic": round(chronic_load, 2),
+                "acwr": round(acute_load / chronic_load, 3) if chronic_load > 1e-9 else None,
+            })
+    return {"acute_days": acute, "chronic_days": chronic, "points": points}
 
 
+@_results.memoize
 def exercise_detail(exercise: str, start: Optional[str] = None, end: Optional[str] = None) -> List[Dict[str, Any]]:
     """Return per-date series for a given exercise: volume and top weight per date.
 
@@ -162,45 +335,13 @@ def exercise_detail(exercise: str, start: Optional[str] = None, end: Optional[st
     """
     if not exercise or not exercise.strip():
         return []
-    workouts = read_json("workouts")
-
-    def to_dt(d: Optional[str]) -> Optional[datetime]:
-        return datetime.fromisoformat(d) if d else None
-
-    start_dt = to_dt(start)
-    end_dt = to_dt(end)
-
-    by_date: Dict[str, Dict[str, float]] = {}
-    for w in workouts:
-        if w.get("exercise") != exercise:
-            continue
-        d = w.get("date")
-        if not d:
-            continue
-        try:
-            dt = datetime.fromisoformat(d)
-        except Exception:
-            continue
-        if start_dt and dt < start_dt:
-            continue
-        if end_dt and dt > end_dt:
-            continue
-        vol = 0.0
-        top = 0.0
-        for s in (w.get("sets") or []):
-            try:
-                wkg = float(s.get("weight_kg", 0))
-                reps = float(s.get("reps", 0))
-                vol += wkg * reps
-                if wkg > top:
-                    top = wkg
-            except Exception:
-                continue
-        agg = by_date.setdefault(d, {"volume": 0.0, "top_weight": 0.0})
-        agg["volume"] += vol
-        if top > agg["top_weight"]:
-            agg["top_weight"] = top
-
-    out = [{"date": d, "volume": round(v["volume"], 2), "top_weight": round(v["top_weight"], 2)} for d, v in by_date.items()]
-    out.sort(key=lambda x: x["date"])  # ISO sort
-    return out
\ No newline at end of file
+    repo = get_repository()
+    if repo.name == "sqlite":
+        return repo.exercise_detail(exercise, start, end)
+    # Rows exist for every session, so days without sets still show up
+    rollup = get_rollup()
+    with rollup.lock:
+        return [
+            {"date": r.date, "volume": round(r.volume, 2), "top_weight": round(r.top_weight, 2)}
+            for r in rollup.series(exercise, _day_bound(start), _day_bound(end))
+        ]
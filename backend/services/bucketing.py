@@ -0,0 +1,60 @@
+"""
+Time bucketing over day ordinals (date.toordinal()).
+
+Every period rollup - weekly/monthly volume, the volume endpoint and the
+coach's weekly metrics - maps days to the ordinal of the first day of their
+bucket here, vectorized with NumPy, so they agree on boundaries and all honour
+the configured week start (0 = Monday, as date.weekday()).
+"""
+from datetime import date
+from typing import List, Sequence, Tuple
+
+import numpy as np
+
+BUCKETS = ("day", "week", "month", "quarter", "year")
+
+# Ordinal of 1970-01-01, the datetime64 epoch
+_EPOCH = date(1970, 1, 1).toordinal()
+
+
+def bucket_starts(days, bucket: str, week_start: int = 0) -> np.ndarray:
+    """Ordinal of the first day of the bucket holding each day ordinal."""
+    days = np.asarray(days, dtype=np.int64)
+    if bucket == "day":
+        return days
+    if bucket == "week":
+        # Ordinal 1 (0001-01-01) is a Monday, so (d - 1) % 7 is the weekday
+        return days - (days - 1 - week_start) % 7
+    if bucket not in BUCKETS:
+        raise ValueError(f"unknown bucket: {bucket}")
+    as_dates = (days - _EPOCH).astype("datetime64[D]")
+    if bucket == "year":
+        first = as_dates.astype("datetime64[Y]").astype("datetime64[D]")
+    else:
+        months = as_dates.astype("datetime64[M]").astype(np.int64)
+        if bucket == "quarter":
+            months -= months % 3
+        first = months.astype("datetime64[M]").astype("datetime64[D]")
+    return first.astype(np.int64) + _EPOCH
+
+
+def bucket_label(start: int, bucket: str) -> str:
+    """Display key of the bucket starting on ordinal start: YYYY-MM-DD for
+    days and weeks, YYYY-MM, YYYY-Qn or YYYY otherwise."""
+    d = date.fromordinal(int(start))
+    if bucket == "month":
+        return d.strftime("%Y-%m")
+    if bucket == "quarter":
+        return f"{d.year}-Q{(d.month - 1) // 3 + 1}"
+    if bucket == "year":
+        return str(d.year)
+    return d.isoformat()
+
+
+def bucket_sums(days, values: Sequence[float], bucket: str, week_start: int = 0) -> Tuple[List[int], List[float], List[int]]:
+    """(bucket start ordinals, summed values, day counts) for the non-empty buckets, in order."""
+    if not len(days):
+        return [], [], []
+    starts, inverse, counts = np.unique(bucket_starts(days, bucket, week_start), return_inverse=True, return_counts=True)
+    sums = np.bincount(inverse, weights=np.asarray(values, dtype=np.float64), minlength=len(starts))
+    return starts.tolist(), sums.tolist(), counts.tolist()
@@ -1,84 +1,54 @@
 from __future__ import annotations
 
-from dataclasses import dataclass
-from datetime import datetime, timedelta
-from typing import Any, Dict, List, Tuple
-
-from storage import read_json
-import storage as _storage
-from services.analytics_service import epley_one_rm
-
-
-def _parse_date(d: str) -> datetime:
-    return datetime.strptime(d, "%Y-%m-%d")
-
-
-def _window_bounds(dates: List[str], days: int) -> Tuple[datetime, datetime]:
-    if not dates:
-        now = datetime.utcnow()
-        start = now - timedelta(days=days - 1)
-        return start, now
-    end = max(_parse_date(d) for d in dates)
-    start = end - timedelta(days=days - 1)
-    return start, end
-
-
-def _weekly_key(dt: datetime) -> str:
-    # ISO year-week representation
-    iso_year, iso_week, _ = dt.isocalendar()
-    return f"{iso_year}-W{iso_week:02d}"
-
-
-def _calc_weekly_metrics(workouts: List[Dict[str, Any]]) -> Tuple[List[Dict[str, Any]], List[Dict[str, Any]]]:
-    volume_by_week: Dict[str, float] = {}
-    days_by_week: Dict[str, set] = {}
-    for w in workouts:
-        try:
-            dt = _parse_date(w.get("date", ""))
-        except Exception:
-            continue
-        week = _weekly_key(dt)
-        days_by_week.setdefault(week, set()).add(w.get("date"))
-        sets = w.get("sets") or []
-        vol = 0.0
-        for s in sets:
-            try:
-                vol += float(s.get("weight_kg", 0)) * int(s.get("reps", 0))
-            except Exception:
-                continue
-        volume_by_week[week] = volume_by_week.get(week, 0.0) + vol
-
+from datetime import date, datetime
+from typing import Any, Dict, List, Optional, Tuple
+
+try:
+    from backend.daily_rollup import DailyRollup
+    from backend.models import day_ordinal
+    from backend.repository import get_repository
+    from backend.services.analytics_service import get_rollup, workload
+    from backend.services.bucketing import bucket_label, bucket_sums
+    from backend.services.config_service import get_week_start
+except ImportError:
+    from daily_rollup import DailyRollup
+    from models import day_ordinal
+    from repository import get_repository
+    from services.analytics_service import get_rollup, workload
+    from services.bucketing import bucket_label, bucket_sums
+    from services.config_service import get_week_start
+
+
+# Acute:chronic workload ratio above which recent volume counts as a spike
+ACWR_SPIKE = 1.5
+
+
+def _calc_weekly_metrics(days: List[Tuple[str, int, int, float]]) -> Tuple[List[Dict[str, Any]], List[Dict[str, Any]]]:
+    # Weeks are keyed by their first day and start on config week_start
+    starts, volume, counts = bucket_sums(
+        [day_ordinal(d) for d, _, _, _ in days], [vol for _, _, _, vol in days], "week", get_week_start()
+    )
     weekly_volume = [
-        {"week": k, "volume": round(v, 2)} for k, v in sorted(volume_by_week.items())
+        {"week": bucket_label(w, "week"), "volume": round(v, 2)} for w, v in zip(starts, volume)
     ]
     weekly_frequency = [
-        {"week": k, "days": len(days_by_week.get(k, set()))}
-        for k in sorted(days_by_week.keys())
+        {"week": bucket_label(w, "week"), "days": n} for w, n in zip(starts, counts)
     ]
     return weekly_volume, weekly_frequency
 
 
-def _calc_pr_trend(workouts: List[Dict[str, Any]]) -> List[Dict[str, Any]]:
-    # Compute best (max) estimated 1RM per date per exercise
+def _calc_pr_trend(rollup: DailyRollup, start: str, end: str) -> List[Dict[str, Any]]:
+    # Best (max) estimated 1RM per date per exercise, from the daily rollup
     per_exercise: Dict[str, Dict[str, float]] = {}
-    for w in workouts:
-        ex = (w.get("exercise") or "").strip()
-        d = w.get("date")
-        if not ex or not d:
+    for name in list(rollup.by_exercise):
+        ex = (name or "").strip()
+        if not ex:
             continue
-        best_for_date = 0.0
-        for s in (w.get("sets") or []):
-            try:
-                est = epley_one_rm(float(s.get("weight_kg", 0)), int(s.get("reps", 0)))
-                if est > best_for_date:
-                    best_for_date = est
-            except Exception:
-                continue
-        if best_for_date > 0:
-            per_exercise.setdefault(ex, {})
-            prev = per_exercise[ex].get(d, 0.0)
-            if best_for_date > prev:
-                per_exercise[ex][d] = best_for_date
+        for row in rollup.series(name, start, end):
+            if row.one_rm > 0:
+                date_to_rm = per_exercise.setdefault(ex, {})
+                if row.one_rm > date_to_rm.get(row.date, 0.0):
+                    date_to_rm[row.date] = row.one_rm
 
     trend: List[Dict[str, Any]] = []
     for ex, date_to_rm in per_exercise.items():
@@ -105,6 +75,7 @@ def _analyze_rules(
     weekly_volume: List[Dict[str, Any]],
     weekly_frequency: List[Dict[str, Any]],
     pr_trend: List[Dict[str, Any]],
+    load: Optional[Dict[str, Any]] = None,
 ) -> List[Dict[str, Any]]:
     recs: List[Dict[str, Any]] = []
 
@@ -136,19 +107,16 @@ def _analyze_rules(
                     }
                 )
 
-    # Spike caution: last week ≥ 150% of previous week (or previous is small but jump large)
-    if len(weekly_volume) >= 2:
-        last = weekly_volume[-1]["volume"]
-        prev = weekly_volume[-2]["volume"]
-        if prev > 0 and last >= 1.5 * prev:
-            recs.append(
-                {
-                    "title": "Manage Recovery After Volume Spike",
-                    "reason": f"Last week's volume jumped by {(last/prev-1)*100:.0f}%.",
-                    "action": "Add an extra rest day and monitor fatigue; avoid further increases this week.",
-                    "priority": "medium",
-                }
-            )
+    # Spike caution: acute:chronic workload ratio (7-day load vs 28-day average) ≥ 1.5
+    if load is not None and load["acwr"] is not None and load["acwr"] >= ACWR_SPIKE:
+        recs.append(
+            {
+                "title": "Manage Recovery After Volume Spike",
+                "reason": f"7-day volume is {load['acwr']:.2f}x the 28-day weekly average (ACWR).",
+                "action": "Add an extra rest day and monitor fatigue; avoid further increases this week.",
+                "priority": "medium",
+            }
+        )
 
     # Flat PR trend: any exercise change within ±2%
     for t in pr_trend:
@@ -166,45 +134,35 @@ def _analyze_rules(
     return recs
 
 
-_CACHE: Dict[Tuple[int, str], Tuple[float, Dict[str, Any]]] = {}
-_TTL_SECONDS = 60.0
+_CACHE: Dict[int, Tuple[Tuple[str, int], Dict[str, Any]]] = {}
 
 
 def recommend(days: int = 30) -> Dict[str, Any]:
-    # Simple TTL cache
-    try:
-        import time
-        cache_key = (int(days), str(getattr(_storage, "DATA_DIR", "data")))
-        ts, cached = _CACHE.get(cache_key, (0.0, None))
-        if cached is not None and time.time() - ts < _TTL_SECONDS:
-            return cached
-    except Exception:
-        cached = None
-
-    workouts = read_json("workouts")
-    dates = [w.get("date") for w in workouts if w.get("date")]
-    start, end = _window_bounds(dates, days)
-
-    # filter within window
-    win_items = []
-    for w in workouts:
-        d = w.get("date")
-        if not d:
-            continue
-        try:
-            dt = _parse_date(d)
-        except Exception:
-            continue
-        if start <= dt <= end:
-            win_items.append(w)
-
-    insufficient = len(win_items) < 6
-
-    weekly_volume, weekly_frequency = _calc_weekly_metrics(win_items)
-    pr_tr = _calc_pr_trend(win_items)
+    # Results are cached per data version of the workouts (and week start)
+    version = (get_repository().data_version(), get_week_start())
+    cached = _CACHE.get(days)
+    if cached is not None and cached[0] == version:
+        return cached[1]
+
+    rollup = get_rollup()
+    with rollup.lock:
+        if rollup.dates:
+            end_day = date.fromisoformat(rollup.dates[-1])
+        else:
+            end_day = datetime.utcnow().date()
+        start = date.fromordinal(end_day.toordinal() - (days - 1)).isoformat()
+        end = end_day.isoformat()
+        day_totals = rollup.day_totals(start, end)
+        pr_tr = _calc_pr_trend(rollup, start, end)
+
+    insufficient = sum(workouts for _, workouts, _, _ in day_totals) < 6
+
+    weekly_volume, weekly_frequency = _calc_weekly_metrics(day_totals)
+    points = workload(end, end)["points"]
+    load = points[-1] if points else None
 
     # Always compute recommendations; use insufficientData flag for UI/UX only
-    recs = _analyze_rules(weekly_volume, weekly_frequency, pr_tr)
+    recs = _analyze_rules(weekly_volume, weekly_frequency, pr_tr, load)
 
     result = {
         "insufficientData": insufficient,
@@ -212,16 +170,10 @@ def recommend(days: int = 30) -> Dict[str, Any]:
             "weeklyVolume": weekly_volume,
             "weeklyFrequency": weekly_frequency,
             "prTrend": pr_tr,
+            "workload": load,
         },
         "recommendations": recs,
     }
 
-    try:
-        import time
-        _CACHE[cache_key] = (time.time(), result)
-    except Exception:
-        pass
-
+    _CACHE[days] = (version, result)
     return result
-
-
@@ -0,0 +1,191 @@
+"""
+In-memory application config (categories, exercises per category, ...).
+
+config.json is parsed and validated once and kept together with its
+pre-serialized JSON body and ETag until the file changes. Changes are detected
+with a non-blocking inotify watch on the data directory where available
+(Linux), so an edit from any process or worker is seen on the next request;
+elsewhere the file is re-stat'ed at most every CONFIG_POLL_SECONDS.
+"""
+import ctypes
+import ctypes.util
+import hashlib
+import json
+import os
+import struct
+import sys
+import threading
+import time
+from typing import Any, Dict, Optional
+
+try:
+    import backend.storage as _storage
+except ImportError:
+    import storage as _storage
+
+CONFIG_FILE = "config.json"
+CONFIG_POLL_SECONDS = float(os.getenv("CONFIG_POLL_SECONDS", "1.0"))
+
+_IN_CLOSE_WRITE = 0x008
+_IN_MOVED_FROM = 0x040
+_IN_MOVED_TO = 0x080
+_IN_CREATE = 0x100
+_IN_DELETE = 0x200
+_IN_Q_OVERFLOW = 0x4000
+_IN_NONBLOCK = 0o4000
+_IN_CLOEXEC = 0o2000000
+_EVENT = struct.Struct("iIII")
+
+
+WEEKDAYS = ("monday", "tuesday", "wednesday", "thursday", "friday", "saturday", "sunday")
+
+
+class ConfigError(ValueError):
+    """config.json does not have the expected shape."""
+
+
+def parse_week_start(value: Any) -> int:
+    """Weekday index (0 = Monday) for week_start: a weekday name or 0-6."""
+    if isinstance(value, int) and not isinstance(value, bool) and 0 <= value <= 6:
+        return value
+    if isinstance(value, str) and value.strip().lower() in WEEKDAYS:
+        return WEEKDAYS.index(value.strip().lower())
+    raise ConfigError("week_start must be a weekday name or 0-6")
+
+
+def validate_config(data: Any) -> Dict[str, Any]:
+    """Check the config shape."""
+    if not isinstance(data, dict):
+        raise ConfigError("config must be a JSON object")
+    categories = data.get("categories", [])
+    if not isinstance(categories, list) or not all(isinstance(c, str) for c in categories):
+        raise ConfigError("categories must be a list of strings")
+    exercises = data.get("exercises", {})
+    if not isinstance(exercises, dict) or not all(
+        isinstance(v, list) and all(isinstance(e, str) for e in v) for v in exercises.values()
+    ):
+        raise ConfigError("exercises must map categories to lists of strings")
+    if "week_start" in data:
+        parse_week_start(data["week_start"])
+    return data
+
+
+def load_config(data_dir: str) -> Dict[str, Any]:
+    """Parse and validate data_dir/config.json; only a missing file is an empty config."""
+    try:
+        with open(os.path.join(data_dir, CONFIG_FILE), "rb") as f:
+            raw = f.read()
+    except FileNotFoundError:
+        return {}
+    try:
+        data = json.loads(raw)
+    except ValueError as e:  # also a half-written file
+        raise ConfigError(f"config.json is not valid JSON: {e}") from None
+    return validate_config(data)
+
+
+def _inotify_fd(directory: str) -> Optional[int]:
+    """Non-blocking inotify fd watching directory, or None if unsupported."""
+    if not sys.platform.startswith("linux"):
+        return None
+    try:
+        libc = ctypes.CDLL(ctypes.util.find_library("c") or "libc.so.6", use_errno=True)
+        fd = libc.inotify_init1(_IN_NONBLOCK | _IN_CLOEXEC)
+        if fd < 0:
+            return None
+        mask = _IN_CLOSE_WRITE | _IN_MOVED_FROM | _IN_MOVED_TO | _IN_CREATE | _IN_DELETE
+        if libc.inotify_add_watch(fd, os.fsencode(directory), mask) < 0:
+            os.close(fd)
+            return None
+    except (OSError, AttributeError):
+        return None
+    return fd
+
+
+class ConfigSnapshot:
+    __slots__ = ("data", "body", "etag")
+
+    def __init__(self, data: Dict[str, Any]):
+        self.data = data
+        self.body = json.dumps(data, ensure_ascii=False).encode("utf-8")
+        self.etag = '"%s"' % hashlib.sha1(self.body).hexdigest()
+
+
+class ConfigStore:
+    """Current config for one data directory."""
+
+    def __init__(self, data_dir: str):
+        self.data_dir = data_dir
+        self._lock = threading.Lock()
+        self._snapshot: Optional[ConfigSnapshot] = None
+        self._version: Optional[str] = None
+        self._checked_at = 0.0
+        self._fd = _inotify_fd(data_dir)
+
+    @property
+    def watching(self) -> bool:
+        return self._fd is not None
+
+    def _changed(self) -> bool:
+        if self._fd is None:
+            return time.monotonic() - self._checked_at >= CONFIG_POLL_SECONDS
+        changed = False
+        while True:
+            try:
+                buf = os.read(self._fd, 4096)
+            except BlockingIOError:
+                return changed
+            if not buf:
+                return changed
+            pos = 0
+            while pos < len(buf):
+                _, mask, _, length = _EVENT.unpack_from(buf, pos)
+                name = buf[pos + _EVENT.size:pos + _EVENT.size + length].rstrip(b"\0")
+                if mask & _IN_Q_OVERFLOW or name == CONFIG_FILE.encode():
+                    changed = True
+                pos += _EVENT.size + length
+
+    def current(self) -> ConfigSnapshot:
+        snapshot = self._snapshot
+        if snapshot is not None and not self._changed():
+            return snapshot
+        with self._lock:
+            self._checked_at = time.monotonic()
+            version = _storage.data_version("config")
+            if self._snapshot is None or version != self._version:
+                # Keep serving the last valid config if an edit is invalid
+                try:
+                    data = load_config(self.data_dir)
+                except ConfigError:
+                    if self._snapshot is None:
+                        raise
+                else:
+                    self._snapshot = ConfigSnapshot(data)
+                self._version = version
+            return self._snapshot
+
+
+_stores: Dict[str, ConfigStore] = {}
+_stores_lock = threading.Lock()
+
+
+def get_config_snapshot() -> ConfigSnapshot:
+    """Validated config plus its serialized body and ETag for storage.DATA_DIR."""
+    _storage.ensure_data_dir()
+    key = os.path.abspath(_storage.DATA_DIR)
+    store = _stores.get(key)
+    if store is None:
+        with _stores_lock:
+            store = _stores.get(key)
+            if store is None:
+                store = _stores[key] = ConfigStore(key)
+    return store.current()
+
+
+def get_config() -> Dict[str, Any]:
+    return get_config_snapshot().data
+
+
+def get_week_start() -> int:
+    """Configured first day of the week (0 = Monday, the default)."""
+    return parse_week_start(get_config().get("week_start", 0))
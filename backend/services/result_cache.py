@@ -0,0 +1,78 @@
+"""
+Bounded LRU cache for analytics results.
+
+Entries are keyed by (function, normalized arguments, data version). The
+version is read on every call, so a workout write moves every function onto
+new keys and a stale result is never returned; old entries simply age out.
+Cached results are shared between callers and must not be mutated.
+"""
+import functools
+import inspect
+import os
+import threading
+from collections import OrderedDict
+from typing import Any, Callable, Dict, Hashable
+
+RESULT_CACHE_SIZE = int(os.getenv("RESULT_CACHE_SIZE", "512"))
+
+
+def _freeze(value: Any) -> Hashable:
+    if isinstance(value, (list, tuple)):
+        return tuple(_freeze(v) for v in value)
+    if isinstance(value, dict):
+        return tuple(sorted((k, _freeze(v)) for k, v in value.items()))
+    return value
+
+
+class ResultCache:
+    def __init__(self, version: Callable[[], Hashable], max_entries: int = RESULT_CACHE_SIZE):
+        self.version = version
+        self.max_entries = max_entries
+        self._entries: "OrderedDict[Hashable, Any]" = OrderedDict()
+        self._stats: Dict[str, Dict[str, int]] = {}
+        self._lock = threading.Lock()
+
+    def memoize(self, fn: Callable) -> Callable:
+        """Cache fn's results; arguments are bound to its signature so
+        positional, keyword and defaulted calls share one entry."""
+        name = fn.__name__
+        signature = inspect.signature(fn)
+        stats = self._stats.setdefault(name, {"hits": 0, "misses": 0, "evictions": 0})
+
+        @functools.wraps(fn)
+        def wrapper(*args, **kwargs):
+            bound = signature.bind(*args, **kwargs)
+            bound.apply_defaults()
+            key = (name, _freeze(tuple(bound.arguments.items())), self.version())
+            with self._lock:
+                if key in self._entries:
+                    self._entries.move_to_end(key)
+                    stats["hits"] += 1
+                    return self._entries[key]
+                stats["misses"] += 1
+            result = fn(*args, **kwargs)
+            with self._lock:
+                self._entries[key] = result
+                self._entries.move_to_end(key)
+                while len(self._entries) > self.max_entries:
+                    evicted = self._entries.popitem(last=False)[0]
+                    self._stats[evicted[0]]["evictions"] += 1
+            return result
+
+        wrapper.uncached = fn
+        return wrapper
+
+    def clear(self):
+        with self._lock:
+            self._entries.clear()
+            for stats in self._stats.values():
+                stats.update(hits=0, misses=0, evictions=0)
+
+    def stats(self) -> Dict[str, Any]:
+        """Entry count plus hits, misses, evictions and hit rate per function."""
+        with self._lock:
+            functions = {
+                name: {**s, "hit_rate": round(s["hits"] / (s["hits"] + s["misses"]), 4) if s["hits"] + s["misses"] else 0.0}
+                for name, s in self._stats.items()
+            }
+            return {"entries": len(self._entries), "max_entries": self.max_entries, "functions": functions}
@@ -0,0 +1,157 @@
+"""
+Columnar view of all workout sets for the analytics engine.
+
+Workouts are flattened into parallel NumPy arrays sorted by date ordinal,
+one row per set (day, exercise id, weight_kg, reps) plus the day of every
+workout so that days without sets are still counted. The
+columns are rebuilt once per storage data version and persisted as .npy files
+under DATA_DIR/columns so other workers and restarts can memory-map them
+instead of re-flattening the JSON.
+"""
+import hashlib
+import json
+import os
+from datetime import date
+from typing import Any, Dict, List, Optional, Tuple
+
+import numpy as np
+
+try:
+    import backend.storage as _storage
+    from backend.models import canonical_date, day_key, day_ordinal
+except ImportError:
+    import storage as _storage
+    from models import canonical_date, day_key, day_ordinal
+
+SET_COLUMNS = ("day", "exercise", "weight", "reps")
+WORKOUT_COLUMNS = ("w_day",)
+
+
+class SetColumns:
+    """Parallel arrays over sets, plus workout days, both sorted by day."""
+
+    def __init__(self, arrays: Dict[str, np.ndarray], exercises: List[str]):
+        for name in SET_COLUMNS + WORKOUT_COLUMNS:
+            setattr(self, name, arrays[name])
+        self.exercises = exercises
+        self.exercise_ids = {e: i for i, e in enumerate(exercises)}
+
+    def set_range(self, start: Optional[int], end: Optional[int]) -> slice:
+        lo = 0 if start is None else int(np.searchsorted(self.day, start, side="left"))
+        hi = len(self.day) if end is None else int(np.searchsorted(self.day, end, side="right"))
+        return slice(lo, hi)
+
+
+def to_ordinal(d: Optional[str]) -> Optional[int]:
+    """Day ordinal for an ISO date string (None passes through)."""
+    return day_ordinal(canonical_date(d)) if d else None
+
+
+_iso_dates: Dict[int, str] = {}
+
+
+def from_ordinal(day: int) -> str:
+    """ISO date string for a day ordinal (memoized; series repeat the same days)."""
+    s = _iso_dates.get(day)
+    if s is None:
+        s = _iso_dates[day] = date.fromordinal(day).isoformat()
+    return s
+
+
+def build_columns(workouts: List[Dict[str, Any]]) -> SetColumns:
+    """Flatten workout dicts into SetColumns, dropping rows with unparseable dates."""
+    exercise_ids: Dict[str, int] = {}
+    day_cache: Dict[str, Optional[int]] = {}
+    s_day, s_ex, s_w, s_r = [], [], [], []
+    w_day = []
+    for w in workouts:
+        d = w.get("date")
+        if d not in day_cache:
+            key = day_key(d)
+            day_cache[d] = day_ordinal(key) if key else None
+        day = day_cache[d]
+        if day is None:
+            continue
+        ex = exercise_ids.setdefault(w.get("exercise"), len(exercise_ids))
+        w_day.append(day)
+        for s in (w.get("sets") or []):
+            try:
+                weight = float(s.get("weight_kg", 0))
+                reps = float(s.get("reps", 0))
+            except Exception:
+                continue
+            s_day.append(day)
+            s_ex.append(ex)
+            s_w.append(weight)
+            s_r.append(reps)
+
+    s_order = np.argsort(np.asarray(s_day, dtype=np.int32), kind="stable")
+    arrays = {
+        "day": np.asarray(s_day, dtype=np.int32)[s_order],
+        "exercise": np.asarray(s_ex, dtype=np.int32)[s_order],
+        "weight": np.asarray(s_w, dtype=np.float64)[s_order],
+        "reps": np.asarray(s_r, dtype=np.float64)[s_order],
+        "w_day": np.sort(np.asarray(w_day, dtype=np.int32)),
+    }
+    return SetColumns(arrays, list(exercise_ids))
+
+
+def _columns_dir(data_dir: str) -> str:
+    return os.path.join(data_dir, "columns")
+
+
+def _save(data_dir: str, version: str, cols: SetColumns):
+    # Files are written under a per-version tag and the metadata is swapped
+    # last, so readers never see a mix of old and new columns; superseded
+    # files are unlinked, which is safe while other processes have them mapped.
+    out_dir = _columns_dir(data_dir)
+    os.makedirs(out_dir, exist_ok=True)
+    tag = hashlib.sha1(version.encode("utf-8")).hexdigest()[:12]
+    for name in SET_COLUMNS + WORKOUT_COLUMNS:
+        np.save(os.path.join(out_dir, f"sets-{tag}.{name}.npy"), getattr(cols, name))
+    meta = {"version": version, "tag": tag, "exercises": cols.exercises}
+    tmp = os.path.join(out_dir, "sets.json.tmp")
+    with open(tmp, "w", encoding="utf-8") as f:
+        json.dump(meta, f, ensure_ascii=False)
+    os.replace(tmp, os.path.join(out_dir, "sets.json"))
+    for fname in os.listdir(out_dir):
+        if fname.startswith("sets-") and not fname.startswith(f"sets-{tag}."):
+            try:
+                os.remove(os.path.join(out_dir, fname))
+            except FileNotFoundError:
+                pass
+
+
+def _load(data_dir: str, version: str) -> Optional[SetColumns]:
+    out_dir = _columns_dir(data_dir)
+    try:
+        with open(os.path.join(out_dir, "sets.json"), "r", encoding="utf-8") as f:
+            meta = json.load(f)
+        if meta.get("version") != version:
+            return None
+        arrays = {
+            name: np.load(os.path.join(out_dir, f"sets-{meta['tag']}.{name}.npy"), mmap_mode="r")
+            for name in SET_COLUMNS + WORKOUT_COLUMNS
+        }
+    except (FileNotFoundError, ValueError, KeyError):
+        return None
+    return SetColumns(arrays, meta["exercises"])
+
+
+_columns: Dict[str, Tuple[str, SetColumns]] = {}
+
+
+def get_set_columns() -> SetColumns:
+    """Columns for the current workouts data version (memory, then disk, then rebuild)."""
+    data_dir = _storage.DATA_DIR
+    key = os.path.abspath(data_dir)
+    version = _storage.data_version("workouts")
+    cached = _columns.get(key)
+    if cached is not None and cached[0] == version:
+        return cached[1]
+    cols = _load(data_dir, version)
+    if cols is None:
+        cols = build_columns(_storage.read_json("workouts"))
+        _save(data_dir, version, cols)
+    _columns[key] = (version, cols)
+    return cols
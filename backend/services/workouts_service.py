@@ -1,12 +1,24 @@
 from typing import List, Dict, Any, Tuple
-from storage import read_json
+
+try:
+    from backend.models import day_key
+    from backend.repository import get_repository
+    from backend.services.analytics_service import get_rollup
+except ImportError:
+    from models import day_key
+    from repository import get_repository
+    from services.analytics_service import get_rollup
 
 def compute_daily_summary(target_date: str) -> Tuple[int, float]:
     """Compute summary statistics for a specific date"""
-    workouts = read_json("workouts")
-    
-    # Filter workouts for the target date
-    daily_workouts = [w for w in workouts if w.get("date") == target_date]
+    repo = get_repository()
+    if repo.name != "sqlite":
+        # Read straight from the daily rollup kept current by the JSON store
+        day = day_key(target_date)
+        totals = get_rollup().day_totals(day, day) if day else []
+        return (totals[0][2], totals[0][3]) if totals else (0, 0.0)
+
+    daily_workouts = repo.workouts_on(target_date)
     
     # Calculate total sets count and volume
     sets_count = 0
@@ -18,4 +30,4 @@ def compute_daily_summary(target_date: str) -> Tuple[int, float]:
             for set_record in workout["sets"]:
                 volume += set_record.get("weight_kg", 0) * set_record.get("reps", 0)
     
-    return sets_count, volume
\ No newline at end of file
+    return sets_count, volume
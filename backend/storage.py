@@ -1,37 +1,877 @@
 import json
 import os
-from typing import List, Any
+import queue
+import threading
+import time
+import uuid
+from contextlib import contextmanager
+from typing import List, Any, Callable, Dict, Iterable, Optional, Tuple
+
+try:
+    import fcntl
+except ImportError:  # Windows: writers are only serialized within a process
+    fcntl = None
+
+try:
+    import msgpack
+except ImportError:  # only needed for STORAGE_FORMAT=msgpack (in requirements.txt)
+    msgpack = None
+
+try:
+    from backend.workout_index import WorkoutIndex
+    from backend.daily_rollup import DailyRollup
+    from backend.models import WorkoutEntry, compact_workout, compact_workout_list
+except ImportError:
+    from workout_index import WorkoutIndex
+    from daily_rollup import DailyRollup
+    from models import WorkoutEntry, compact_workout, compact_workout_list
 
 DATA_DIR = "data"
 
+# On-disk snapshot format for workouts and routines: "json" (indented, the
+# default), "compact" (minified JSON) or "msgpack" (binary, requires the
+# msgpack package). config always stays indented JSON so it can be edited by
+# hand. A snapshot found in another format is converted on first read.
+STORAGE_FORMAT = os.getenv("STORAGE_FORMAT", "json")
+
+# Workouts are stored log-structured: the snapshot is partitioned into one
+# shard file per month under WORKOUTS_DIR (entries without a usable date go
+# to the "undated" shard), listed in a small manifest, and new writes are
+# appended to a JSONL segment as put/delete records. Once the active segment
+# grows past COMPACT_LOG_BYTES it is sealed and folded into the shards it
+# touches (in a background thread by default). A single-file workouts.json
+# or workouts.msgpack from older versions is split into shards on first read.
+WORKOUTS_DIR = "workouts"
+WORKOUTS_MANIFEST = "manifest.json"
+UNDATED_SHARD = "undated"
+WORKOUTS_LOG = "workouts.log.jsonl"
+WORKOUTS_LOG_SEALED = "workouts.log.compacting.jsonl"
+COMPACT_LOG_BYTES = 4 * 1024 * 1024
+COMPACT_IN_BACKGROUND = True
+
+# Concurrent log appends are handed to a single writer thread that commits
+# everything arriving within GROUP_COMMIT_MAX_DELAY seconds (up to
+# GROUP_COMMIT_MAX_BATCH requests) with one write and one fsync.
+GROUP_COMMIT_MAX_BATCH = int(os.getenv("GROUP_COMMIT_MAX_BATCH", "256"))
+GROUP_COMMIT_MAX_DELAY = float(os.getenv("GROUP_COMMIT_MAX_DELAY", "0.001"))
+
+# Writers take _write_lock and, across processes (e.g. several uvicorn
+# workers), an advisory flock on DATA_DIR/LOCK_FILE. Readers never lock: every
+# file is replaced atomically and log segments are read in an order that
+# tolerates concurrent compaction, while cached snapshots are validated by
+# file signature, so a write in another process invalidates them here too.
+LOCK_FILE = ".storage.lock"
+
+_write_lock = threading.RLock()
+_flocks: Dict[str, List[int]] = {}
+_compacting = set()
+_commit_queue: "queue.Queue[_PendingWrite]" = queue.Queue()
+_writer: Optional[threading.Thread] = None
+_group_commit_stats = {"batches": 0, "writes": 0, "records": 0, "max_batch": 0, "batch_sizes": {}}
+
+# Parsed snapshots shared by all readers, keyed by file path and validated
+# against the (mtime, size, inode) of the files backing them (workouts are
+# held as a _Snapshot). Cached values are handed out as-is, so callers must
+# treat them as read-only.
+_cache: Dict[str, Tuple[Any, Any]] = {}
+_cache_stats = {"hits": 0, "misses": 0}
+# Secondary indexes and the daily rollup over workouts, validated the same
+# way as _cache
+_indexes: Dict[str, Tuple[Any, WorkoutIndex]] = {}
+_rollups: Dict[str, Tuple[Any, DailyRollup]] = {}
+
 def ensure_data_dir():
     """Ensure the data directory exists"""
     if not os.path.exists(DATA_DIR):
         os.makedirs(DATA_DIR)
 
-def read_json(filename: str) -> List[Any]:
-    """Read data from a JSON file"""
-    ensure_data_dir()
-    filepath = os.path.join(DATA_DIR, f"{filename}.json")
-    if not os.path.exists(filepath):
+@contextmanager
+def _transaction(data_dir: str):
+    """Exclusive write transaction on data_dir (re-entrant within a thread)."""
+    key = os.path.abspath(data_dir)
+    with _write_lock:
+        held = _flocks.get(key)
+        if held is None:
+            fd = os.open(os.path.join(data_dir, LOCK_FILE), os.O_RDWR | os.O_CREAT, 0o644)
+            if fcntl is not None:
+                fcntl.flock(fd, fcntl.LOCK_EX)
+            held = _flocks[key] = [fd, 0]
+        held[1] += 1
+        try:
+            yield
+        finally:
+            held[1] -= 1
+            if held[1] == 0:
+                del _flocks[key]
+                if fcntl is not None:
+                    fcntl.flock(held[0], fcntl.LOCK_UN)
+                os.close(held[0])
+
+def _fsync_dir(path: str):
+    # Make a rename/unlink durable; not supported on every platform
+    try:
+        fd = os.open(path, os.O_RDONLY)
+    except OSError:
+        return
+    try:
+        os.fsync(fd)
+    except OSError:
+        pass
+    finally:
+        os.close(fd)
+
+class Serializer:
+    """How a snapshot is encoded on disk."""
+
+    def __init__(self, suffix: str, dumps, loads):
+        self.suffix = suffix
+        self.dumps = dumps  # data -> bytes
+        self.loads = loads  # bytes -> data
+
+def _to_plain(obj: Any) -> Any:
+    # Slotted workout records (models.WorkoutEntry) are written as their dicts
+    to_dict = getattr(obj, "to_dict", None)
+    if to_dict is None:
+        raise TypeError(f"Object of type {type(obj).__name__} is not serializable")
+    return to_dict()
+
+SERIALIZERS = {
+    "json": Serializer(
+        ".json",
+        lambda data: json.dumps(data, ensure_ascii=False, indent=2, default=_to_plain).encode("utf-8"),
+        json.loads,
+    ),
+    "compact": Serializer(
+        ".json",
+        lambda data: json.dumps(data, ensure_ascii=False, separators=(",", ":"), default=_to_plain).encode("utf-8"),
+        json.loads,
+    ),
+}
+if msgpack is not None:
+    SERIALIZERS["msgpack"] = Serializer(
+        ".msgpack",
+        lambda data: msgpack.packb(data, use_bin_type=True, default=_to_plain),
+        lambda raw: msgpack.unpackb(raw, raw=False),
+    )
+SNAPSHOT_SUFFIXES = (".json", ".msgpack")
+# Fail at startup rather than on every request and in the compaction thread
+if STORAGE_FORMAT not in SERIALIZERS:
+    raise ValueError(f"Unsupported STORAGE_FORMAT {STORAGE_FORMAT!r} (msgpack needs the msgpack package)")
+
+def _serializer(filename: str) -> Serializer:
+    fmt = "json" if filename == "config" else STORAGE_FORMAT
+    if fmt not in SERIALIZERS:
+        raise ValueError(f"Unsupported STORAGE_FORMAT {fmt!r} (msgpack needs the msgpack package)")
+    return SERIALIZERS[fmt]
+
+def _snapshot_path(data_dir: str, filename: str) -> str:
+    return os.path.join(data_dir, filename + _serializer(filename).suffix)
+
+def _existing_snapshot(data_dir: str, filename: str) -> Optional[str]:
+    """Path of the snapshot on disk, preferring the configured format."""
+    preferred = _snapshot_path(data_dir, filename)
+    if os.path.exists(preferred):
+        return preferred
+    for suffix in SNAPSHOT_SUFFIXES:
+        path = os.path.join(data_dir, filename + suffix)
+        if os.path.exists(path):
+            return path
+    return None
+
+def _write_file(path: str, data: Any, serializer: Serializer):
+    with open(path, 'wb') as f:
+        f.write(serializer.dumps(data))
+        f.flush()
+        os.fsync(f.fileno())
+
+def _write_tmp(path: str, data: Any, serializer: Serializer) -> str:
+    """Write data next to path in a uniquely named, fsynced temp file."""
+    tmp = f"{path}.{os.getpid()}.{threading.get_ident()}.tmp"
+    _write_file(tmp, data, serializer)
+    return tmp
+
+def _load_file(filepath: Optional[str], missing_ok: bool = True) -> List[Any]:
+    if filepath is None or (missing_ok and not os.path.exists(filepath)):
         return []
-    with open(filepath, 'r', encoding='utf-8') as f:
+    if filepath.endswith(".msgpack"):
+        if msgpack is None:
+            raise RuntimeError(f"{filepath} is msgpack-encoded but msgpack is not installed")
+        loads = SERIALIZERS["msgpack"].loads
+    else:
+        loads = json.loads
+    with open(filepath, 'rb') as f:
         try:
-            return json.load(f)
-        except json.JSONDecodeError:
+            return loads(f.read())
+        except ValueError:
             return []
 
+def _read_log(filepath: str) -> List[Dict[str, Any]]:
+    """Read put/delete records from a JSONL segment, skipping torn lines."""
+    records = []
+    try:
+        with open(filepath, 'r', encoding='utf-8') as f:
+            for line in f:
+                line = line.strip()
+                if not line:
+                    continue
+                try:
+                    records.append(json.loads(line))
+                except json.JSONDecodeError:
+                    # A crash mid-append can leave a partial last line
+                    continue
+    except FileNotFoundError:
+        pass
+    return records
+
+def _keyed(items: List[Any]) -> Dict[Any, Any]:
+    # Entries without an id (or repeating one) keep their slot by position
+    merged: Dict[Any, Any] = {}
+    for pos, w in enumerate(items):
+        key = w.get("id") if isinstance(w, (dict, WorkoutEntry)) else None
+        if key is None or key in merged:
+            key = ("#", pos)
+        merged[key] = w
+    return merged
+
+def _apply(merged: Dict[Any, Any], records: Iterable[Dict[str, Any]]):
+    for rec in records:
+        op = rec.get("op")
+        if op == "put":
+            entry = rec.get("entry") or {}
+            merged[entry.get("id")] = entry
+        elif op == "del":
+            merged.pop(rec.get("id"), None)
+
+def _fold(items: List[Any], records: Iterable[Dict[str, Any]]) -> List[Any]:
+    """Apply log records on top of a snapshot list.
+
+    Puts are keyed by workout id so replaying a segment that was already
+    folded into the snapshot is harmless.
+    """
+    merged = _keyed(items)
+    _apply(merged, records)
+    return list(merged.values())
+
+class _Snapshot:
+    """Cached workouts keyed by id, in logical order.
+
+    Log records are applied to the mapping in place, so a write costs O(1)
+    per record however long the history is; the list handed to readers is
+    rebuilt on the first read after a change.
+    """
+
+    __slots__ = ("by_key", "_items", "_lock")
+
+    def __init__(self, items: List[Any]):
+        self.by_key = _keyed(items)
+        self._items: Optional[List[Any]] = items
+        self._lock = threading.Lock()
+
+    def items(self) -> List[Any]:
+        with self._lock:
+            if self._items is None:
+                self._items = list(self.by_key.values())
+            return self._items
+
+    def apply(self, records: Iterable[Dict[str, Any]]):
+        with self._lock:
+            _apply(self.by_key, records)
+            self._items = None
+
+def _shard_of(date: Any) -> str:
+    """Month shard ("YYYY-MM") an ISO date string belongs to."""
+    if isinstance(date, str) and len(date) >= 7 and date[4] == "-" and date[:4].isdigit() and date[5:7].isdigit():
+        return date[:7]
+    return UNDATED_SHARD
+
+def _by_shard(items: List[Any]) -> List[Any]:
+    # The logical order of workouts: by shard, then insertion order within it
+    return sorted(items, key=lambda w: _shard_of(w.get("date")))
+
+def _manifest_path(data_dir: str) -> str:
+    return os.path.join(data_dir, WORKOUTS_DIR, WORKOUTS_MANIFEST)
+
+def _read_manifest(data_dir: str) -> Dict[str, Dict[str, Any]]:
+    """Shard name -> {"file", "count"} for the current snapshot."""
+    try:
+        with open(_manifest_path(data_dir), 'r', encoding='utf-8') as f:
+            return json.load(f).get("shards", {})
+    except (FileNotFoundError, json.JSONDecodeError):
+        return {}
+
+def _load_shards(data_dir: str, first: Optional[str] = None, last: Optional[str] = None) -> List[Any]:
+    """Concatenate the shards in [first, last] (all shards when unbounded)."""
+    for _ in range(5):
+        shards = _read_manifest(data_dir)
+        items: List[Any] = []
+        try:
+            for name in sorted(shards):
+                if name == UNDATED_SHARD and (first or last):
+                    continue
+                if (first and name < first) or (last and name > last):
+                    continue
+                path = os.path.join(data_dir, WORKOUTS_DIR, shards[name]["file"])
+                items.extend(_load_file(path, missing_ok=False))
+            return items
+        except FileNotFoundError:
+            # A writer swapped the manifest and dropped the shard meanwhile
+            continue
+    raise RuntimeError(f"workouts shards in {data_dir} kept changing while being read")
+
+def _write_shard(data_dir: str, name: str, items: List[Any]) -> Dict[str, Any]:
+    # Shard files are never overwritten: each write gets a new name and only
+    # becomes visible once the manifest pointing at it is swapped in
+    serializer = _serializer("workouts")
+    fname = f"{name}.{uuid.uuid4().hex[:8]}{serializer.suffix}"
+    _write_file(os.path.join(data_dir, WORKOUTS_DIR, fname), items, serializer)
+    return {"file": fname, "count": len(items)}
+
+def _swap_manifest(data_dir: str, shards: Dict[str, Dict[str, Any]]):
+    """Publish a new manifest and drop shard files it no longer references.
+
+    Must be called inside _transaction. Unreferenced files can only belong to
+    superseded snapshots or to writers whose inputs are now stale.
+    """
+    shards_dir = os.path.join(data_dir, WORKOUTS_DIR)
+    path = _manifest_path(data_dir)
+    tmp = _write_tmp(path, {"version": 1, "shards": dict(sorted(shards.items()))}, SERIALIZERS["json"])
+    os.replace(tmp, path)
+    keep = {meta["file"] for meta in shards.values()} | {WORKOUTS_MANIFEST}
+    for fname in os.listdir(shards_dir):
+        if fname not in keep:
+            try:
+                os.remove(os.path.join(shards_dir, fname))
+            except FileNotFoundError:
+                pass
+    _fsync_dir(shards_dir)
+
+def _replace_shards(data_dir: str, items: List[Any]) -> List[Any]:
+    """Rewrite the whole workouts snapshot; returns items in logical order."""
+    os.makedirs(os.path.join(data_dir, WORKOUTS_DIR), exist_ok=True)
+    groups: Dict[str, List[Any]] = {}
+    for w in items:
+        groups.setdefault(_shard_of(w.get("date")), []).append(w)
+    _swap_manifest(data_dir, {name: _write_shard(data_dir, name, group) for name, group in groups.items()})
+    return [w for name in sorted(groups) for w in groups[name]]
+
+def _compacted(items: List[Any]) -> List[Any]:
+    # Workouts are held as slotted WorkoutEntry records sharing one string
+    # object per distinct date/category/exercise/type
+    return compact_workout_list(items)
+
+def _read_workouts(data_dir: str) -> List[Any]:
+    # Read the segments before the snapshot: a compaction finishing in
+    # between then only causes records to be applied twice, never lost.
+    active = _read_log(os.path.join(data_dir, WORKOUTS_LOG))
+    sealed = _read_log(os.path.join(data_dir, WORKOUTS_LOG_SEALED))
+    items = _load_shards(data_dir)
+    if active or sealed:
+        items = _fold(items, sealed + active)
+    return _compacted(items)
+
+def _cache_key(data_dir: str, filename: str) -> str:
+    return os.path.join(os.path.abspath(data_dir), filename)
+
+def _file_signature(path: str) -> Optional[Tuple[int, int, int]]:
+    try:
+        st = os.stat(path)
+    except FileNotFoundError:
+        return None
+    return (st.st_mtime_ns, st.st_size, st.st_ino)
+
+def _signature(data_dir: str, filename: str) -> Tuple[Any, ...]:
+    names = [filename + suffix for suffix in SNAPSHOT_SUFFIXES]
+    if filename == "workouts":
+        names += [os.path.join(WORKOUTS_DIR, WORKOUTS_MANIFEST), WORKOUTS_LOG, WORKOUTS_LOG_SEALED]
+    return tuple(_file_signature(os.path.join(data_dir, n)) for n in names)
+
+def _has_legacy_snapshot(sig: Tuple[Any, ...]) -> bool:
+    return any(sig[i] is not None for i in range(len(SNAPSHOT_SUFFIXES)))
+
+def data_version(filename: str) -> str:
+    """Opaque token that changes whenever the named dataset changes on disk"""
+    return "-".join(
+        "0" if sig is None else "%x.%x.%x" % sig
+        for sig in _signature(DATA_DIR, filename)
+    )
+
+def cache_stats() -> Dict[str, int]:
+    """Snapshot cache counters; misses are reads that had to parse from disk"""
+    return {**_cache_stats, "entries": len(_cache)}
+
+def clear_cache():
+    """Drop all cached snapshots and reset the counters"""
+    with _write_lock:
+        _cache.clear()
+        _indexes.clear()
+        _rollups.clear()
+        _cache_stats["hits"] = 0
+        _cache_stats["misses"] = 0
+
+def read_json(filename: str) -> List[Any]:
+    """Read data from a JSON file.
+
+    Repeated reads return the same cached object until the file changes on
+    disk, so the result must not be mutated in place.
+    """
+    ensure_data_dir()
+    data_dir = DATA_DIR
+    key = _cache_key(data_dir, filename)
+    # Stat before loading: if the file changes while we parse, the cached
+    # signature is already stale and the next read simply reloads.
+    sig = _signature(data_dir, filename)
+    cached = _cache.get(key)
+    if cached is not None and cached[0] == sig:
+        _cache_stats["hits"] += 1
+        return cached[1].items() if filename == "workouts" else cached[1]
+    _cache_stats["misses"] += 1
+    if filename == "workouts":
+        if _has_legacy_snapshot(sig):
+            _migrate_workouts(data_dir)
+            sig = _signature(data_dir, filename)
+        data = _read_workouts(data_dir)
+        _cache[key] = (sig, _Snapshot(data))
+        return data
+    else:
+        preferred = SNAPSHOT_SUFFIXES.index(_serializer(filename).suffix)
+        if sig[preferred] is None and _has_legacy_snapshot(sig):
+            _migrate_snapshot(data_dir, filename)
+            sig = _signature(data_dir, filename)
+        data = _load_file(_existing_snapshot(data_dir, filename))
+    _cache[key] = (sig, data)
+    return data
+
+def read_workouts_range(start: Optional[str] = None, end: Optional[str] = None) -> List[Any]:
+    """Workouts with start <= date <= end (ISO strings, inclusive).
+
+    Served from the cached snapshot when it is current; otherwise only the
+    month shards overlapping the range are opened.
+    """
+    ensure_data_dir()
+    data_dir = DATA_DIR
+    sig = _signature(data_dir, "workouts")
+    cached = _cache.get(_cache_key(data_dir, "workouts"))
+    if (cached is not None and cached[0] == sig) or _has_legacy_snapshot(sig) or not (start or end):
+        items = read_json("workouts")
+    else:
+        active = _read_log(os.path.join(data_dir, WORKOUTS_LOG))
+        sealed = _read_log(os.path.join(data_dir, WORKOUTS_LOG_SEALED))
+        items = _load_shards(data_dir, start and _shard_of(start), end and _shard_of(end))
+        if active or sealed:
+            items = _fold(items, sealed + active)
+        items = _compacted(items)
+    return [
+        w for w in items
+        if isinstance(w.get("date"), str)
+        and (not start or w["date"] >= start) and (not end or w["date"] <= end)
+    ]
+
+def _remove_other_snapshots(data_dir: str, filename: str, keep: Optional[str] = None):
+    if keep is None and filename != "workouts":
+        keep = _snapshot_path(data_dir, filename)
+    for suffix in SNAPSHOT_SUFFIXES:
+        path = os.path.join(data_dir, filename + suffix)
+        if path != keep:
+            try:
+                os.remove(path)
+            except FileNotFoundError:
+                pass
+
+def _migrate_snapshot(data_dir: str, filename: str):
+    """Re-encode a snapshot stored in another format in the configured one."""
+    with _transaction(data_dir):
+        target = _snapshot_path(data_dir, filename)
+        source = _existing_snapshot(data_dir, filename)
+        if source is None or source == target:
+            return
+        tmp = _write_tmp(target, _load_file(source), _serializer(filename))
+        before = _signature(data_dir, filename)
+        os.replace(tmp, target)
+        _remove_other_snapshots(data_dir, filename)
+        _fsync_dir(data_dir)
+        _resign(data_dir, before, filename)
+
+def _migrate_workouts(data_dir: str):
+    """Split a single-file workouts snapshot into month shards."""
+    with _transaction(data_dir):
+        source = _existing_snapshot(data_dir, "workouts")
+        if source is None:
+            return
+        # Pending log records still apply on top of the shards
+        _replace_shards(data_dir, _load_file(source))
+        _remove_other_snapshots(data_dir, "workouts")
+        _fsync_dir(data_dir)
+
 def write_json(filename: str, data: List[Any]):
-    """Write data to a JSON file"""
+    """Write data to the dataset's snapshot in the configured format"""
     ensure_data_dir()
-    filepath = os.path.join(DATA_DIR, f"{filename}.json")
-    with open(filepath, 'w', encoding='utf-8') as f:
-        json.dump(data, f, ensure_ascii=False, indent=2)
+    data_dir = DATA_DIR
+    if filename == "workouts":
+        with _transaction(data_dir):
+            data = _replace_shards(data_dir, _compacted(data))
+            _remove_other_snapshots(data_dir, filename)
+            # A full rewrite supersedes any pending log records
+            for name in (WORKOUTS_LOG, WORKOUTS_LOG_SEALED):
+                try:
+                    os.remove(os.path.join(data_dir, name))
+                except FileNotFoundError:
+                    pass
+            _fsync_dir(data_dir)
+            key = _cache_key(data_dir, filename)
+            _cache[key] = (_signature(data_dir, filename), _Snapshot(data))
+            _indexes.pop(key, None)
+            _rollups.pop(key, None)
+        return
+    filepath = _snapshot_path(data_dir, filename)
+    tmp = _write_tmp(filepath, data, _serializer(filename))
+    with _transaction(data_dir):
+        os.replace(tmp, filepath)
+        _remove_other_snapshots(data_dir, filename)
+        _fsync_dir(data_dir)
+        key = _cache_key(data_dir, filename)
+        _cache[key] = (_signature(data_dir, filename), data)
+        _indexes.pop(key, None)
 
-def append_workouts(workouts: List[Any]):
-    """Append workouts to the workouts file"""
+def update_json(filename: str, fn: Callable[[List[Any]], List[Any]]) -> List[Any]:
+    """Replace a dataset with fn(current contents), as one write transaction.
+
+    The read happens under the lock, so concurrent updates from other threads
+    or worker processes are applied one after another instead of overwriting
+    each other. fn must not mutate its argument; returning it as-is skips
+    the write.
+    """
+    ensure_data_dir()
+    with _transaction(DATA_DIR):
+        current = read_json(filename)
+        data = fn(current)
+        if data is not current:
+            write_json(filename, data)
+    return data
+
+def get_workout_index(build: bool = True) -> Optional[WorkoutIndex]:
+    """Return the id/date/exercise index for the current workouts snapshot.
+
+    Built lazily from read_json on first use (or after an external change)
+    and kept up to date incrementally by the workout append/delete paths.
+    With build=False, returns None instead of building a missing index.
+    """
+    data_dir = DATA_DIR
+    key = _cache_key(data_dir, "workouts")
+    sig = _signature(data_dir, "workouts")
+    cached = _indexes.get(key)
+    if cached is not None and cached[0] == sig:
+        return cached[1]
+    if not build:
+        return None
+    # A commit in flight has already changed the files; wait for it to carry
+    # the index over instead of rebuilding from a half-applied state
+    with _write_lock:
+        sig = _signature(data_dir, "workouts")
+        cached = _indexes.get(key)
+        if cached is not None and cached[0] == sig:
+            return cached[1]
+        index = WorkoutIndex(read_json("workouts"))
+        _indexes[key] = (sig, index)
+    return index
+
+def get_daily_rollup() -> DailyRollup:
+    """Return the (date, exercise) rollup for the current workouts snapshot.
+
+    Built lazily like get_workout_index and updated incrementally by the
+    workout append/delete paths. Readers iterating it must hold its lock.
+    """
     ensure_data_dir()
-    filepath = os.path.join(DATA_DIR, "workouts.json")
-    existing = read_json("workouts")
-    existing.extend(workouts)
-    write_json("workouts", existing)
\ No newline at end of file
+    data_dir = DATA_DIR
+    key = _cache_key(data_dir, "workouts")
+    sig = _signature(data_dir, "workouts")
+    cached = _rollups.get(key)
+    if cached is not None and cached[0] == sig:
+        return cached[1]
+    with _write_lock:
+        return _current_rollup(data_dir)
+
+def _current_rollup(data_dir: str) -> DailyRollup:
+    # Caller holds _write_lock, so no commit can land between the signature
+    # check and the build
+    key = _cache_key(data_dir, "workouts")
+    sig = _signature(data_dir, "workouts")
+    cached = _rollups.get(key)
+    if cached is not None and cached[0] == sig:
+        return cached[1]
+    if _has_legacy_snapshot(sig):
+        _migrate_workouts(data_dir)
+        sig = _signature(data_dir, "workouts")
+    snapshot = _cache.get(key)
+    if snapshot is None or snapshot[0] != sig:
+        _cache_stats["misses"] += 1
+        snapshot = _cache[key] = (sig, _Snapshot(_read_workouts(data_dir)))
+    rollup = DailyRollup(snapshot[1].items())
+    _rollups[key] = (sig, rollup)
+    return rollup
+
+def _resign(data_dir: str, before: Tuple[Any, ...], filename: str = "workouts"):
+    """Carry cached state over a file change whose effect on the logical
+    contents has already been applied (or that has none)."""
+    key = _cache_key(data_dir, filename)
+    after = _signature(data_dir, filename)
+    for store in (_cache, _indexes, _rollups):
+        cached = store.get(key)
+        if cached is not None and cached[0] == before:
+            store[key] = (after, cached[1])
+
+def _apply_records(data_dir: str, before: Tuple[Any, ...], records: List[Dict[str, Any]],
+                   check_pr: Iterable[int] = ()) -> Dict[int, bool]:
+    """Carry the cached snapshot, index and rollup over a committed batch.
+
+    Returns whether the put at each position in check_pr set a new PR,
+    decided against the rollup as the batch is applied in order.
+    """
+    check_pr = set(check_pr)
+    flags: Dict[int, bool] = {}
+    key = _cache_key(data_dir, "workouts")
+    # Put entries in their in-memory form once for the snapshot, index and rollup
+    records = [{"op": "put", "entry": compact_workout(r["entry"])} if r["op"] == "put" else r for r in records]
+    # A put only survives the batch if no later tombstone targets its id
+    last_del = {r["id"]: i for i, r in enumerate(records) if r["op"] == "del"}
+    dead = set(last_del)
+    puts = [
+        r["entry"] for i, r in enumerate(records)
+        if r["op"] == "put" and last_del.get(r["entry"].get("id"), -1) < i
+    ]
+    cached = _cache.pop(key, None)
+    if cached is not None and cached[0] == before:
+        # Update the current snapshot instead of reparsing
+        cached[1].apply(records)
+        _cache[key] = cached
+    cached = _indexes.pop(key, None)
+    if cached is not None and cached[0] == before:
+        with cached[1].lock:
+            _update(cached[1], dead, puts)
+        _indexes[key] = cached
+    cached = _rollups.pop(key, None)
+    if cached is not None and cached[0] == before:
+        # Request threads read the rollup in place; apply the batch as one step
+        rollup = cached[1]
+        with rollup.lock:
+            for i, r in enumerate(records):
+                if r["op"] == "del":
+                    rollup.remove(r["id"])
+                    continue
+                if i in check_pr:
+                    flags[i] = rollup.is_new_pr(r["entry"])
+                rollup.add(r["entry"])
+        _rollups[key] = cached
+    _resign(data_dir, before)
+    return flags
+
+def _update(target: Any, dead: Iterable[Any], puts: List[Any]):
+    for wid in dead:
+        target.remove(wid)
+    for entry in puts:
+        target.add(entry)
+
+class _PendingWrite:
+    __slots__ = ("data_dir", "records", "check_pr", "is_pr", "done", "error")
+
+    def __init__(self, data_dir: str, records: List[Dict[str, Any]], check_pr: bool = False):
+        self.data_dir = data_dir
+        self.records = records
+        self.check_pr = check_pr
+        self.is_pr: Optional[bool] = None
+        self.done = threading.Event()
+        self.error: Optional[BaseException] = None
+
+def _commit_batch(data_dir: str, batch: List[_PendingWrite]):
+    records = [r for req in batch for r in req.records]
+    payload = "".join(json.dumps(r, ensure_ascii=False, default=_to_plain) + "\n" for r in records)
+    starts, pos = [], 0
+    for req in batch:
+        starts.append(pos)
+        pos += len(req.records)
+    check_pr = [start for req, start in zip(batch, starts) if req.check_pr]
+    with _transaction(data_dir):
+        if check_pr:
+            # PRs are decided here, where writes are serialized, so each
+            # workout of a concurrent burst is compared with the ones before it
+            _current_rollup(data_dir)
+        before = _signature(data_dir, "workouts")
+        with open(os.path.join(data_dir, WORKOUTS_LOG), 'a', encoding='utf-8') as f:
+            f.write(payload)
+            f.flush()
+            os.fsync(f.fileno())
+            size = f.tell()
+        flags = _apply_records(data_dir, before, records, check_pr)
+    for req, start in zip(batch, starts):
+        if req.check_pr:
+            req.is_pr = flags.get(start, False)
+    if size >= COMPACT_LOG_BYTES:
+        _schedule_compaction(data_dir)
+
+def _writer_loop():
+    while True:
+        batch = [_commit_queue.get()]
+        deadline = time.monotonic() + GROUP_COMMIT_MAX_DELAY
+        while len(batch) < GROUP_COMMIT_MAX_BATCH:
+            try:
+                batch.append(_commit_queue.get(timeout=max(0.0, deadline - time.monotonic())))
+            except queue.Empty:
+                break
+        by_dir: Dict[str, List[_PendingWrite]] = {}
+        for req in batch:
+            by_dir.setdefault(req.data_dir, []).append(req)
+        for data_dir, reqs in by_dir.items():
+            try:
+                _commit_batch(data_dir, reqs)
+            except BaseException as e:
+                for req in reqs:
+                    req.error = e
+            finally:
+                for req in reqs:
+                    req.done.set()
+        with _write_lock:
+            stats = _group_commit_stats
+            stats["batches"] += 1
+            stats["writes"] += len(batch)
+            stats["records"] += sum(len(req.records) for req in batch)
+            stats["max_batch"] = max(stats["max_batch"], len(batch))
+            bucket = 1 << (len(batch) - 1).bit_length()
+            stats["batch_sizes"][bucket] = stats["batch_sizes"].get(bucket, 0) + 1
+
+def _append_records(records: List[Dict[str, Any]], check_pr: bool = False) -> Optional[bool]:
+    """Queue records for the writer thread and block until they are durable.
+
+    With check_pr, the first record must be a put; returns whether it set a
+    new best estimated 1RM for its exercise as of its date.
+    """
+    global _writer
+    ensure_data_dir()
+    req = _PendingWrite(DATA_DIR, records, check_pr)
+    with _write_lock:
+        if _writer is None or not _writer.is_alive():
+            _writer = threading.Thread(target=_writer_loop, name="storage-writer", daemon=True)
+            _writer.start()
+    _commit_queue.put(req)
+    req.done.wait()
+    if req.error is not None:
+        raise req.error
+    return req.is_pr
+
+def group_commit_stats() -> Dict[str, Any]:
+    """Group-commit counters; batch_sizes maps power-of-two buckets to counts"""
+    with _write_lock:
+        return {**_group_commit_stats, "batch_sizes": dict(sorted(_group_commit_stats["batch_sizes"].items()))}
+
+def append_workout(entry: Dict[str, Any], check_pr: bool = False) -> Optional[bool]:
+    """Append a single workout as a put record to the workouts log.
+
+    With check_pr, returns whether it set a new (Epley) PR as of its date.
+    """
+    return _append_records([{"op": "put", "entry": entry}], check_pr)
+
+def append_workouts(workouts: List[Any]):
+    """Append workouts to the workouts log"""
+    if workouts:
+        _append_records([{"op": "put", "entry": w} for w in workouts])
+
+def delete_workout(workout_id: str, date: Optional[str] = None):
+    """Record a tombstone for a workout id.
+
+    Passing the workout's date lets compaction rewrite only its month shard
+    instead of checking every shard for the id.
+    """
+    record = {"op": "del", "id": workout_id}
+    if date is not None:
+        record["date"] = date
+    _append_records([record])
+
+def _schedule_compaction(data_dir: str):
+    with _write_lock:
+        if data_dir in _compacting:
+            return
+        _compacting.add(data_dir)
+    if COMPACT_IN_BACKGROUND:
+        threading.Thread(target=_compact_and_release, args=(data_dir,), daemon=True).start()
+    else:
+        _compact_and_release(data_dir)
+
+def _compact_and_release(data_dir: str):
+    try:
+        compact_workouts(data_dir)
+    finally:
+        with _write_lock:
+            _compacting.discard(data_dir)
+
+def _records_by_shard(records: List[Dict[str, Any]], shards: Iterable[str]) -> Dict[str, List[Dict[str, Any]]]:
+    # Puts go to the shard of their date and dated tombstones to theirs;
+    # a tombstone without a date has to be checked against every shard.
+    # Entries are assumed not to move between months under the same id.
+    everywhere = set(shards)
+    everywhere.update(_shard_of(r.get("entry", {}).get("date")) for r in records if r.get("op") == "put")
+    out: Dict[str, List[Dict[str, Any]]] = {}
+    for rec in records:
+        op = rec.get("op")
+        if op == "put":
+            targets = [_shard_of((rec.get("entry") or {}).get("date"))]
+        elif op == "del":
+            targets = [_shard_of(rec["date"])] if rec.get("date") is not None else sorted(everywhere)
+        else:
+            continue
+        for name in targets:
+            out.setdefault(name, []).append(rec)
+    return out
+
+def compact_workouts(data_dir: str | None = None):
+    """Fold the sealed workouts log segment into the month shards it touches"""
+    data_dir = data_dir or DATA_DIR
+    active = os.path.join(data_dir, WORKOUTS_LOG)
+    sealed = os.path.join(data_dir, WORKOUTS_LOG_SEALED)
+    n = len(SNAPSHOT_SUFFIXES) + 1  # legacy snapshots and the manifest
+    with _transaction(data_dir):
+        if _has_legacy_snapshot(_signature(data_dir, "workouts")):
+            _migrate_workouts(data_dir)
+        # Seal the active segment so appends continue into a fresh one.
+        # A sealed segment left over from an interrupted run is folded first.
+        if not os.path.exists(sealed):
+            if not os.path.exists(active):
+                return
+            before = _signature(data_dir, "workouts")
+            os.replace(active, sealed)
+            _fsync_dir(data_dir)
+            _resign(data_dir, before)
+        inputs = _signature(data_dir, "workouts")[:n], _file_signature(sealed)
+        shards = _read_manifest(data_dir)
+    # Fold without holding the lock so appends are not blocked
+    os.makedirs(os.path.join(data_dir, WORKOUTS_DIR), exist_ok=True)
+    updated = dict(shards)
+    written = []
+    for name, recs in _records_by_shard(_read_log(sealed), shards).items():
+        old = shards.get(name)
+        items = _load_file(os.path.join(data_dir, WORKOUTS_DIR, old["file"])) if old else []
+        folded = _fold(items, recs)
+        if old and len(folded) == len(items) and all(r.get("op") == "del" for r in recs):
+            continue  # only tombstones for ids this shard never had
+        if folded:
+            updated[name] = _write_shard(data_dir, name, folded)
+            written.append(updated[name]["file"])
+        else:
+            updated.pop(name, None)
+    with _transaction(data_dir):
+        if (_signature(data_dir, "workouts")[:n], _file_signature(sealed)) != inputs:
+            # Another writer (write_json, or a compaction in another process)
+            # changed the inputs meanwhile; our result is stale
+            for fname in written:
+                try:
+                    os.remove(os.path.join(data_dir, WORKOUTS_DIR, fname))
+                except FileNotFoundError:
+                    pass
+            return
+        # Same logical contents, only the file layout changes
+        before = _signature(data_dir, "workouts")
+        _swap_manifest(data_dir, updated)
+        os.remove(sealed)
+        _fsync_dir(data_dir)
+        _resign(data_dir, before)
+        key = _cache_key(data_dir, "workouts")
+        cached = _cache.get(key)
+        if cached is not None:
+            _cache[key] = (cached[0], _Snapshot(_by_shard(cached[1].items())))
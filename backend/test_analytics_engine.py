@@ -0,0 +1,84 @@
+import unittest
+import importlib.util
+import os
+import tempfile
+from fastapi.testclient import TestClient
+
+from main import app
+import storage
+import repository
+from database import MigrationManager
+from services import analytics_service
+from test_set_store import random_workouts
+
+
+class TestAnalyticsEngine(unittest.TestCase):
+    def setUp(self):
+        self.tmpdir = tempfile.mkdtemp()
+        storage.DATA_DIR = self.tmpdir
+        self.workouts = random_workouts(200, seed=11)
+        storage.write_json("workouts", self.workouts)
+        self.client = TestClient(app)
+        self.orig_db_path = repository.WORKOUT_DB_PATH
+
+    def tearDown(self):
+        repository.WORKOUT_BACKEND = "json"
+        repository.WORKOUT_DB_PATH = self.orig_db_path
+
+    def test_dashboard_builds_engine_once_per_version(self):
+        built = []
+        orig = analytics_service.AnalyticsEngine.__init__
+
+        def spy(engine, cols):
+            built.append(engine)
+            orig(engine, cols)
+
+        analytics_service.AnalyticsEngine.__init__ = spy
+        try:
+            for path, params in (
+                ("/api/analytics/weekly-volume", None),
+                ("/api/analytics/monthly-volume", None),
+                ("/api/analytics/pr-trend", {"exercise": "Squat"}),
+                ("/api/analytics/muscle-volume-range", {"start": "2025-02-01"}),
+                ("/api/analytics/exercise-detail", {"exercise": "Row"}),
+                ("/api/coach/recommendations", None),
+            ):
+                self.assertEqual(self.client.get(path, params=params).status_code, 200)
+            self.assertEqual(len(built), 1)
+            storage.append_workout({"id": "new", "date": "2025-07-01", "category": "Legs", "exercise": "Squat", "type": "strength", "sets": [{"weight_kg": 200, "reps": 1}]})
+            self.assertEqual(analytics_service.pr_trend("Squat")[-1]["date"], "2025-07-01")
+            self.assertEqual(len(built), 1)
+            self.assertEqual(analytics_service.weekly_volume()[-1]["week_start"], "2025-06-30")
+            self.assertEqual(len(built), 2)
+        finally:
+            analytics_service.AnalyticsEngine.__init__ = orig
+
+    @unittest.skipUnless(importlib.util.find_spec("pandas"), "pandas not installed")
+    def test_period_volume_matches_pandas(self):
+        import pandas as pd
+
+        df = pd.DataFrame(self.workouts)
+        df["date"] = pd.to_datetime(df["date"])
+        df["volume"] = df["sets"].apply(lambda sets: sum(s["weight_kg"] * s["reps"] for s in sets))
+        for period, column, fn in (("W", "week_start", analytics_service.weekly_volume), ("M", "month", analytics_service.monthly_volume)):
+            df[column] = df["date"].dt.to_period(period).dt.start_time
+            expected = df.groupby(column)["volume"].sum().reset_index()
+            expected[column] = expected[column].dt.strftime("%Y-%m-%d" if period == "W" else "%Y-%m")
+            got = fn()
+            self.assertEqual([r[column] for r in got], expected[column].tolist())
+            for r, v in zip(got, expected["volume"].tolist()):
+                self.assertAlmostEqual(r["volume"], v, places=6)
+
+    def test_weekly_volume_matches_on_sqlite(self):
+        from_json = self.client.get("/api/analytics/weekly-volume").json()
+        MigrationManager(os.path.join(self.tmpdir, "workout.db")).run_migrations()
+        sql = repository.SqliteWorkoutRepository(os.path.join(self.tmpdir, "workout.db"))
+        sql.add_workouts(self.workouts)
+        repository.WORKOUT_BACKEND = "sqlite"
+        repository.WORKOUT_DB_PATH = sql.db_path
+        self.assertEqual(self.client.get("/api/analytics/weekly-volume").json(), from_json)
+        self.assertEqual(from_json[0]["week_start"], "2024-12-30")
+
+
+if __name__ == '__main__':
+    unittest.main()
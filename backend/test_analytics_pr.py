@@ -2,6 +2,7 @@ import unittest
 import os
 import tempfile
 import json
+from concurrent.futures import ThreadPoolExecutor
 from fastapi.testclient import TestClient
 
 from main import app
@@ -42,4 +43,52 @@ class TestAnalyticsPR(unittest.TestCase):
         vals = [p["one_rm"] for p in data]
         self.assertGreater(vals[1], vals[0])
 
+    def test_pr_trend_batch(self):
+        single = {ex: self.client.get("/api/analytics/pr-trend", params={"exercise": ex}).json() for ex in ("Bench Press", "Deadlift")}
+        resp = self.client.get("/api/analytics/pr-trend/batch", params=[("exercise", "Bench Press"), ("exercise", "Deadlift"), ("exercise", "Squat")])
+        self.assertEqual(resp.status_code, 200)
+        self.assertEqual(resp.json(), {**single, "Squat": []})
+        self.assertEqual(self.client.get("/api/analytics/pr-trend/batch").json(), single)
+
+        body = {"exercises": "all", "start": "2025-01-05"}
+        data = self.client.post("/api/analytics/pr-trend/batch", json=body).json()
+        self.assertEqual(list(data), ["Bench Press", "Deadlift"])
+        self.assertEqual([p["date"] for p in data["Bench Press"]], ["2025-01-05"])
+        too_many = {"exercises": [f"e{i}" for i in range(101)]}
+        self.assertEqual(self.client.post("/api/analytics/pr-trend/batch", json=too_many).status_code, 400)
+
+    def test_pr_as_of_and_new_pr_flag(self):
+        r = self.client.get("/api/analytics/pr-as-of", params={"exercise": "Bench Press", "date": "2025-01-04"}).json()
+        self.assertEqual((r["date"], r["one_rm"]), ("2025-01-01", 85 * (1 + 3 / 30)))
+        self.assertIsNone(self.client.get("/api/analytics/pr-as-of", params={"exercise": "Squat"}).json()["one_rm"])
+
+        base = {"date": "2025-01-06", "category": "Chest", "exercise": "Bench Press", "type": "strength"}
+        weaker = self.client.post("/api/workouts", json={**base, "sets": [{"weight_kg": 90, "reps": 1}]}).json()
+        self.assertFalse(weaker["is_pr"])
+        stronger = self.client.post("/api/workouts", json={**base, "sets": [{"weight_kg": 100, "reps": 3}]}).json()
+        self.assertTrue(stronger["is_pr"])
+        self.assertEqual(self.client.get("/api/analytics/pr-as-of", params={"exercise": "Bench Press"}).json()["date"], "2025-01-06")
+
+        self.client.delete(f"/api/workouts/{stronger['id']}")
+        r = self.client.get("/api/analytics/pr-as-of", params={"exercise": "Bench Press"}).json()
+        self.assertEqual((r["date"], r["one_rm"]), ("2025-01-05", 90 * (1 + 2 / 30)))
+
+    def test_concurrent_burst_flags_one_pr(self):
+        # A session posted as a burst: only the first of equal sets to commit is a PR
+        body = {"date": "2025-01-06", "category": "Legs", "exercise": "Squat", "type": "strength", "sets": [{"weight_kg": 120, "reps": 5}]}
+        with ThreadPoolExecutor(max_workers=8) as pool:
+            results = list(pool.map(lambda _: self.client.post("/api/workouts", json=body).json(), range(16)))
+        self.assertEqual(sum(r["is_pr"] for r in results), 1)
+
+    def test_formula_param(self):
+        r = self.client.get("/api/analytics/pr-trend", params={"exercise": "Deadlift", "formula": "brzycki"})
+        self.assertAlmostEqual(r.json()[0]["one_rm"], 140 * 36 / 34)
+        batch = self.client.post("/api/analytics/pr-trend/batch", json={"exercises": ["Deadlift"], "formula": "lombardi"}).json()
+        self.assertAlmostEqual(batch["Deadlift"][0]["one_rm"], 140 * 3 ** 0.1)
+        best = self.client.get("/api/analytics/pr-as-of", params={"exercise": "Bench Press", "formula": "brzycki"}).json()
+        self.assertEqual(best["date"], "2025-01-05")
+        self.assertEqual(self.client.get("/api/analytics/pr-trend", params={"exercise": "Deadlift", "formula": "mayhew"}).status_code, 400)
+
 
+if __name__ == '__main__':
+    unittest.main()
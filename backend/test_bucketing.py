@@ -0,0 +1,79 @@
+import unittest
+import random
+import tempfile
+from datetime import date, timedelta
+from fastapi.testclient import TestClient
+
+from main import app
+import storage
+from services import config_service
+from services.bucketing import BUCKETS, bucket_label, bucket_starts
+
+
+def reference_start(d: date, bucket: str, week_start: int) -> date:
+    if bucket == "week":
+        return d - timedelta(days=(d.weekday() - week_start) % 7)
+    if bucket == "month":
+        return d.replace(day=1)
+    if bucket == "quarter":
+        return date(d.year, (d.month - 1) // 3 * 3 + 1, 1)
+    if bucket == "year":
+        return date(d.year, 1, 1)
+    return d
+
+
+def workout(day, weight):
+    return {"id": day, "date": day, "category": "Legs", "exercise": "Squat", "type": "strength", "sets": [{"weight_kg": weight, "reps": 1}]}
+
+
+class TestBucketing(unittest.TestCase):
+    def setUp(self):
+        storage.DATA_DIR = tempfile.mkdtemp()
+        # Sat 2025-03-29, Sun 03-30, Mon 03-31, Tue 04-01
+        storage.write_json("workouts", [workout("2025-03-29", 10), workout("2025-03-30", 20), workout("2025-03-31", 40), workout("2025-04-01", 80)])
+        storage.write_json("config", {"categories": ["Legs"]})
+        self.client = TestClient(app)
+        self.orig_poll = config_service.CONFIG_POLL_SECONDS
+        config_service.CONFIG_POLL_SECONDS = 0.0
+
+    def tearDown(self):
+        config_service.CONFIG_POLL_SECONDS = self.orig_poll
+
+    def test_bucket_starts_match_calendar(self):
+        rng = random.Random(1)
+        days = [rng.randint(date(1900, 1, 1).toordinal(), date(2100, 12, 31).toordinal()) for _ in range(2000)]
+        for bucket in BUCKETS:
+            for week_start in (0, 3, 6):
+                got = bucket_starts(days, bucket, week_start).tolist()
+                expected = [reference_start(date.fromordinal(d), bucket, week_start).toordinal() for d in days]
+                self.assertEqual(got, expected, (bucket, week_start))
+        self.assertEqual(bucket_label(date(2025, 8, 9).toordinal(), "quarter"), "2025-Q3")
+
+    def test_week_start_from_config(self):
+        weekly = self.client.get("/api/analytics/weekly-volume").json()
+        self.assertEqual(weekly, [{"week_start": "2025-03-24", "volume": 30.0}, {"week_start": "2025-03-31", "volume": 120.0}])
+        storage.write_json("config", {"categories": ["Legs"], "week_start": "sunday"})
+        weekly = self.client.get("/api/analytics/weekly-volume").json()
+        self.assertEqual(weekly, [{"week_start": "2025-03-23", "volume": 10.0}, {"week_start": "2025-03-30", "volume": 140.0}])
+        metrics = self.client.get("/api/coach/recommendations").json()["metrics"]
+        self.assertEqual([w["week"] for w in metrics["weeklyFrequency"]], ["2025-03-23", "2025-03-30"])
+        self.assertEqual([w["days"] for w in metrics["weeklyFrequency"]], [1, 3])
+
+    def test_volume_endpoint(self):
+        r = self.client.get("/api/analytics/volume", params={"bucket": "month", "start": "2025-03-30"})
+        self.assertEqual(r.json(), [
+            {"bucket": "2025-03", "start": "2025-03-01", "days": 2, "volume": 60.0},
+            {"bucket": "2025-04", "start": "2025-04-01", "days": 1, "volume": 80.0},
+        ])
+        quarters = self.client.get("/api/analytics/volume", params={"bucket": "quarter"}).json()
+        self.assertEqual([(q["bucket"], q["volume"]) for q in quarters], [("2025-Q1", 70.0), ("2025-Q2", 80.0)])
+        self.assertEqual(self.client.get("/api/analytics/volume", params={"bucket": "fortnight"}).status_code, 400)
+
+    def test_invalid_week_start_rejected(self):
+        with self.assertRaises(config_service.ConfigError):
+            config_service.validate_config({"week_start": "someday"})
+        self.assertEqual(config_service.parse_week_start(6), 6)
+
+
+if __name__ == '__main__':
+    unittest.main()
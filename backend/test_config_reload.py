@@ -0,0 +1,78 @@
+import unittest
+import json
+import os
+import subprocess
+import sys
+import tempfile
+from fastapi.testclient import TestClient
+
+from main import app
+import storage
+from services import config_service
+
+
+CONFIG = {"categories": ["Chest", "Back"], "exercises": {"Chest": ["Bench Press"], "Back": ["Row"]}}
+
+
+class TestConfigReload(unittest.TestCase):
+    def setUp(self):
+        self.tmpdir = tempfile.mkdtemp()
+        storage.DATA_DIR = self.tmpdir
+        storage.write_json("config", CONFIG)
+        self.client = TestClient(app)
+        self.orig_poll = config_service.CONFIG_POLL_SECONDS
+        config_service.CONFIG_POLL_SECONDS = 0.0
+
+    def tearDown(self):
+        config_service.CONFIG_POLL_SECONDS = self.orig_poll
+
+    def test_served_from_memory_until_file_changes(self):
+        self.assertEqual(self.client.get("/api/config").json(), CONFIG)
+        snapshot = config_service.get_config_snapshot()
+        self.assertIs(config_service.get_config_snapshot(), snapshot)
+
+        # An edit from another process (e.g. another worker or an operator)
+        edited = {**CONFIG, "categories": ["Chest", "Back", "Legs"]}
+        code = "import json, os, sys; p = os.path.join(sys.argv[1], 'config.json'); json.dump(json.loads(sys.argv[2]), open(p + '.new', 'w')); os.replace(p + '.new', p)"
+        subprocess.run([sys.executable, "-c", code, self.tmpdir, json.dumps(edited)], check=True)
+        r = self.client.get("/api/config")
+        self.assertEqual(r.json(), edited)
+        self.assertNotEqual(r.headers["etag"], snapshot.etag)
+
+    def test_invalid_edit_keeps_last_good_config(self):
+        self.client.get("/api/config")
+        with open(os.path.join(self.tmpdir, "config.json"), "w", encoding="utf-8") as f:
+            json.dump({"categories": "Chest"}, f)
+        self.assertEqual(self.client.get("/api/config").json(), CONFIG)
+
+    def test_malformed_edit_keeps_last_good_config(self):
+        self.client.get("/api/config")
+        # As seen mid-write by a non-atomic editor
+        with open(os.path.join(self.tmpdir, "config.json"), "w", encoding="utf-8") as f:
+            f.write('{"categories": ["Chest", ')
+        r = self.client.get("/api/config")
+        self.assertEqual(r.json(), CONFIG)
+        with open(os.path.join(self.tmpdir, "config.json"), "w", encoding="utf-8") as f:
+            json.dump({**CONFIG, "categories": ["Chest"]}, f)
+        self.assertEqual(self.client.get("/api/config").json()["categories"], ["Chest"])
+
+    def test_malformed_config_without_fallback(self):
+        storage.DATA_DIR = tempfile.mkdtemp()
+        with open(os.path.join(storage.DATA_DIR, "config.json"), "w", encoding="utf-8") as f:
+            f.write("{")
+        r = self.client.get("/api/config")
+        self.assertEqual(r.status_code, 500)
+        self.assertIn("not valid JSON", r.json()["detail"])
+
+    def test_invalid_config_without_fallback(self):
+        storage.DATA_DIR = tempfile.mkdtemp()
+        storage.write_json("config", ["not", "an", "object"])
+        self.assertEqual(self.client.get("/api/config").status_code, 500)
+
+    def test_missing_config_is_empty(self):
+        storage.DATA_DIR = tempfile.mkdtemp()
+        self.assertEqual(self.client.get("/api/config").json(), {})
+
+
+if __name__ == '__main__':
+    unittest.main()
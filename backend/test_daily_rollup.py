@@ -0,0 +1,138 @@
+import unittest
+import sys
+import tempfile
+import threading
+import time
+from datetime import date, timedelta
+
+import storage
+from daily_rollup import DailyRollup
+from models import day_key
+from services.analytics_service import muscle_volume_by_category, pr_trends
+from services.workouts_service import compute_daily_summary
+from test_set_store import random_workouts
+
+
+def snapshot(rollup):
+    return {
+        key: (r.category, r.workouts, r.sets, round(r.volume, 6), r.top_weight, round(r.one_rm, 6))
+        for key, r in rollup.rows.items()
+    }
+
+
+class TestDailyRollup(unittest.TestCase):
+    def test_remove_recomputes_maxima(self):
+        rollup = DailyRollup([
+            {"id": "a", "date": "2025-01-01", "category": "Legs", "exercise": "Squat", "sets": [{"weight_kg": 100, "reps": 5}]},
+            {"id": "b", "date": "2025-01-01", "category": "Legs", "exercise": "Squat", "sets": [{"weight_kg": 140, "reps": 1}]},
+            {"id": "c", "date": "not a date", "category": "Legs", "exercise": "Squat", "sets": [{"weight_kg": 500, "reps": 1}]},
+        ])
+        row = rollup.rows[("2025-01-01", "Squat")]
+        self.assertEqual((row.workouts, row.sets, row.top_weight), (2, 2, 140.0))
+        rollup.remove("b")
+        self.assertEqual((row.workouts, row.volume, row.top_weight), (1, 500.0, 100.0))
+        self.assertAlmostEqual(row.one_rm, 100 * (1 + 5 / 30))
+        rollup.remove("a")
+        self.assertEqual((rollup.rows, rollup.dates, rollup.by_exercise), ({}, [], {}))
+
+    def test_running_pr_matches_scan(self):
+        workouts = random_workouts(400, seed=9)
+        rollup = DailyRollup(workouts[:200])
+        for ex in ("Squat", "Row"):
+            rollup.running_pr(ex)
+        for w in workouts[200:]:
+            rollup.add(w)
+        rollup.remove(workouts[0]["id"])
+        fresh = DailyRollup(workouts[1:])
+        for ex in ("Squat", "Row", "Bench Press", "Run"):
+            for as_of in (None, "2025-01-15", "2025-03-01", "2025-06-30", "2024-01-01"):
+                days = [r for r in fresh.series(ex, None, as_of) if r.one_rm > 0]
+                expected = None
+                for r in days:
+                    if expected is None or r.one_rm > expected[1]:
+                        expected = (r.date, r.one_rm)
+                self.assertEqual(rollup.best_as_of(ex, as_of), expected)
+
+    def test_running_pr_during_writes(self):
+        rollup = DailyRollup()
+        done = threading.Event()
+        stale = []
+
+        def workout(i):
+            day = date(2020, 1, 1) + timedelta(days=i)
+            return {"id": i, "date": day.isoformat(), "category": "Back", "exercise": "Deadlift",
+                    "sets": [{"weight_kg": 1100 + i, "reps": 1}]}
+
+        def write():
+            # Each removal drops the running PR, so the reader keeps rebuilding
+            # it over the long history while the next heavier workout is added
+            for i in range(1, 1000):
+                rollup.remove(-i)
+                rollup.add(workout(i))
+                # Let an in-flight build finish and register before checking
+                time.sleep(0.0005)
+                best = rollup.best_as_of("Deadlift")
+                if best[0] != workout(i)["date"]:
+                    stale.append((i, best))
+            done.set()
+
+        for i in range(-1000, 1):
+            rollup.add(workout(i))
+        # Switch threads often so a build that misses an add is likely
+        interval = sys.getswitchinterval()
+        sys.setswitchinterval(1e-6)
+        writer = threading.Thread(target=write)
+        writer.start()
+        try:
+            while not done.is_set():
+                rollup.best_as_of("Deadlift")
+        finally:
+            writer.join()
+            sys.setswitchinterval(interval)
+        self.assertEqual(stale, [])
+
+    def test_day_key(self):
+        self.assertEqual(day_key("2025-01-02T10:00:00"), "2025-01-02")
+        self.assertIsNone(day_key("2025-02-30"))
+        self.assertIsNone(day_key(None))
+
+    def test_storage_updates_rollup_in_place(self):
+        storage.DATA_DIR = tempfile.mkdtemp()
+        storage.write_json("workouts", random_workouts(300, seed=5))
+        rollup = storage.get_daily_rollup()
+        storage.append_workout({"id": "new", "date": "2025-07-01", "category": "Back", "exercise": "Row", "type": "strength", "sets": [{"weight_kg": 60, "reps": 10}]})
+        storage.delete_workout(storage.read_json("workouts")[0]["id"])
+        self.assertIs(storage.get_daily_rollup(), rollup)
+        self.assertEqual(snapshot(rollup), snapshot(DailyRollup(storage.read_json("workouts"))))
+        self.assertEqual(compute_daily_summary("2025-07-01"), (1, 600.0))
+        self.assertEqual(compute_daily_summary("2030-01-01"), (0, 0.0))
+
+    def test_reads_during_writes(self):
+        storage.DATA_DIR = tempfile.mkdtemp()
+        storage.write_json("workouts", random_workouts(300, seed=5))
+        rollup = storage.get_daily_rollup()
+        day = rollup.dates[-1]
+        done = threading.Event()
+
+        def write():
+            # New exercises and categories on a day readers are iterating
+            for i in range(300):
+                storage.append_workout({"id": f"n{i}", "date": day, "category": f"C{i}", "exercise": f"E{i}", "type": "strength",
+                                        "sets": [{"weight_kg": 50, "reps": 5}], "cardio": None, "notes": None})
+            done.set()
+
+        writer = threading.Thread(target=write)
+        writer.start()
+        try:
+            while not done.is_set():
+                # Used to fail with "dictionary changed size during iteration"
+                muscle_volume_by_category.uncached(day, day)
+                pr_trends.uncached(None, day, day)
+        finally:
+            writer.join()
+        self.assertIs(storage.get_daily_rollup(), rollup)
+        self.assertEqual(snapshot(rollup), snapshot(DailyRollup(storage.read_json("workouts"))))
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,66 @@
+import unittest
+import os
+import tempfile
+from fastapi.testclient import TestClient
+
+from main import app
+import storage
+import repository
+from database import MigrationManager
+
+
+WORKOUT = {"date": "2025-01-01", "category": "Chest", "exercise": "Bench Press", "type": "strength", "sets": [{"weight_kg": 80, "reps": 5}]}
+
+
+class TestETag(unittest.TestCase):
+    def setUp(self):
+        self.tmpdir = tempfile.mkdtemp()
+        storage.DATA_DIR = self.tmpdir
+        storage.write_json("workouts", [])
+        storage.write_json("routines", [])
+        storage.write_json("config", {"categories": ["Chest"]})
+        self.client = TestClient(app)
+
+    def tearDown(self):
+        repository.WORKOUT_BACKEND = "json"
+
+    def revalidate(self, path, params=None):
+        first = self.client.get(path, params=params)
+        self.assertEqual(first.status_code, 200)
+        etag = first.headers["etag"]
+        self.assertIn("no-cache", first.headers["cache-control"])
+        again = self.client.get(path, params=params, headers={"If-None-Match": etag})
+        self.assertEqual(again.status_code, 304)
+        self.assertEqual(again.content, b"")
+        self.assertEqual(again.headers["etag"], etag)
+        return etag
+
+    def test_not_modified_until_data_changes(self):
+        for path in ("/api/workouts", "/api/routines", "/api/config", "/api/analytics/muscle-volume-range"):
+            self.revalidate(path)
+        etag = self.revalidate("/api/workouts")
+        self.client.post("/api/workouts", json=WORKOUT)
+        r = self.client.get("/api/workouts", headers={"If-None-Match": etag})
+        self.assertEqual(r.status_code, 200)
+        self.assertEqual(len(r.json()), 1)
+        self.assertNotEqual(r.headers["etag"], etag)
+        # Routines are versioned separately from workouts
+        self.revalidate("/api/routines")
+
+    def test_etag_depends_on_query(self):
+        a = self.revalidate("/api/analytics/pr-trend", {"exercise": "Bench Press"})
+        b = self.revalidate("/api/analytics/pr-trend", {"exercise": "Squat"})
+        self.assertNotEqual(a, b)
+        self.revalidate("/api/workouts", {"start": "2025-01-01"})
+
+    def test_sqlite_backend_version_changes_on_write(self):
+        MigrationManager(os.path.join(self.tmpdir, "workout.db")).run_migrations()
+        repo = repository.SqliteWorkoutRepository(os.path.join(self.tmpdir, "workout.db"))
+        before = repo.data_version()
+        self.assertEqual(repo.data_version(), before)
+        repo.add_workouts([{"id": "x", **WORKOUT}])
+        self.assertNotEqual(repo.data_version(), before)
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,59 @@
+import unittest
+import tempfile
+from concurrent.futures import ThreadPoolExecutor
+from fastapi.testclient import TestClient
+
+from main import app
+import storage
+
+
+class TestGroupCommit(unittest.TestCase):
+    def setUp(self):
+        self.tmpdir = tempfile.mkdtemp()
+        storage.DATA_DIR = self.tmpdir
+        self.orig_delay = storage.GROUP_COMMIT_MAX_DELAY
+        storage.GROUP_COMMIT_MAX_DELAY = 0.05
+        self.client = TestClient(app)
+
+    def tearDown(self):
+        storage.GROUP_COMMIT_MAX_DELAY = self.orig_delay
+
+    def test_concurrent_posts_are_coalesced_and_all_kept(self):
+        before = storage.group_commit_stats()
+
+        def post(i):
+            r = self.client.post("/api/workouts", json={"date": "2025-01-01", "category": "Chest", "exercise": f"Ex{i}", "type": "strength", "sets": [{"weight_kg": 50, "reps": 5}]})
+            return r.json()["id"]
+
+        with ThreadPoolExecutor(max_workers=16) as pool:
+            ids = list(pool.map(post, range(40)))
+
+        stored = {w["id"] for w in storage.read_json("workouts")}
+        self.assertEqual(stored, set(ids))
+        # Nothing was lost when compared against a fresh parse of the log
+        storage.clear_cache()
+        self.assertEqual({w["id"] for w in storage.read_json("workouts")}, set(ids))
+
+        after = storage.group_commit_stats()
+        self.assertEqual(after["writes"] - before["writes"], 40)
+        self.assertLess(after["batches"] - before["batches"], 40)
+        self.assertGreater(after["max_batch"], 1)
+        self.assertIn("group_commit", self.client.get("/api/storage/stats").json())
+
+    def test_put_then_delete_in_one_batch(self):
+        storage.write_json("workouts", [])
+        storage.clear_cache()
+        storage.read_json("workouts")
+        storage.get_workout_index()
+        storage._commit_batch(self.tmpdir, [
+            storage._PendingWrite(self.tmpdir, [{"op": "put", "entry": {"id": "a", "date": "2025-01-01", "exercise": "Row"}}]),
+            storage._PendingWrite(self.tmpdir, [{"op": "del", "id": "a"}]),
+            storage._PendingWrite(self.tmpdir, [{"op": "put", "entry": {"id": "b", "date": "2025-01-02", "exercise": "Row"}}]),
+        ])
+        self.assertEqual([w["id"] for w in storage.read_json("workouts")], ["b"])
+        self.assertEqual(storage.cache_stats()["misses"], 1)
+        self.assertIsNone(storage.get_workout_index().get("a"))
+
+
+if __name__ == '__main__':
+    unittest.main()
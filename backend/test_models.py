@@ -0,0 +1,50 @@
+import unittest
+import json
+import tempfile
+
+import storage
+from models import WorkoutEntry, SetRecord, compact_workout, compact_workout_list
+from repository import JsonWorkoutRepository
+
+
+ROWS = [
+    {"id": "a", "date": "2025-01-01", "category": "Legs", "exercise": "Squat", "type": "strength", "sets": [{"weight_kg": 100.0, "reps": 5}], "cardio": None, "notes": None},
+    {"id": "b", "date": "2025-01-02", "category": "Cardio", "exercise": "Run", "type": "cardio", "sets": [], "cardio": {"minutes": 30.0, "distance_km": 5.0}, "notes": "easy"},
+]
+
+
+class TestModels(unittest.TestCase):
+    def test_compact_list_round_trips_and_interns(self):
+        entries = compact_workout_list(json.loads(json.dumps(ROWS * 2)))
+        self.assertEqual([e.to_dict() for e in entries], ROWS * 2)
+        self.assertIs(entries[0].exercise, entries[2].exercise)
+        self.assertFalse(hasattr(entries[0], "__dict__"))
+        self.assertFalse(hasattr(SetRecord(1.0, 1), "__dict__"))
+
+    def test_records_read_like_the_stored_dicts(self):
+        entry = compact_workout(ROWS[0])
+        self.assertEqual(entry, ROWS[0])
+        self.assertEqual(entry.get("sets")[0].get("reps"), 5)
+        self.assertEqual(entry["cardio"], None)
+        self.assertIsNone(entry.get("bogus"))
+        self.assertEqual({**entry, "notes": "x"}["notes"], "x")
+
+    def test_storage_holds_records_and_hands_out_dicts(self):
+        storage.DATA_DIR = tempfile.mkdtemp()
+        odd = {"id": "c", "date": "2025-01-03", "exercise": "Row", "extra": 1}
+        storage.write_json("workouts", json.loads(json.dumps(ROWS * 2)) + [odd])
+        storage.append_workout(dict(ROWS[0], id="d"))
+        storage.clear_cache()
+        items = storage.read_json("workouts")
+        self.assertTrue(all(isinstance(w, WorkoutEntry) for w in items[:4] + items[5:]))
+        self.assertIs(items[0]["category"], items[2]["category"])
+        self.assertIs(items[0]["date"], items[2]["date"])
+        # Anything the records cannot hold is kept as a dict
+        self.assertEqual(items[4], odd)
+        listed = JsonWorkoutRepository().list_workouts()
+        self.assertTrue(all(type(w) is dict for w in listed))
+        self.assertEqual(json.loads(json.dumps(listed)), ROWS * 2 + [odd, dict(ROWS[0], id="d")])
+
+
+if __name__ == '__main__':
+    unittest.main()
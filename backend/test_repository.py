@@ -0,0 +1,101 @@
+import unittest
+import os
+import tempfile
+from concurrent.futures import ThreadPoolExecutor
+from fastapi.testclient import TestClient
+
+from main import app
+import storage
+import repository
+from database import MigrationManager
+
+
+SEED = [
+    {"id": "w1", "date": "2025-01-01", "category": "Chest", "exercise": "Bench Press", "type": "strength", "sets": [{"weight_kg": 80.0, "reps": 5}, {"weight_kg": 85.0, "reps": 3}], "cardio": None, "notes": None},
+    {"id": "w2", "date": "2025-01-05", "category": "Chest", "exercise": "Bench Press", "type": "strength", "sets": [{"weight_kg": 90.0, "reps": 2}], "cardio": None, "notes": "heavy"},
+    {"id": "w3", "date": "2025-01-05", "category": "Back", "exercise": "Row", "type": "strength", "sets": [{"weight_kg": 60.0, "reps": 12}], "cardio": None, "notes": None},
+    {"id": "w4", "date": "2025-02-01", "category": "Cardio", "exercise": "Run", "type": "cardio", "sets": [], "cardio": {"minutes": 30.0, "distance_km": 5.0}, "notes": None},
+]
+
+
+class TestSqliteRepository(unittest.TestCase):
+    def setUp(self):
+        self.tmpdir = tempfile.mkdtemp()
+        self.orig_db_path = repository.WORKOUT_DB_PATH
+        storage.DATA_DIR = self.tmpdir
+        storage.write_json("workouts", SEED)
+        MigrationManager(os.path.join(self.tmpdir, "workout.db")).run_migrations()
+        self.sqlite = repository.SqliteWorkoutRepository(os.path.join(self.tmpdir, "workout.db"))
+        self.sqlite.add_workouts(SEED)
+        self.client = TestClient(app)
+
+    def tearDown(self):
+        repository.WORKOUT_BACKEND = "json"
+        repository.WORKOUT_DB_PATH = self.orig_db_path
+
+    def _get_both(self, path, params=None):
+        repository.WORKOUT_BACKEND = "json"
+        from_json = self.client.get(path, params=params).json()
+        repository.WORKOUT_BACKEND = "sqlite"
+        repository.WORKOUT_DB_PATH = self.sqlite.db_path
+        from_sqlite = self.client.get(path, params=params).json()
+        repository.WORKOUT_BACKEND = "json"
+        return from_json, from_sqlite
+
+    def test_reads_match_json_backend(self):
+        for path in ("/api/workouts", "/api/workouts/2025-01-05", "/api/workouts/exercise/Bench Press/last"):
+            a, b = self._get_both(path)
+            self.assertEqual(a, b, path)
+
+    def test_analytics_match_json_backend(self):
+        cases = [
+            ("/api/analytics/pr-trend", {"exercise": "Bench Press", "start": "2025-01-01", "end": "2025-01-07"}),
+            ("/api/analytics/muscle-volume-range", {"start": "2025-01-01", "end": "2025-01-31"}),
+            ("/api/analytics/muscle-volume-range", None),
+            ("/api/analytics/exercise-detail", {"exercise": "Bench Press"}),
+        ]
+        for path, params in cases:
+            a, b = self._get_both(path, params)
+            self.assertEqual(len(a), len(b), path)
+            for x, y in zip(a, b):
+                self.assertEqual(x.keys(), y.keys())
+                for k in x:
+                    if isinstance(x[k], float):
+                        self.assertAlmostEqual(x[k], y[k], places=6)
+                    else:
+                        self.assertEqual(x[k], y[k])
+
+    def test_writes_through_endpoints(self):
+        repository.WORKOUT_BACKEND = "sqlite"
+        repository.WORKOUT_DB_PATH = self.sqlite.db_path
+        r = self.client.post("/api/workouts", json={"date": "2025-03-01", "category": "Legs", "exercise": "Squat", "type": "strength", "sets": [{"weight_kg": 100, "reps": 5}]})
+        new_id = r.json()["id"]
+        self.assertTrue(r.json()["is_pr"])
+        self.assertEqual(self.sqlite.get_workout(new_id)["sets"], [{"weight_kg": 100.0, "reps": 5}])
+        self.client.delete(f"/api/workouts/{new_id}")
+        self.assertIsNone(self.sqlite.get_workout(new_id))
+
+        r = self.client.post("/api/routines", json={"name": "A", "items": [{"exercise": "Squat", "category": "Legs", "sets": 3, "reps": "5"}]})
+        rid = r.json()["id"]
+        self.assertEqual(self.client.get("/api/routines").json(), [r.json()])
+        self.client.delete(f"/api/routines/{rid}")
+        self.assertEqual(self.client.get("/api/routines").json(), [])
+        # JSON files are untouched while the SQLite backend is selected
+        self.assertEqual(storage.read_json("workouts"), SEED)
+
+    def test_requires_migrated_schema(self):
+        with self.assertRaises(RuntimeError):
+            repository.SqliteWorkoutRepository(os.path.join(self.tmpdir, "bare.db"))
+        with self.sqlite._connect() as conn:
+            plan = conn.execute("EXPLAIN QUERY PLAN SELECT id FROM workouts WHERE exercise = ? AND date <= ?", ("Squat", "2025-01-01")).fetchall()
+        self.assertIn("idx_workouts_exercise_date", " ".join(row[-1] for row in plan))
+
+    def test_concurrent_adds_flag_one_pr(self):
+        entries = [{**SEED[0], "id": f"b{i}", "date": "2025-01-06", "sets": [{"weight_kg": 100.0, "reps": 5}]} for i in range(8)]
+        with ThreadPoolExecutor(max_workers=8) as pool:
+            flags = list(pool.map(lambda w: self.sqlite.add_workout(w, check_pr=True), entries))
+        self.assertEqual(flags.count(True), 1)
+
+
+if __name__ == '__main__':
+    unittest.main()
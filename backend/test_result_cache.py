@@ -0,0 +1,57 @@
+import unittest
+import tempfile
+from fastapi.testclient import TestClient
+
+from main import app
+import storage
+from services import analytics_service
+from services.result_cache import ResultCache
+from test_set_store import random_workouts
+
+
+class TestResultCache(unittest.TestCase):
+    def setUp(self):
+        storage.DATA_DIR = tempfile.mkdtemp()
+        storage.write_json("workouts", random_workouts(200, seed=4))
+        self.client = TestClient(app)
+        analytics_service._results.clear()
+
+    def test_hits_until_a_write(self):
+        first = analytics_service.pr_trend("Squat", None, None)
+        self.assertIs(analytics_service.pr_trend("Squat"), first)
+        self.assertIs(analytics_service.pr_trend(exercise="Squat", formula="epley"), first)
+        stats = analytics_service.result_cache_stats()["functions"]["pr_trend"]
+        self.assertEqual((stats["hits"], stats["misses"]), (2, 1))
+
+        storage.append_workout({"id": "new", "date": "2025-07-01", "category": "Legs", "exercise": "Squat", "type": "strength", "sets": [{"weight_kg": 300, "reps": 1}]})
+        after = analytics_service.pr_trend("Squat")
+        self.assertEqual(after[-1]["date"], "2025-07-01")
+        self.assertEqual(after, analytics_service.pr_trend.uncached("Squat"))
+        self.assertEqual(analytics_service.weekly_volume()[-1]["week_start"], "2025-06-30")
+
+    def test_lru_eviction(self):
+        calls = []
+        cache = ResultCache(lambda: 1, max_entries=2)
+
+        @cache.memoize
+        def square(x, scale=1):
+            calls.append(x)
+            return x * x * scale
+
+        for x in (1, 2, 1, 3, 1, 2):
+            square(x)
+        # 2 was least recently used when 3 arrived, so it is recomputed
+        self.assertEqual(calls, [1, 2, 3, 2])
+        stats = cache.stats()
+        self.assertEqual(stats["entries"], 2)
+        self.assertEqual(stats["functions"]["square"], {"hits": 2, "misses": 4, "evictions": 2, "hit_rate": 0.3333})
+
+    def test_stats_endpoint(self):
+        for _ in range(3):
+            self.client.get("/api/analytics/muscle-volume-range", params={"start": "2025-02-01"})
+        stats = self.client.get("/api/analytics/cache-stats").json()
+        self.assertEqual(stats["functions"]["muscle_volume_by_category"]["hits"], 2)
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,105 @@
+import unittest
+import os
+import random
+import tempfile
+
+import numpy as np
+
+import storage
+import repository
+from database import MigrationManager
+from services import set_store, analytics_service
+from services.analytics_service import pr_trend, pr_trends, pr_as_of, muscle_volume_by_category, exercise_detail
+
+
+def random_workouts(n, seed=3):
+    rng = random.Random(seed)
+    out = []
+    for i in range(n):
+        ex, cat = rng.choice([("Bench Press", "Chest"), ("Row", "Back"), ("Squat", "Legs"), ("Run", "Cardio")])
+        sets = [] if cat == "Cardio" else [{"weight_kg": float(rng.randint(0, 120)), "reps": rng.randint(0, 12)} for _ in range(rng.randint(0, 4))]
+        out.append({"id": f"w{i}", "date": f"2025-{rng.randint(1, 6):02d}-{rng.randint(1, 28):02d}", "category": cat, "exercise": ex, "type": "strength", "sets": sets})
+    return out
+
+
+class TestSetStore(unittest.TestCase):
+    def setUp(self):
+        self.tmpdir = tempfile.mkdtemp()
+        storage.DATA_DIR = self.tmpdir
+        self.workouts = random_workouts(300)
+        storage.write_json("workouts", self.workouts)
+
+    def assertRowsAlmostEqual(self, a, b):
+        self.assertEqual(len(a), len(b))
+        for x, y in zip(a, b):
+            self.assertEqual(x.keys(), y.keys())
+            for k in x:
+                if isinstance(x[k], float):
+                    self.assertAlmostEqual(x[k], y[k], places=6)
+                else:
+                    self.assertEqual(x[k], y[k])
+
+    def test_vectorized_analytics_match_sql(self):
+        MigrationManager(os.path.join(self.tmpdir, "workout.db")).run_migrations()
+        sql = repository.SqliteWorkoutRepository(os.path.join(self.tmpdir, "workout.db"))
+        sql.add_workouts(self.workouts)
+        for start, end in ((None, None), ("2025-02-01", "2025-03-15")):
+            for ex in ("Bench Press", "Squat", "Run"):
+                self.assertRowsAlmostEqual(pr_trend(ex, start, end), sql.pr_trend(ex, start, end))
+                self.assertRowsAlmostEqual(exercise_detail(ex, start, end), sql.exercise_detail(ex, start, end))
+                best, sql_best = pr_as_of(ex, end), sql.best_one_rm(ex, end)
+                self.assertRowsAlmostEqual([best] if best else [], [sql_best] if sql_best else [])
+            batch, sql_batch = pr_trends(None, start, end), sql.pr_trends(None, start, end)
+            self.assertEqual(batch.keys(), sql_batch.keys())
+            for ex in sql_batch:
+                self.assertRowsAlmostEqual(batch[ex], sql_batch[ex])
+            as_dict = {r["category"]: r["volume"] for r in muscle_volume_by_category(start, end)}
+            expected = {r["category"]: r["volume"] for r in sql.volume_by_category(start, end)}
+            self.assertEqual(as_dict.keys(), expected.keys())
+            for k in expected:
+                self.assertAlmostEqual(as_dict[k], expected[k], places=6)
+
+    def test_one_rm_formulas_match_scalar(self):
+        scalar = {
+            "epley": lambda w, r: w * (1 + r / 30),
+            "brzycki": lambda w, r: w * 36 / (37 - r) if r < 37 else 0.0,
+            "lombardi": lambda w, r: w * r ** 0.1,
+        }
+        for formula, fn in scalar.items():
+            expected = {}
+            for w in self.workouts:
+                if not "2025-02-01" <= w["date"] <= "2025-05-31":
+                    continue
+                for st in w["sets"]:
+                    if st["weight_kg"] > 0 and st["reps"] > 0:
+                        days = expected.setdefault(w["exercise"], {})
+                        days[w["date"]] = max(days.get(w["date"], 0.0), fn(st["weight_kg"], st["reps"]))
+            got = pr_trends(None, "2025-02-01", "2025-05-31", formula)
+            self.assertEqual(got.keys(), expected.keys())
+            for ex, days in expected.items():
+                self.assertRowsAlmostEqual(got[ex], [{"date": d, "one_rm": v} for d, v in sorted(days.items())])
+        self.assertRowsAlmostEqual(analytics_service._best_by_day("epley", None, None)["Squat"], pr_trend("Squat"))
+        with self.assertRaises(ValueError):
+            analytics_service.estimate_one_rm([100.0], [5], "mayhew")
+
+    def test_columns_persisted_and_memory_mapped(self):
+        cols = set_store.get_set_columns()
+        self.assertIs(set_store.get_set_columns(), cols)
+        set_store._columns.clear()
+        reloaded = set_store.get_set_columns()
+        self.assertIsInstance(reloaded.day, np.memmap)
+        np.testing.assert_array_equal(reloaded.weight, cols.weight)
+        self.assertEqual(reloaded.exercises, cols.exercises)
+
+    def test_rebuilt_after_write(self):
+        before = pr_trend("Deadlift")
+        self.assertEqual(before, [])
+        storage.append_workout({"id": "x", "date": "2025-07-01", "category": "Back", "exercise": "Deadlift", "type": "strength", "sets": [{"weight_kg": 150, "reps": 3}]})
+        self.assertEqual(pr_trend("Deadlift"), [{"date": "2025-07-01", "one_rm": 165.0}])
+        self.assertIn("Deadlift", set_store.get_set_columns().exercises)
+        tags = {f.split(".")[0] for f in os.listdir(os.path.join(self.tmpdir, "columns")) if f.endswith(".npy")}
+        self.assertEqual(len(tags), 1)
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,57 @@
+import unittest
+import json
+import os
+import subprocess
+import sys
+import tempfile
+
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+IMPORT_BUDGET_SECONDS = float(os.getenv("IMPORT_BUDGET_SECONDS", "5.0"))
+
+PROBE = """
+import json, sys, time
+start = time.perf_counter()
+import backend.main
+print(json.dumps({"seconds": time.perf_counter() - start, "modules": sorted(sys.modules)}))
+"""
+
+# Drives the app the way `python run.py` loads it, with the repo root first on sys.path
+ENDPOINTS_PROBE = """
+import json, sys
+from fastapi.testclient import TestClient
+from run import app
+client = TestClient(app)
+workout = {"date": "2025-05-01", "category": "Legs", "exercise": "Squat", "type": "strength", "sets": [{"weight_kg": 100, "reps": 5}]}
+statuses = {"POST /api/workouts": client.post("/api/workouts", json=workout).status_code}
+for path in ("/api/analytics/weekly-volume", "/api/analytics/pr-trend?exercise=Squat",
+             "/api/coach/recommendations", "/api/calendar-summary/2025-05-01"):
+    r = client.get(path)
+    statuses[path] = r.status_code
+summary = client.get("/api/calendar-summary/2025-05-01").json()
+print(json.dumps({"statuses": statuses, "summary": summary, "bare": sorted(m for m in ("storage", "repository", "models", "daily_rollup") if m in sys.modules)}))
+"""
+
+
+class TestStartup(unittest.TestCase):
+    def test_import_main(self):
+        # Run from a scratch directory: importing main creates the data dir under cwd
+        env = {**os.environ, "PYTHONPATH": ROOT}
+        out = subprocess.run([sys.executable, "-c", PROBE], cwd=tempfile.mkdtemp(), env=env, check=True, capture_output=True, text=True)
+        result = json.loads(out.stdout.splitlines()[-1])
+        for heavy in ("pandas", "numpy", "openai"):
+            self.assertNotIn(heavy, result["modules"])
+        self.assertLess(result["seconds"], IMPORT_BUDGET_SECONDS, f"import backend.main took {result['seconds'] * 1000:.0f} ms")
+
+    def test_endpoints_through_run(self):
+        env = {**os.environ, "PYTHONPATH": ROOT}
+        out = subprocess.run([sys.executable, "-c", ENDPOINTS_PROBE], cwd=tempfile.mkdtemp(), env=env, check=True, capture_output=True, text=True)
+        result = json.loads(out.stdout.splitlines()[-1])
+        self.assertEqual(set(result["statuses"].values()), {200}, result["statuses"])
+        self.assertEqual(result["summary"], {"sets_count": 1, "volume": 500.0})
+        # Services load the backend package modules, never a second top-level copy
+        self.assertEqual(result["bare"], [])
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,65 @@
+import unittest
+import os
+import tempfile
+import json
+from fastapi.testclient import TestClient
+
+from main import app
+import storage
+
+
+class TestStorageCache(unittest.TestCase):
+    def setUp(self):
+        self.tmpdir = tempfile.mkdtemp()
+        storage.DATA_DIR = self.tmpdir
+        storage.clear_cache()
+        storage.write_json("routines", [{"id": "r1", "name": "A", "memo": None, "items": []}])
+        self.client = TestClient(app)
+
+    def test_repeated_reads_hit_cache(self):
+        first = storage.read_json("routines")
+        second = storage.read_json("routines")
+        self.assertIs(first, second)
+        stats = storage.cache_stats()
+        self.assertEqual(stats["misses"], 0)
+        self.assertEqual(stats["hits"], 2)
+
+    def test_external_file_change_invalidates(self):
+        storage.read_json("routines")
+        with open(os.path.join(self.tmpdir, "routines.json"), "w", encoding="utf-8") as f:
+            json.dump([{"id": "r1"}, {"id": "r2"}], f)
+        self.assertEqual(len(storage.read_json("routines")), 2)
+        self.assertEqual(storage.cache_stats()["misses"], 1)
+
+    def test_writes_swap_snapshot(self):
+        self.client.post("/api/routines", json={"name": "B", "items": []})
+        self.assertEqual([r["name"] for r in storage.read_json("routines")], ["A", "B"])
+        storage.write_json("workouts", [])
+        self.client.post("/api/workouts", json={"date": "2025-01-01", "category": "Chest", "exercise": "Bench Press", "type": "strength", "sets": []})
+        self.assertEqual(len(storage.read_json("workouts")), 1)
+        self.assertEqual(storage.cache_stats()["misses"], 0)
+        r = self.client.get("/api/storage/stats")
+        self.assertEqual(r.status_code, 200)
+        self.assertIn("hits", r.json())
+
+    def test_log_writes_update_snapshot_by_id(self):
+        storage.write_json("workouts", [{"id": "a", "date": "2025-01-01"}, {"id": "b", "date": "2025-01-02"}])
+        storage.read_json("workouts")
+        storage.append_workout({"id": "a", "date": "2025-01-01", "notes": "edited"})
+        storage.append_workout({"id": "c", "date": "2025-01-03"})
+        storage.delete_workout("b", "2025-01-02")
+        items = storage.read_json("workouts")
+        # A re-put replaces the entry in place, as when folding the log
+        self.assertEqual([(w["id"], w.get("notes")) for w in items], [("a", "edited"), ("c", None)])
+        self.assertEqual(storage.cache_stats()["misses"], 0)
+        storage.clear_cache()
+        self.assertEqual(storage.read_json("workouts"), items)
+
+    def test_data_version_changes_on_write(self):
+        v1 = storage.data_version("workouts")
+        storage.append_workout({"id": "x", "date": "2025-01-01"})
+        self.assertNotEqual(storage.data_version("workouts"), v1)
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,73 @@
+import unittest
+import json
+import os
+import subprocess
+import sys
+import tempfile
+
+import storage
+
+WORKOUTS = [
+    {"id": "a", "date": "2025-01-01", "category": "Back", "exercise": "Row", "sets": [{"weight_kg": 60.0, "reps": 8}]},
+    {"id": "b", "date": "2025-01-02", "category": "Legs", "exercise": "스쿼트", "sets": []},
+]
+
+
+class TestStorageFormats(unittest.TestCase):
+    def setUp(self):
+        self.tmpdir = tempfile.mkdtemp()
+        storage.DATA_DIR = self.tmpdir
+        self.orig_format = storage.STORAGE_FORMAT
+
+    def tearDown(self):
+        storage.STORAGE_FORMAT = self.orig_format
+
+    def test_compact_json_is_smaller_and_round_trips(self):
+        storage.write_json("routines", WORKOUTS)
+        pretty = os.path.getsize(os.path.join(self.tmpdir, "routines.json"))
+        storage.STORAGE_FORMAT = "compact"
+        storage.write_json("routines", WORKOUTS)
+        self.assertLess(os.path.getsize(os.path.join(self.tmpdir, "routines.json")), pretty)
+        storage.clear_cache()
+        self.assertEqual(storage.read_json("routines"), WORKOUTS)
+
+    @unittest.skipIf(storage.msgpack is None, "msgpack not installed")
+    def test_legacy_json_is_migrated_to_msgpack(self):
+        with open(os.path.join(self.tmpdir, "workouts.json"), "w", encoding="utf-8") as f:
+            json.dump(WORKOUTS, f)
+        storage.STORAGE_FORMAT = "msgpack"
+        storage.append_workout({"id": "c", "date": "2025-01-03", "exercise": "Row", "sets": []})
+        self.assertEqual([w["id"] for w in storage.read_json("workouts")], ["a", "b", "c"])
+        self.assertFalse(os.path.exists(os.path.join(self.tmpdir, "workouts.json")))
+        shards = storage._read_manifest(self.tmpdir)
+        self.assertTrue(shards["2025-01"]["file"].endswith(".msgpack"))
+
+        storage.compact_workouts()
+        storage.clear_cache()
+        self.assertEqual([w["id"] for w in storage.read_json("workouts")], ["a", "b", "c"])
+        self.assertEqual(storage.read_json("workouts")[1]["exercise"], "스쿼트")
+
+    @unittest.skipIf(storage.msgpack is None, "msgpack not installed")
+    def test_config_stays_json(self):
+        storage.STORAGE_FORMAT = "msgpack"
+        storage.write_json("config", {"week_start": "monday"})
+        with open(os.path.join(self.tmpdir, "config.json"), encoding="utf-8") as f:
+            self.assertEqual(json.load(f), {"week_start": "monday"})
+
+    def test_unknown_format_rejected(self):
+        storage.STORAGE_FORMAT = "yaml"
+        with self.assertRaises(ValueError):
+            storage.write_json("routines", [])
+
+    def test_unknown_format_fails_at_import(self):
+        here = os.path.dirname(os.path.abspath(__file__))
+        proc = subprocess.run(
+            [sys.executable, "-c", "import storage"], cwd=here, capture_output=True, text=True,
+            env={**os.environ, "STORAGE_FORMAT": "yaml"},
+        )
+        self.assertNotEqual(proc.returncode, 0)
+        self.assertIn("Unsupported STORAGE_FORMAT 'yaml'", proc.stderr)
+
+
+if __name__ == '__main__':
+    unittest.main()
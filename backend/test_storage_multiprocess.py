@@ -0,0 +1,95 @@
+import unittest
+import os
+import subprocess
+import sys
+import tempfile
+import textwrap
+
+import storage
+
+WRITER = textwrap.dedent("""
+    import sys
+    import storage
+    storage.DATA_DIR = sys.argv[1]
+    storage.COMPACT_LOG_BYTES = 2048
+    storage.COMPACT_IN_BACKGROUND = False
+    worker = sys.argv[2]
+    for i in range(40):
+        storage.append_workout({"id": f"{worker}-{i}", "date": "2025-01-01", "exercise": "Row", "sets": []})
+        if i % 10 == 0:
+            storage.delete_workout(f"{worker}-{i}")
+""")
+
+ROUTINE_WRITER = textwrap.dedent("""
+    import sys
+    import threading
+    import storage
+    from repository import JsonWorkoutRepository
+    storage.DATA_DIR = sys.argv[1]
+    repo = JsonWorkoutRepository()
+    worker = sys.argv[2]
+
+    def run(t):
+        for i in range(10):
+            repo.add_routine({"id": f"{worker}-{t}-{i}", "name": "R", "memo": None, "items": []})
+        repo.delete_routine(f"{worker}-{t}-0")
+
+    threads = [threading.Thread(target=run, args=(t,)) for t in range(4)]
+    for th in threads:
+        th.start()
+    for th in threads:
+        th.join()
+""")
+
+
+class TestStorageMultiprocess(unittest.TestCase):
+    def setUp(self):
+        self.tmpdir = tempfile.mkdtemp()
+        storage.DATA_DIR = self.tmpdir
+        storage.write_json("workouts", [{"id": "seed", "date": "2025-01-01", "exercise": "Row", "sets": []}])
+
+    def test_concurrent_writer_processes_lose_nothing(self):
+        # Prime this process' cache so we also check it notices foreign writes
+        self.assertEqual(len(storage.read_json("workouts")), 1)
+        here = os.path.dirname(os.path.abspath(__file__))
+        procs = [
+            subprocess.Popen([sys.executable, "-c", WRITER, self.tmpdir, f"p{n}"], cwd=here)
+            for n in range(4)
+        ]
+        for p in procs:
+            self.assertEqual(p.wait(timeout=120), 0)
+
+        expected = {"seed"} | {f"p{n}-{i}" for n in range(4) for i in range(40) if i % 10}
+        self.assertEqual({w["id"] for w in storage.read_json("workouts")}, expected)
+        storage.compact_workouts()
+        storage.clear_cache()
+        self.assertEqual({w["id"] for w in storage.read_json("workouts")}, expected)
+        leftovers = [f for f in os.listdir(self.tmpdir) if f.endswith(".tmp")]
+        self.assertEqual(leftovers, [])
+
+    def test_concurrent_routine_updates_lose_nothing(self):
+        storage.write_json("routines", [{"id": "seed", "name": "S", "memo": None, "items": []}])
+        here = os.path.dirname(os.path.abspath(__file__))
+        procs = [
+            subprocess.Popen([sys.executable, "-c", ROUTINE_WRITER, self.tmpdir, f"p{n}"], cwd=here)
+            for n in range(4)
+        ]
+        for p in procs:
+            self.assertEqual(p.wait(timeout=120), 0)
+
+        expected = {"seed"} | {f"p{n}-{t}-{i}" for n in range(4) for t in range(4) for i in range(1, 10)}
+        routines = storage.read_json("routines")
+        self.assertEqual(len(routines), len(expected))
+        self.assertEqual({r["id"] for r in routines}, expected)
+
+    def test_write_json_replaces_atomically(self):
+        path = os.path.join(self.tmpdir, "routines.json")
+        storage.write_json("routines", [{"id": "r1"}])
+        inode = os.stat(path).st_ino
+        storage.write_json("routines", [{"id": "r2"}])
+        self.assertNotEqual(os.stat(path).st_ino, inode)
+        self.assertEqual(storage.read_json("routines"), [{"id": "r2"}])
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,99 @@
+import unittest
+import sys
+import tempfile
+import threading
+import time
+from datetime import date, timedelta
+from fastapi.testclient import TestClient
+
+from main import app
+import storage
+from daily_rollup import DailyRollup, DayVolumeSeries
+from test_set_store import random_workouts
+
+
+def workout(wid, day, weight):
+    return {"id": wid, "date": day, "category": "Legs", "exercise": "Squat", "type": "strength", "sets": [{"weight_kg": weight, "reps": 10}]}
+
+
+class TestWorkload(unittest.TestCase):
+    def setUp(self):
+        storage.DATA_DIR = tempfile.mkdtemp()
+        self.client = TestClient(app)
+
+    def test_windows_match_brute_force(self):
+        workouts = random_workouts(300, seed=8)
+        rollup = DailyRollup(workouts[:150])
+        rollup.volume.window(date(2025, 3, 1).toordinal(), 7)
+        for w in workouts[150:]:
+            rollup.add(w)
+        for w in workouts[::7]:
+            rollup.remove(w["id"])
+        removed = {w["id"] for w in workouts[::7]}
+        per_day = {}
+        for w in workouts:
+            if w["id"] not in removed:
+                per_day[w["date"]] = per_day.get(w["date"], 0.0) + sum(s["weight_kg"] * s["reps"] for s in w["sets"])
+        day = date(2024, 12, 20)
+        while day <= date(2025, 7, 10):
+            for length in (1, 7, 28):
+                expected = sum(per_day.get((day - timedelta(days=k)).isoformat(), 0.0) for k in range(length))
+                self.assertAlmostEqual(rollup.volume.window(day.toordinal(), length), expected, places=6)
+            day += timedelta(days=1)
+
+    def test_windows_during_writes(self):
+        series = DayVolumeSeries()
+        for day in range(5000):
+            series.set(day, 1.0)
+        done = threading.Event()
+        stale = []
+
+        def write():
+            # Raising an early day invalidates almost every prefix sum
+            for i in range(1, 300):
+                series.set(0, float(i))
+                # Let an in-flight recompute finish before checking
+                time.sleep(0.0005)
+                if series.window(4999, 5000) != 4999.0 + i:
+                    stale.append(i)
+            done.set()
+
+        # Switch threads often so a set lands inside a recompute
+        interval = sys.getswitchinterval()
+        sys.setswitchinterval(1e-6)
+        writer = threading.Thread(target=write)
+        writer.start()
+        try:
+            while not done.is_set():
+                series.window(4999, 7)
+        finally:
+            writer.join()
+            sys.setswitchinterval(interval)
+        self.assertEqual(stale, [])
+
+    def test_endpoint_and_incremental_updates(self):
+        storage.write_json("workouts", [workout(f"w{i}", f"2025-05-{1 + 7 * i:02d}", 50) for i in range(4)])
+        body = self.client.get("/api/analytics/workload").json()
+        self.assertEqual((body["acute_days"], body["chronic_days"], len(body["points"])), (7, 28, 28))
+        last = body["points"][-1]
+        self.assertEqual(last, {"date": "2025-05-22", "volume": 500.0, "acute": 500.0, "chronic": 500.0, "acwr": 1.0})
+
+        storage.append_workout(workout("spike", "2025-05-22", 150))
+        last = self.client.get("/api/analytics/workload", params={"start": "2025-05-22", "end": "2025-05-22"}).json()["points"][-1]
+        self.assertEqual((last["acute"], last["chronic"], last["acwr"]), (2000.0, 875.0, 2.286))
+        coach = self.client.get("/api/coach/recommendations").json()
+        self.assertEqual(coach["metrics"]["workload"]["acwr"], 2.286)
+        self.assertIn("Manage Recovery After Volume Spike", [r["title"] for r in coach["recommendations"]])
+
+        storage.delete_workout("spike", date="2025-05-22")
+        last = self.client.get("/api/analytics/workload", params={"end": "2025-05-22"}).json()["points"][-1]
+        self.assertEqual(last["acwr"], 1.0)
+
+    def test_invalid_params(self):
+        for params in ({"acute": 28, "chronic": 7}, {"start": "2025-01-01", "end": "2030-01-01"}, {"end": "not-a-date"}):
+            self.assertEqual(self.client.get("/api/analytics/workload", params=params).status_code, 400)
+        self.assertEqual(self.client.get("/api/analytics/workload").json()["points"], [])
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,82 @@
+import unittest
+import json
+import os
+import tempfile
+from fastapi.testclient import TestClient
+
+from main import app
+import storage
+import repository
+from database import MigrationManager
+from models import canonical_date
+
+
+WORKOUT = {"category": "Legs", "exercise": "Squat", "type": "strength", "sets": [{"weight_kg": 100, "reps": 5}]}
+
+
+class TestWorkoutDates(unittest.TestCase):
+    def setUp(self):
+        self.tmpdir = tempfile.mkdtemp()
+        storage.DATA_DIR = self.tmpdir
+        storage.write_json("workouts", [])
+        self.client = TestClient(app)
+
+    def test_canonical_date(self):
+        self.assertEqual(canonical_date("2025-03-01"), "2025-03-01")
+        self.assertEqual(canonical_date(" 2025-03-01T18:30:00+09:00 "), "2025-03-01")
+        for bad in ("2025-02-30", "03/01/2025", "", None, 20250301):
+            with self.assertRaises(ValueError):
+                canonical_date(bad)
+
+    def test_dates_validated_and_canonicalized_at_ingest(self):
+        r = self.client.post("/api/workouts", json={**WORKOUT, "date": "2025-03-01T07:15:00"})
+        self.assertEqual(r.status_code, 200)
+        self.assertEqual(r.json()["date"], "2025-03-01")
+        self.assertEqual(self.client.post("/api/workouts", json={**WORKOUT, "date": "2025-13-01"}).status_code, 422)
+        body = "\n".join(json.dumps({**WORKOUT, "date": d}) for d in ("2025-03-02", "yesterday"))
+        out = self.client.post("/api/workouts/bulk", content=body.encode("utf-8")).json()
+        self.assertEqual((out["imported"], out["failed"]), (1, 1))
+        self.assertEqual([w["date"] for w in storage.read_json("workouts")], ["2025-03-01", "2025-03-02"])
+
+    def test_query_bounds_canonicalized_at_the_edge(self):
+        self.client.post("/api/workouts", json={**WORKOUT, "date": "2025-03-01"})
+        # A datetime bound is reduced to its day; a malformed one is rejected, not ignored
+        r = self.client.get("/api/workouts", params={"start": "2025-03-01T23:00:00", "limit": 10})
+        self.assertEqual([w["date"] for w in r.json()["items"]], ["2025-03-01"])
+        for path, params in (
+            ("/api/workouts", {"start": "2025-3-1"}),
+            ("/api/analytics/pr-trend", {"exercise": "Squat", "start": "2025-02-30"}),
+            ("/api/analytics/pr-trend/batch", {"end": "someday"}),
+            ("/api/analytics/pr-as-of", {"exercise": "Squat", "date": "2025-02-30"}),
+            ("/api/analytics/muscle-volume-range", {"start": "2025-02-30"}),
+            ("/api/analytics/exercise-detail", {"exercise": "Squat", "end": "2025-02-30"}),
+            ("/api/analytics/volume", {"start": "2025-02-30"}),
+            ("/api/analytics/workload", {"end": "2025-02-30"}),
+        ):
+            self.assertEqual(self.client.get(path, params=params).status_code, 400, path)
+        self.assertEqual(self.client.post("/api/analytics/pr-trend/batch", json={"start": "2025-02-30"}).status_code, 400)
+
+    def backfill(self, repo):
+        rows = [
+            {"id": "a", "date": "2025-03-01", **WORKOUT},
+            {"id": "b", "date": "2025-03-02T10:00:00", **WORKOUT},
+            {"id": "c", "date": "someday", **WORKOUT},
+        ]
+        repo.add_workouts(rows)
+        self.assertEqual(repo.normalize_dates(), {"checked": 3, "fixed": 1, "quarantined": 1})
+        self.assertEqual(sorted((w["id"], w["date"]) for w in repo.list_workouts()), [("a", "2025-03-01"), ("b", "2025-03-02")])
+        quarantined = storage.read_json(repository.QUARANTINE_DATASET)
+        self.assertEqual([(w["id"], w["quarantine_reason"]) for w in quarantined], [("c", "invalid date")])
+        self.assertEqual(quarantined[0]["sets"], WORKOUT["sets"])
+        self.assertEqual(repo.normalize_dates(), {"checked": 2, "fixed": 0, "quarantined": 0})
+
+    def test_backfill_json(self):
+        self.backfill(repository.JsonWorkoutRepository())
+
+    def test_backfill_sqlite(self):
+        MigrationManager(os.path.join(self.tmpdir, "workout.db")).run_migrations()
+        self.backfill(repository.SqliteWorkoutRepository(os.path.join(self.tmpdir, "workout.db")))
+
+
+if __name__ == '__main__':
+    unittest.main()
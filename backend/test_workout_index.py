@@ -0,0 +1,85 @@
+import unittest
+import sys
+import tempfile
+import threading
+from fastapi.testclient import TestClient
+
+from main import app
+import storage
+from workout_index import WorkoutIndex
+
+
+def w(wid, date, exercise="Bench Press"):
+    return {"id": wid, "date": date, "category": "Chest", "exercise": exercise, "type": "strength", "sets": []}
+
+
+class TestWorkoutIndex(unittest.TestCase):
+    def test_lookups_and_incremental_updates(self):
+        idx = WorkoutIndex([w("a", "2025-01-03"), w("b", "2025-01-01"), w("c", "2025-01-03"), w("d", "2025-01-02", "Row")])
+        self.assertEqual(idx.get("b")["date"], "2025-01-01")
+        self.assertEqual([x["id"] for x in idx.on_date("2025-01-03")], ["a", "c"])
+        # Ties on the latest date resolve to the first logged entry
+        self.assertEqual(idx.last_for_exercise("Bench Press")["id"], "a")
+        idx.remove("a")
+        self.assertEqual(idx.last_for_exercise("Bench Press")["id"], "c")
+        self.assertEqual([x["id"] for x in idx.on_date("2025-01-03")], ["c"])
+        idx.add(w("e", "2025-02-01"))
+        self.assertEqual(idx.last_for_exercise("Bench Press")["id"], "e")
+        idx.remove("d")
+        self.assertIsNone(idx.last_for_exercise("Row"))
+        self.assertEqual(len(idx), 3)
+
+    def test_queries_during_writes(self):
+        idx = WorkoutIndex([w(f"s{i}", f"2025-01-{1 + i % 28:02d}", "Row") for i in range(200)])
+        idx.add(w("m", "2025-01-01", "Squat"))
+        done = threading.Event()
+        seen = []
+
+        def write():
+            # Re-putting a workout on another date removes and re-adds it
+            for i in range(3000):
+                idx.add(w("m", f"2025-01-{1 + i % 28:02d}", "Squat"))
+            done.set()
+
+        # Switch threads often so a read lands inside an update
+        interval = sys.getswitchinterval()
+        sys.setswitchinterval(1e-6)
+        writer = threading.Thread(target=write)
+        writer.start()
+        try:
+            while not done.is_set():
+                seen.append((idx.last_for_exercise("Squat") is not None, len(idx.scan("2025-01-01", "2025-01-31"))))
+        finally:
+            writer.join()
+            sys.setswitchinterval(interval)
+        self.assertEqual(set(seen), {(True, 201)})
+
+
+class TestWorkoutIndexEndpoints(unittest.TestCase):
+    def setUp(self):
+        self.tmpdir = tempfile.mkdtemp()
+        storage.DATA_DIR = self.tmpdir
+        storage.write_json("workouts", [w("a", "2025-01-01"), w("b", "2025-01-05")])
+        self.client = TestClient(app)
+
+    def test_index_follows_writes(self):
+        idx = storage.get_workout_index()
+        r = self.client.post("/api/workouts", json={"date": "2025-01-09", "category": "Chest", "exercise": "Bench Press", "type": "strength"})
+        new_id = r.json()["id"]
+        # Updated in place rather than rebuilt
+        self.assertIs(storage.get_workout_index(), idx)
+        last = self.client.get("/api/workouts/exercise/Bench Press/last").json()
+        self.assertEqual(last["id"], new_id)
+        self.client.delete(f"/api/workouts/{new_id}")
+        self.assertEqual(self.client.get("/api/workouts/exercise/Bench Press/last").json()["id"], "b")
+        self.assertEqual([x["id"] for x in self.client.get("/api/workouts/2025-01-01").json()], ["a"])
+        self.assertIs(storage.get_workout_index(), idx)
+
+    def test_external_rewrite_rebuilds(self):
+        storage.get_workout_index()
+        storage.write_json("workouts", [w("z", "2025-03-01")])
+        self.assertEqual(self.client.get("/api/workouts/exercise/Bench Press/last").json()["id"], "z")
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,100 @@
+import unittest
+import json
+import os
+import tempfile
+
+import storage
+import repository
+
+
+def make(wid, d):
+    return {"id": wid, "date": d, "category": "Legs", "exercise": "Squat", "type": "strength", "sets": [{"weight_kg": 100.0, "reps": 5}]}
+
+
+SEED = [make("a", "2025-03-10"), make("b", "2025-01-05"), make("c", "2025-03-01"), make("d", "2025-02-14"), make("x", "someday")]
+
+
+class TestWorkoutShards(unittest.TestCase):
+    def setUp(self):
+        self.tmpdir = tempfile.mkdtemp()
+        storage.DATA_DIR = self.tmpdir
+        storage.write_json("workouts", SEED)
+
+    def shard_files(self):
+        return {name: meta["file"] for name, meta in storage._read_manifest(self.tmpdir).items()}
+
+    def test_one_shard_per_month(self):
+        self.assertEqual(set(self.shard_files()), {"2025-01", "2025-02", "2025-03", "undated"})
+        self.assertEqual([w["id"] for w in storage.read_json("workouts")], ["b", "d", "a", "c", "x"])
+        storage.clear_cache()
+        self.assertEqual([w["id"] for w in storage.read_json("workouts")], ["b", "d", "a", "c", "x"])
+
+    def test_compaction_rewrites_only_touched_months(self):
+        before = self.shard_files()
+        storage.append_workout(make("e", "2025-03-20"))
+        repository.JsonWorkoutRepository().delete_workout("b")
+        storage.compact_workouts()
+        after = self.shard_files()
+        self.assertNotIn("2025-01", after)
+        self.assertEqual(after["2025-02"], before["2025-02"])
+        self.assertEqual(after["undated"], before["undated"])
+        self.assertNotEqual(after["2025-03"], before["2025-03"])
+        expected = storage.read_json("workouts")
+        self.assertEqual([w["id"] for w in expected], ["d", "a", "c", "e", "x"])
+        storage.clear_cache()
+        self.assertEqual(storage.read_json("workouts"), expected)
+        self.assertEqual(sorted(os.listdir(os.path.join(self.tmpdir, storage.WORKOUTS_DIR))), sorted([*after.values(), storage.WORKOUTS_MANIFEST]))
+
+    def test_range_read_opens_only_overlapping_shards(self):
+        storage.append_workout(make("e", "2025-03-20"))
+        storage.clear_cache()
+        opened = []
+        orig = storage._load_file
+
+        def spy(path, missing_ok=True):
+            opened.append(os.path.basename(path))
+            return orig(path, missing_ok)
+
+        storage._load_file = spy
+        try:
+            rows = storage.read_workouts_range("2025-03-01", "2025-03-15")
+            on_day = repository.JsonWorkoutRepository().workouts_on("2025-03-20")
+        finally:
+            storage._load_file = orig
+        self.assertEqual([w["id"] for w in rows], ["a", "c"])
+        self.assertEqual([w["id"] for w in on_day], ["e"])
+        self.assertEqual(opened, [self.shard_files()["2025-03"]] * 2)
+
+    def test_cold_paging_reads_each_shard_once(self):
+        storage.write_json("workouts", [make(f"w{m}-{d}", f"2025-{m:02d}-{d:02d}") for m in range(1, 13) for d in (1, 15)])
+        storage.clear_cache()
+        opened = []
+        orig = storage._load_file
+
+        def spy(path, missing_ok=True):
+            opened.append(os.path.basename(path))
+            return orig(path, missing_ok)
+
+        repo = repository.JsonWorkoutRepository()
+        storage._load_file = spy
+        try:
+            rows, page = [], repo.query_workouts("2025-01-01", limit=3)
+            while page:
+                rows += page
+                page = repo.query_workouts("2025-01-01", after=(page[-1]["date"], page[-1]["id"]), limit=3)
+        finally:
+            storage._load_file = orig
+        self.assertEqual(len(rows), 24)
+        # The first page reads the range, later pages use the index built once
+        self.assertEqual(len(opened), 24)
+
+    def test_single_file_snapshot_is_migrated(self):
+        with open(os.path.join(self.tmpdir, "workouts.json"), "w", encoding="utf-8") as f:
+            json.dump([make("m", "2024-12-31"), make("n", "2025-01-01")], f)
+        self.assertEqual([w["id"] for w in storage.read_json("workouts")], ["m", "n"])
+        self.assertFalse(os.path.exists(os.path.join(self.tmpdir, "workouts.json")))
+        self.assertEqual(set(self.shard_files()), {"2024-12", "2025-01"})
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,95 @@
+import unittest
+import asyncio
+import json
+import tempfile
+from fastapi.testclient import TestClient
+
+import main
+from main import app
+import storage
+
+
+def row(i):
+    return {"date": "2025-03-01", "category": "Back", "exercise": f"Row{i}", "type": "strength", "sets": [{"weight_kg": 50, "reps": 10}]}
+
+
+class TestWorkoutsBulk(unittest.TestCase):
+    def setUp(self):
+        self.tmpdir = tempfile.mkdtemp()
+        storage.DATA_DIR = self.tmpdir
+        self.client = TestClient(app)
+        self.orig_commit_rows = main.BULK_COMMIT_ROWS
+        self.orig_max_line = main.BULK_MAX_LINE_BYTES
+        self.orig_entry = main._workout_entry
+
+    def tearDown(self):
+        main.BULK_COMMIT_ROWS = self.orig_commit_rows
+        main.BULK_MAX_LINE_BYTES = self.orig_max_line
+        main._workout_entry = self.orig_entry
+
+    def test_streamed_import_reports_line_errors(self):
+        main.BULK_COMMIT_ROWS = 10
+        lines = [json.dumps(row(i)) for i in range(25)]
+        lines.insert(3, '{"date": "2025-03-01"}')
+        lines.insert(7, "not json")
+        lines.insert(8, "")
+        body = ("\n".join(lines)).encode("utf-8")
+
+        def chunks():
+            for i in range(0, len(body), 37):
+                yield body[i:i + 37]
+
+        before = storage.group_commit_stats()["batches"]
+        r = self.client.post("/api/workouts/bulk", content=chunks())
+        self.assertEqual(r.status_code, 200)
+        out = r.json()
+        self.assertEqual(out["imported"], 25)
+        self.assertEqual(out["failed"], 2)
+        self.assertEqual([e["line"] for e in out["errors"]], [4, 8])
+        self.assertIn("category", out["errors"][0]["error"])
+
+        stored = storage.read_json("workouts")
+        self.assertEqual(sorted(w["exercise"] for w in stored), sorted(f"Row{i}" for i in range(25)))
+        self.assertEqual(stored[0]["sets"], [{"weight_kg": 50.0, "reps": 10}])
+        self.assertLessEqual(storage.group_commit_stats()["batches"] - before, 3)
+
+    def test_oversized_line_is_rejected_and_skipped(self):
+        main.BULK_MAX_LINE_BYTES = 300
+        # The long line has no newline for several chunks and ends mid-chunk
+        body = (json.dumps(row(0)) + "\n" + "x" * 2000 + "\n" + json.dumps(row(1)) + "\n" + "y" * 400).encode("utf-8")
+
+        def chunks():
+            for i in range(0, len(body), 128):
+                yield body[i:i + 128]
+
+        r = self.client.post("/api/workouts/bulk", content=chunks())
+        out = r.json()
+        self.assertEqual((out["imported"], out["failed"], out["lines"]), (2, 2, 4))
+        self.assertEqual([e["line"] for e in out["errors"]], [2, 4])
+        self.assertIn("exceeds 300 bytes", out["errors"][0]["error"])
+        self.assertEqual(sorted(w["exercise"] for w in storage.read_json("workouts")), ["Row0", "Row1"])
+
+    def test_lines_validated_off_the_event_loop(self):
+        on_loop = []
+
+        def entry(model):
+            try:
+                asyncio.get_running_loop()
+                on_loop.append(model.exercise)
+            except RuntimeError:
+                pass
+            return self.orig_entry(model)
+
+        main._workout_entry = entry
+        body = "\n".join(json.dumps(row(i)) for i in range(5)).encode("utf-8")
+        r = self.client.post("/api/workouts/bulk", content=body)
+        self.assertEqual(r.json()["imported"], 5)
+        self.assertEqual(on_loop, [])
+
+    def test_empty_body(self):
+        r = self.client.post("/api/workouts/bulk", content=b"")
+        self.assertEqual(r.json(), {"imported": 0, "failed": 0, "lines": 0, "errors": []})
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,66 @@
+import unittest
+import os
+import tempfile
+import json
+from fastapi.testclient import TestClient
+
+from main import app
+import storage
+
+
+def make_workout(date, exercise="Bench Press", weight=60, reps=10):
+    return {"date": date, "category": "Chest", "exercise": exercise, "type": "strength", "sets": [{"weight_kg": weight, "reps": reps}]}
+
+
+class TestWorkoutsLog(unittest.TestCase):
+    def setUp(self):
+        self.tmpdir = tempfile.mkdtemp()
+        storage.DATA_DIR = self.tmpdir
+        storage.write_json("workouts", [
+            {"id": "w0", "date": "2025-01-01", "category": "Back", "exercise": "Row", "type": "strength", "sets": []},
+        ])
+        self.client = TestClient(app)
+
+    def test_post_appends_to_log_without_rewriting_snapshot(self):
+        snapshot = os.path.join(self.tmpdir, storage.WORKOUTS_DIR, storage.WORKOUTS_MANIFEST)
+        before = os.path.getmtime(snapshot)
+        r = self.client.post("/api/workouts", json=make_workout("2025-01-02"))
+        self.assertEqual(r.status_code, 200)
+        new_id = r.json()["id"]
+        self.assertEqual(os.path.getmtime(snapshot), before)
+        with open(os.path.join(self.tmpdir, storage.WORKOUTS_LOG), encoding="utf-8") as f:
+            records = [json.loads(line) for line in f]
+        self.assertEqual(records[-1]["op"], "put")
+        ids = [w["id"] for w in self.client.get("/api/workouts").json()]
+        self.assertEqual(ids, ["w0", new_id])
+
+    def test_delete_writes_tombstone(self):
+        self.client.delete("/api/workouts/w0")
+        self.assertEqual(self.client.get("/api/workouts").json(), [])
+        with open(os.path.join(self.tmpdir, storage.WORKOUTS_LOG), encoding="utf-8") as f:
+            self.assertEqual(json.loads(f.readline()), {"op": "del", "id": "w0", "date": "2025-01-01"})
+
+    def test_compaction_folds_log_into_snapshot(self):
+        for d in ("2025-01-02", "2025-01-03"):
+            self.client.post("/api/workouts", json=make_workout(d))
+        self.client.delete("/api/workouts/w0")
+        expected = self.client.get("/api/workouts").json()
+        storage.compact_workouts()
+        self.assertFalse(os.path.exists(os.path.join(self.tmpdir, storage.WORKOUTS_LOG)))
+        self.assertEqual(storage._load_shards(self.tmpdir), expected)
+        self.assertEqual(self.client.get("/api/workouts").json(), expected)
+
+    def test_replaying_already_folded_segment_is_idempotent(self):
+        self.client.post("/api/workouts", json=make_workout("2025-01-02"))
+        log = os.path.join(self.tmpdir, storage.WORKOUTS_LOG)
+        with open(log, encoding="utf-8") as f:
+            content = f.read()
+        storage.compact_workouts()
+        # Simulate a crash after the snapshot swap but before the segment was removed
+        with open(os.path.join(self.tmpdir, storage.WORKOUTS_LOG_SEALED), "w", encoding="utf-8") as f:
+            f.write(content + '{"op": "put", "ent')
+        self.assertEqual(len(storage.read_json("workouts")), 2)
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,81 @@
+import unittest
+import os
+import tempfile
+from fastapi.testclient import TestClient
+
+from main import app
+import storage
+import repository
+from database import MigrationManager
+
+
+def make(i, d):
+    return {"id": f"w{i:02d}", "date": d, "category": "Back", "exercise": "Row", "type": "strength", "sets": [{"weight_kg": 50.0, "reps": i}], "cardio": None, "notes": None}
+
+
+DATES = ["2025-01-03", "2025-01-01", "2025-01-02", "2025-01-02", "2025-01-05", "2025-01-04", "2025-01-02"]
+SEED = [make(i, d) for i, d in enumerate(DATES)]
+ORDERED = sorted(SEED, key=lambda w: (w["date"], w["id"]))
+
+
+class TestWorkoutsQuery(unittest.TestCase):
+    def setUp(self):
+        self.tmpdir = tempfile.mkdtemp()
+        storage.DATA_DIR = self.tmpdir
+        storage.write_json("workouts", SEED)
+        self.orig_db_path = repository.WORKOUT_DB_PATH
+        MigrationManager(os.path.join(self.tmpdir, "workout.db")).run_migrations()
+        self.sqlite = repository.SqliteWorkoutRepository(os.path.join(self.tmpdir, "workout.db"))
+        self.sqlite.add_workouts(SEED)
+        self.client = TestClient(app)
+
+    def tearDown(self):
+        repository.WORKOUT_BACKEND = "json"
+        repository.WORKOUT_DB_PATH = self.orig_db_path
+
+    def use(self, backend):
+        repository.WORKOUT_BACKEND = backend
+        repository.WORKOUT_DB_PATH = self.sqlite.db_path
+
+    def walk(self, **params):
+        items, cursor = [], None
+        while True:
+            q = dict(params, limit=2)
+            if cursor:
+                q["cursor"] = cursor
+            body = self.client.get("/api/workouts", params=q).json()
+            self.assertLessEqual(len(body["items"]), 2)
+            items += body["items"]
+            cursor = body["next_cursor"]
+            if cursor is None:
+                return items
+
+    def test_cursor_pages_in_date_order_on_both_backends(self):
+        for backend in ("json", "sqlite"):
+            self.use(backend)
+            self.assertEqual(self.walk(), ORDERED)
+            ranged = self.walk(start="2025-01-02", end="2025-01-04", fields="id,date")
+            self.assertEqual(ranged, [{"id": w["id"], "date": w["date"]} for w in ORDERED if "2025-01-02" <= w["date"] <= "2025-01-04"])
+
+    def test_cursor_survives_writes(self):
+        first = self.client.get("/api/workouts", params={"limit": 3}).json()
+        self.client.delete(f"/api/workouts/{first['items'][-1]['id']}")
+        storage.append_workout(make(99, "2025-01-01"))
+        rest = self.client.get("/api/workouts", params={"limit": 10, "cursor": first["next_cursor"]}).json()
+        self.assertEqual([w["id"] for w in rest["items"]], [w["id"] for w in ORDERED[3:]])
+
+    def test_streamed_export(self):
+        for backend in ("json", "sqlite"):
+            self.use(backend)
+            r = self.client.get("/api/workouts", params={"start": "2025-01-01", "fields": "id"})
+            self.assertEqual(r.json(), [{"id": w["id"]} for w in ORDERED])
+            self.assertEqual(self.client.get("/api/workouts", params={"start": "2026-01-01"}).json(), [])
+
+    def test_bad_parameters(self):
+        self.assertEqual(self.client.get("/api/workouts", params={"fields": "id,bogus"}).status_code, 400)
+        self.assertEqual(self.client.get("/api/workouts", params={"limit": 0}).status_code, 400)
+        self.assertEqual(self.client.get("/api/workouts", params={"limit": 5, "cursor": "%%%"}).status_code, 400)
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,106 @@
+"""
+In-memory secondary indexes over the workouts dataset.
+"""
+import threading
+from bisect import bisect_left, insort
+from itertools import islice
+from typing import Any, Dict, Iterable, Iterator, List, Optional, Tuple
+
+
+class WorkoutIndex:
+    """id, date and exercise lookups over workout entries.
+
+    Entries per exercise are kept sorted by ``(date, -seq)`` where ``seq`` is
+    the insertion order, so the last element is the most recent date and,
+    among entries on that date, the first one logged. ``dates`` holds the
+    distinct dates in sorted order for range scans.
+
+    The JSON store updates its index in place from the writer thread while
+    request threads query it, so every method holds ``lock``.
+    """
+
+    def __init__(self, workouts: Iterable[Dict[str, Any]] = ()):
+        self.lock = threading.RLock()
+        self.by_id: Dict[str, Dict[str, Any]] = {}
+        self.by_date: Dict[str, List[Dict[str, Any]]] = {}
+        self.by_exercise: Dict[str, List[Tuple[str, int, Dict[str, Any]]]] = {}
+        self.dates: List[str] = []
+        self._keys: Dict[int, Tuple[str, int]] = {}
+        self._seq = 0
+        for w in workouts:
+            self.add(w)
+
+    def __len__(self) -> int:
+        with self.lock:
+            return len(self._keys)
+
+    def add(self, entry: Dict[str, Any]):
+        with self.lock:
+            wid = entry.get("id")
+            if wid is not None and wid in self.by_id:
+                self.remove(wid)
+            self._seq += 1
+            date = entry.get("date") or ""
+            key = (date, -self._seq)
+            self._keys[id(entry)] = key
+            if wid is not None:
+                self.by_id[wid] = entry
+            if date not in self.by_date:
+                insort(self.dates, date)
+            self.by_date.setdefault(date, []).append(entry)
+            insort(self.by_exercise.setdefault(entry.get("exercise"), []), (*key, entry), key=lambda t: (t[0], t[1]))
+
+    def remove(self, workout_id: str) -> Optional[Dict[str, Any]]:
+        with self.lock:
+            entry = self.by_id.pop(workout_id, None)
+            if entry is None:
+                return None
+            key = self._keys.pop(id(entry))
+            same_day = self.by_date.get(key[0], [])
+            same_day[:] = [w for w in same_day if w is not entry]
+            if not same_day:
+                self.by_date.pop(key[0], None)
+                pos = bisect_left(self.dates, key[0])
+                if pos < len(self.dates) and self.dates[pos] == key[0]:
+                    del self.dates[pos]
+            series = self.by_exercise.get(entry.get("exercise"), [])
+            pos = bisect_left(series, key, key=lambda t: (t[0], t[1]))
+            if pos < len(series) and series[pos][2] is entry:
+                del series[pos]
+            if not series:
+                self.by_exercise.pop(entry.get("exercise"), None)
+            return entry
+
+    def get(self, workout_id: str) -> Optional[Dict[str, Any]]:
+        with self.lock:
+            return self.by_id.get(workout_id)
+
+    def on_date(self, date: str) -> List[Dict[str, Any]]:
+        with self.lock:
+            return list(self.by_date.get(date, ()))
+
+    def last_for_exercise(self, exercise: str) -> Optional[Dict[str, Any]]:
+        with self.lock:
+            series = self.by_exercise.get(exercise)
+            return series[-1][2] if series else None
+
+    def scan(self, start: Optional[str] = None, end: Optional[str] = None,
+             after: Optional[Tuple[str, str]] = None, limit: Optional[int] = None) -> List[Dict[str, Any]]:
+        """Up to limit entries with start <= date <= end in ``(date, id)``
+        order, resuming strictly after the ``(date, id)`` key ``after``."""
+        with self.lock:
+            return list(islice(self._scan(start, end, after), limit))
+
+    def _scan(self, start: Optional[str], end: Optional[str],
+              after: Optional[Tuple[str, str]]) -> Iterator[Dict[str, Any]]:
+        lo = start or ""
+        if after is not None and after[0] > lo:
+            lo = after[0]
+        dates = self.dates[bisect_left(self.dates, lo):]
+        for date in dates:
+            if end is not None and date > end:
+                break
+            for w in sorted(self.by_date.get(date, ()), key=lambda w: w.get("id") or ""):
+                if after is not None and (date, w.get("id") or "") <= after:
+                    continue
+                yield w
@@ -0,0 +1,29 @@
+"""
+One-time backfill for data written before dates were validated at ingest:
+rewrites every workout date as YYYY-MM-DD and moves workouts whose date does
+not parse to the workouts_quarantine dataset (with a quarantine_reason).
+Uses the backend selected by WORKOUT_BACKEND / WORKOUT_DB_PATH, like the API.
+Run it while the API is stopped. Running it again is a no-op.
+
+Usage: python scripts/backfill_workout_dates.py
+"""
+import os
+import sys
+
+BACKEND_DIR = os.path.join(os.path.dirname(os.path.abspath(__file__)), '..', 'backend')
+sys.path.insert(0, os.path.normpath(BACKEND_DIR))
+
+from repository import get_repository  # noqa: E402
+
+
+def main():
+    # storage.DATA_DIR is relative to the backend directory the API runs from
+    os.chdir(BACKEND_DIR)
+    repo = get_repository()
+    counts = repo.normalize_dates()
+    print(f"{repo.name}: checked {counts['checked']:,} workouts, "
+          f"rewrote {counts['fixed']:,} dates, quarantined {counts['quarantined']:,}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,50 @@
+"""
+Throughput of the bucketing engine: bucket_sums over n day ordinals with
+random volumes for every bucket kind, against a per-row Python grouping
+(date.fromordinal + dict) as used before the engine.
+
+Usage: python scripts/bench_bucketing.py [n_days ...]   (default: 100000 1000000 10000000)
+"""
+import os
+import sys
+from datetime import date
+
+import numpy as np
+
+BACKEND_DIR = os.path.join(os.path.dirname(os.path.abspath(__file__)), '..', 'backend')
+sys.path.insert(0, os.path.normpath(BACKEND_DIR))
+sys.path.insert(0, os.path.dirname(os.path.abspath(__file__)))
+
+from services.bucketing import BUCKETS, bucket_sums  # noqa: E402
+from bench_repository import timed  # noqa: E402
+
+PYTHON_ROWS_MAX = 1_000_000
+
+
+def python_months(days, volume):
+    totals = {}
+    for d, v in zip(days, volume):
+        key = date.fromordinal(d).strftime("%Y-%m")
+        totals[key] = totals.get(key, 0.0) + v
+    return sorted(totals.items())
+
+
+def run(n_days: int):
+    rng = np.random.default_rng(0)
+    days = np.sort(rng.integers(date(2000, 1, 1).toordinal(), date(2030, 1, 1).toordinal(), n_days))
+    volume = rng.random(n_days) * 5000.0
+    print(f"\n{n_days:,} days")
+    print(f"{'bucket':<18}{'ms':>10}{'Mrows/s':>10}")
+    for bucket in BUCKETS:
+        ms = timed(lambda: bucket_sums(days, volume, bucket, 6))
+        print(f"{bucket:<18}{ms:>10.1f}{n_days / ms / 1000.0:>10.1f}")
+    if n_days <= PYTHON_ROWS_MAX:
+        d, v = days.tolist(), volume.tolist()
+        ms = timed(lambda: python_months(d, v), repeat=1)
+        print(f"{'month (python)':<18}{ms:>10.1f}{n_days / ms / 1000.0:>10.1f}")
+
+
+if __name__ == "__main__":
+    sizes = [int(a) for a in sys.argv[1:]] or [100_000, 1_000_000, 10_000_000]
+    for n in sizes:
+        run(n)
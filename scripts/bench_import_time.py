@@ -0,0 +1,73 @@
+"""
+Cold-start cost of the API: runs `python -X importtime -c "import backend.main"`
+in fresh interpreters and summarizes the output - total import time, the
+slowest top-level packages (cumulative) and the slowest individual modules
+(self time). With --budget-ms the script exits 1 when the median total is over
+budget, so a regression can fail a CI step.
+
+Usage: python scripts/bench_import_time.py [--runs N] [--top N] [--budget-ms MS] [--module NAME]
+       (defaults: 5 runs, top 15, no budget, backend.main)
+"""
+import argparse
+import os
+import statistics
+import subprocess
+import sys
+import tempfile
+
+ROOT = os.path.normpath(os.path.join(os.path.dirname(os.path.abspath(__file__)), '..'))
+
+
+def importtime(module: str):
+    """[(self_us, cumulative_us, depth, name)] for one cold import of module."""
+    out = subprocess.run(
+        [sys.executable, "-X", "importtime", "-c", f"import {module}"],
+        # Scratch cwd: importing main creates its data dir under the cwd
+        cwd=tempfile.mkdtemp(), env={**os.environ, "PYTHONPATH": ROOT},
+        capture_output=True, text=True, check=True,
+    )
+    rows = []
+    for line in out.stderr.splitlines():
+        if not line.startswith("import time:") or "self [us]" in line:
+            continue
+        self_us, cumulative_us, name = line[len("import time:"):].split("|")
+        depth = (len(name) - len(name.lstrip())) // 2
+        rows.append((int(self_us), int(cumulative_us), depth, name.strip()))
+    return rows
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    parser.add_argument("--runs", type=int, default=5)
+    parser.add_argument("--top", type=int, default=15)
+    parser.add_argument("--budget-ms", type=float, default=None)
+    parser.add_argument("--module", default="backend.main")
+    args = parser.parse_args()
+
+    runs = [importtime(args.module) for _ in range(args.runs)]
+    totals = [sum(r[0] for r in rows) / 1000.0 for rows in runs]
+    rows = runs[totals.index(statistics.median_low(totals))]
+    total = statistics.median(totals)
+
+    # Self time summed per top-level package
+    packages = {}
+    for self_us, _, _, name in rows:
+        top = name.split(".")[0]
+        packages[top] = packages.get(top, 0) + self_us
+
+    print(f"import {args.module}: median {total:.0f} ms over {args.runs} runs "
+          f"(min {min(totals):.0f}, max {max(totals):.0f}), {len(rows)} modules")
+    print(f"\n{'package':<32}{'ms':>10}{'share':>8}")
+    for name, us in sorted(packages.items(), key=lambda kv: -kv[1])[:args.top]:
+        print(f"{name:<32}{us / 1000.0:>10.1f}{us / 10.0 / max(total, 1e-9):>7.0f}%")
+    print(f"\n{'module (self time)':<48}{'ms':>10}")
+    for self_us, _, _, name in sorted(rows, key=lambda r: -r[0])[:args.top]:
+        print(f"{name:<48}{self_us / 1000.0:>10.1f}")
+
+    if args.budget_ms is not None and total > args.budget_ms:
+        print(f"\nover budget: {total:.0f} ms > {args.budget_ms:.0f} ms", file=sys.stderr)
+        sys.exit(1)
+
+
+if __name__ == "__main__":
+    main()
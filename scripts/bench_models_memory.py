@@ -0,0 +1,50 @@
+"""
+Memory held by 100k workouts in each in-memory form, measured with tracemalloc:
+plain parsed dicts, dicts with interned strings and __slots__ WorkoutEntry
+records built with models.compact_workout_list (what storage caches).
+
+Usage: python scripts/bench_models_memory.py [n_workouts]   (default: 100000)
+"""
+import gc
+import json
+import os
+import sys
+import time
+import tracemalloc
+
+BACKEND_DIR = os.path.join(os.path.dirname(os.path.abspath(__file__)), '..', 'backend')
+sys.path.insert(0, os.path.normpath(BACKEND_DIR))
+sys.path.insert(0, os.path.dirname(os.path.abspath(__file__)))
+
+from models import compact_workout_list, intern_workout  # noqa: E402
+from bench_repository import make_workouts, SETS_PER_WORKOUT  # noqa: E402
+
+
+def measure(build):
+    gc.collect()
+    tracemalloc.start()
+    t0 = time.perf_counter()
+    obj = build()
+    elapsed = time.perf_counter() - t0
+    size = tracemalloc.get_traced_memory()[0]
+    tracemalloc.stop()
+    return obj, size, elapsed * 1000.0
+
+
+def main(n_workouts: int):
+    # Round-trip through JSON so every string is a distinct object, as after a load
+    raw = json.dumps(make_workouts(n_workouts * SETS_PER_WORKOUT))
+    cases = [
+        ("dicts", lambda: json.loads(raw)),
+        ("interned dicts", lambda: [intern_workout(w) for w in json.loads(raw)]),
+        ("slotted models", lambda: compact_workout_list(json.loads(raw))),
+    ]
+    print(f"{n_workouts:,} workouts")
+    print(f"{'form':<18}{'MiB':>10}{'bytes/workout':>16}{'build ms':>12}")
+    for label, build in cases:
+        _, size, ms = measure(build)
+        print(f"{label:<18}{size / 2**20:>10.1f}{size / n_workouts:>16.0f}{ms:>12.0f}")
+
+
+if __name__ == "__main__":
+    main(int(sys.argv[1]) if len(sys.argv) > 1 else 100_000)
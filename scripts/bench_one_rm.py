@@ -0,0 +1,35 @@
+"""
+1RM estimation over every set: the scalar epley_one_rm called in a Python
+loop versus the vectorized estimate_one_rm kernel for each formula, on the
+set columns the analytics engine uses.
+
+Usage: python scripts/bench_one_rm.py [n_sets ...]   (default: 100000 1000000)
+"""
+import os
+import sys
+
+BACKEND_DIR = os.path.join(os.path.dirname(os.path.abspath(__file__)), '..', 'backend')
+sys.path.insert(0, os.path.normpath(BACKEND_DIR))
+sys.path.insert(0, os.path.dirname(os.path.abspath(__file__)))
+
+from services.analytics_service import ONE_RM_FORMULAS, epley_one_rm, estimate_one_rm  # noqa: E402
+from services.set_store import build_columns  # noqa: E402
+from bench_repository import make_workouts, timed  # noqa: E402
+
+
+def run(n_sets: int):
+    cols = build_columns(make_workouts(n_sets))
+    weights, reps = cols.weight.tolist(), cols.reps.tolist()
+    scalar = timed(lambda: [epley_one_rm(w, r) for w, r in zip(weights, reps)])
+    print(f"\n{len(weights):,} sets")
+    print(f"{'path':<20}{'ms':>10}{'speedup':>10}")
+    print(f"{'scalar epley':<20}{scalar:>10.1f}{1.0:>9.1f}x")
+    for formula in ONE_RM_FORMULAS:
+        ms = timed(lambda: estimate_one_rm(cols.weight, cols.reps, formula))
+        print(f"{'kernel ' + formula:<20}{ms:>10.1f}{scalar / ms:>9.1f}x")
+
+
+if __name__ == "__main__":
+    sizes = [int(a) for a in sys.argv[1:]] or [100_000, 1_000_000]
+    for n in sizes:
+        run(n)
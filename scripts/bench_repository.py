@@ -0,0 +1,103 @@
+"""
+Side-by-side benchmark of the JSON and SQLite workout repositories.
+
+Usage: python scripts/bench_repository.py [n_sets ...]   (default: 10000 100000 1000000)
+"""
+import os
+import random
+import sys
+import tempfile
+import time
+import uuid
+from datetime import date, timedelta
+
+BACKEND_DIR = os.path.join(os.path.dirname(os.path.abspath(__file__)), '..', 'backend')
+sys.path.insert(0, os.path.normpath(BACKEND_DIR))
+
+import storage  # noqa: E402
+import repository  # noqa: E402
+from services import analytics_service  # noqa: E402
+
+EXERCISES = {
+    "Chest": ["Bench Press", "Incline Press", "Dips"],
+    "Back": ["Row", "Pull Up", "Lat Pulldown"],
+    "Legs": ["Squat", "Leg Press", "Romanian Deadlift"],
+    "Shoulders": ["Overhead Press", "Lateral Raise"],
+}
+SETS_PER_WORKOUT = 4
+
+
+def make_workouts(n_sets: int, seed: int = 7):
+    rng = random.Random(seed)
+    pairs = [(c, e) for c, names in EXERCISES.items() for e in names]
+    n_workouts = max(1, n_sets // SETS_PER_WORKOUT)
+    start = date(2015, 1, 1)
+    out = []
+    for i in range(n_workouts):
+        category, exercise = rng.choice(pairs)
+        d = start + timedelta(days=i * 3650 // n_workouts)
+        out.append({
+            "id": str(uuid.UUID(int=rng.getrandbits(128))),
+            "date": d.isoformat(),
+            "category": category,
+            "exercise": exercise,
+            "type": "strength",
+            "sets": [{"weight_kg": float(rng.randint(20, 140)), "reps": rng.randint(1, 12)} for _ in range(SETS_PER_WORKOUT)],
+            "cardio": None,
+            "notes": None,
+        })
+    return out
+
+
+def timed(fn, repeat: int = 3) -> float:
+    best = float("inf")
+    for _ in range(repeat):
+        t0 = time.perf_counter()
+        fn()
+        best = min(best, time.perf_counter() - t0)
+    return best * 1000.0
+
+
+def run(n_sets: int):
+    tmp = tempfile.mkdtemp()
+    storage.DATA_DIR = tmp
+    workouts = make_workouts(n_sets)
+    storage.write_json("workouts", workouts)
+    sqlite_repo = repository.SqliteWorkoutRepository(os.path.join(tmp, "workout.db"))
+    sqlite_repo.add_workouts(workouts)
+    repository.WORKOUT_DB_PATH = sqlite_repo.db_path
+
+    mid = workouts[len(workouts) // 2]["date"]
+    year_start = (date.fromisoformat(mid) - timedelta(days=365)).isoformat()
+
+    def cold(fn):
+        def go():
+            storage.clear_cache()
+            fn()
+        return go
+
+    cases = [
+        ("list_workouts (cold)", lambda: cold(repository.get_repository().list_workouts)()),
+        ("workouts_on", lambda: repository.get_repository().workouts_on(mid)),
+        ("last_for_exercise", lambda: repository.get_repository().last_for_exercise("Squat")),
+        ("pr_trend 1y", lambda: analytics_service.pr_trend("Squat", year_start, mid)),
+        ("muscle_volume 1y", lambda: analytics_service.muscle_volume_by_category(year_start, mid)),
+        ("exercise_detail", lambda: analytics_service.exercise_detail("Bench Press")),
+        ("add_workout", lambda: repository.get_repository().add_workout(make_workouts(SETS_PER_WORKOUT, seed=random.random())[0])),
+    ]
+    print(f"\n{n_sets:,} sets ({len(workouts):,} workouts)")
+    print(f"{'operation':<24}{'json ms':>12}{'sqlite ms':>12}")
+    for label, fn in cases:
+        results = []
+        for backend in ("json", "sqlite"):
+            repository.WORKOUT_BACKEND = backend
+            fn()  # warm up caches/indexes the way a running server would
+            results.append(timed(fn))
+        print(f"{label:<24}{results[0]:>12.2f}{results[1]:>12.2f}")
+    repository.WORKOUT_BACKEND = "json"
+
+
+if __name__ == "__main__":
+    sizes = [int(a) for a in sys.argv[1:]] or [10_000, 100_000, 1_000_000]
+    for n in sizes:
+        run(n)
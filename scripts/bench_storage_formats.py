@@ -0,0 +1,40 @@
+"""
+Save/load time and on-disk size of the workouts snapshot (all month shards)
+per storage format.
+
+Usage: python scripts/bench_storage_formats.py [n_sets ...]   (default: 10000 100000 1000000)
+"""
+import os
+import sys
+import tempfile
+
+BACKEND_DIR = os.path.join(os.path.dirname(os.path.abspath(__file__)), '..', 'backend')
+sys.path.insert(0, os.path.normpath(BACKEND_DIR))
+sys.path.insert(0, os.path.dirname(os.path.abspath(__file__)))
+
+import storage  # noqa: E402
+from bench_repository import make_workouts, timed  # noqa: E402
+
+
+def run(n_sets: int):
+    workouts = make_workouts(n_sets)
+    print(f"\n{n_sets:,} sets ({len(workouts):,} workouts)")
+    print(f"{'format':<10}{'save ms':>12}{'load ms':>12}{'bytes':>14}")
+    for fmt in storage.SERIALIZERS:
+        storage.DATA_DIR = tempfile.mkdtemp()
+        storage.STORAGE_FORMAT = fmt
+        save = timed(lambda: storage.write_json("workouts", workouts))
+
+        def load():
+            storage.clear_cache()
+            storage.read_json("workouts")
+
+        shards_dir = os.path.join(storage.DATA_DIR, storage.WORKOUTS_DIR)
+        size = sum(os.path.getsize(os.path.join(shards_dir, f)) for f in os.listdir(shards_dir))
+        print(f"{fmt:<10}{save:>12.1f}{timed(load):>12.1f}{size:>14,}")
+
+
+if __name__ == "__main__":
+    sizes = [int(a) for a in sys.argv[1:]] or [10_000, 100_000, 1_000_000]
+    for n in sizes:
+        run(n)